@@ -0,0 +1,47 @@
+"""add indexes for claim history lookups
+
+Revision ID: add_claim_history_indexes
+Revises: add_fraud_status
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_claim_history_indexes'
+down_revision = 'add_fraud_status'
+branch_labels = None
+depends_on = None
+
+
+def _invoice_number_expr(dialect_name: str):
+    """Same expression SQLAlchemy emits for polymorphic_data["invoice_number"].as_string()."""
+    if dialect_name == 'postgresql':
+        return sa.text("(CAST(polymorphic_data ->> 'invoice_number' AS VARCHAR))")
+    return sa.text("CAST(JSON_EXTRACT(polymorphic_data, '$.\"invoice_number\"') AS VARCHAR)")
+
+
+def upgrade() -> None:
+    """Index the claim-history join/filter columns and the invoice_number JSON path."""
+    op.create_index('ix_policies_user_id', 'policies', ['user_id'], unique=False)
+    op.create_index(
+        'ix_claims_policy_number_submission_date',
+        'claims',
+        ['policy_number', sa.text('submission_date DESC')],
+        unique=False,
+    )
+    op.create_index(
+        'ix_claims_invoice_number',
+        'claims',
+        [_invoice_number_expr(op.get_bind().dialect.name)],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Drop the claim-history indexes."""
+    op.drop_index('ix_claims_invoice_number', table_name='claims')
+    op.drop_index('ix_claims_policy_number_submission_date', table_name='claims')
+    op.drop_index('ix_policies_user_id', table_name='policies')
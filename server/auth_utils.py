@@ -2,6 +2,7 @@
 Authentication utilities for JWT token management and password hashing.
 """
 
+import os
 from datetime import datetime, timedelta
 from typing import Optional
 
@@ -13,24 +14,28 @@ SECRET_KEY = "your-secret-key-change-this-in-production-use-env-variable"  # TOD
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+# bcrypt cost factor (lower it, e.g. BCRYPT_ROUNDS=4, for fast dev seeding)
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
 
 class Hash:
     """Password hashing utilities using bcrypt."""
     
     @staticmethod
-    def hash_password(password: str) -> str:
+    def hash_password(password: str, rounds: int = BCRYPT_ROUNDS) -> str:
         """
         Hash a plain password using bcrypt.
         
         Args:
             password: Plain text password
+            rounds: bcrypt cost factor (defaults to BCRYPT_ROUNDS)
             
         Returns:
             Hashed password string
         """
         # Convert password to bytes and hash
         password_bytes = password.encode('utf-8')
-        salt = bcrypt.gensalt()
+        salt = bcrypt.gensalt(rounds=rounds)
         hashed = bcrypt.hashpw(password_bytes, salt)
         # Return as string for database storage
         return hashed.decode('utf-8')
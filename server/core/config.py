@@ -19,17 +19,24 @@ class Settings(BaseSettings):
     EMBEDDING_DIMENSION: int = 384
     MAX_CHUNK_SIZE: int = 512
     CHUNK_OVERLAP: int = 50
+    PDF_BACKEND: str = "pypdfium2"  # 'pypdfium2' (parallel, C-backed) or 'pypdf2'
+    USE_GPU: bool = False  # run embeddings / flat FAISS search on CUDA when available
     
     # LLM
     OPENROUTER_API_KEY: str = os.getenv("OPENROUTER_API_KEY", "")
     LLM_MODEL: str = "google/gemini-2.0-flash-001"
     LLM_TEMPERATURE: float = 0.3
     LLM_MAX_TOKENS: int = 1024
+    OPENROUTER_RPM: int = 200  # request budget shared by all OpenRouter calls
+    OPENROUTER_MAX_CONCURRENCY: int = 48
     
     # RAG
     MAX_CONTEXT_CHUNKS: int = 5
     MIN_SIMILARITY_SCORE: float = 0.7
     
+    # Fraud detection
+    MAX_CONCURRENT_FRAUD: int = 8  # background fraud jobs allowed to run at once
+    
     # Security
     JWT_SECRET_KEY: str = os.getenv("JWT_SECRET_KEY", "your-secret-key")
     
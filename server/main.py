@@ -21,6 +21,7 @@ from routers import claims as claims_router
 from routers import ai as ai_router
 from routers import policies as policies_router
 from routers import documents as documents_router
+from services.http_client import close_http_client, get_http_client
 
 
 @asynccontextmanager
@@ -31,8 +32,11 @@ async def lifespan(app: FastAPI):
     # Startup: Initialize database
     await init_db()
     print("[OK] Database initialized successfully")
+    # Open the shared LLM HTTP connection pool up front
+    get_http_client()
     yield
     # Shutdown: cleanup if needed
+    await close_http_client()
     print("[BYE] Shutting down application")
 
 
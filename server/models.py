@@ -11,7 +11,7 @@ from typing import Optional
 
 from sqlalchemy import (
     Column, String, Integer, Numeric, DateTime, Date, Text, 
-    ForeignKey, Enum as SQLEnum, JSON, Boolean, LargeBinary
+    ForeignKey, Enum as SQLEnum, JSON, Boolean, LargeBinary, Index
 )
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID as PG_UUID
@@ -116,7 +116,7 @@ class Policy(Base):
 
     id = Column(String, primary_key=True, default=generate_uuid)
     policy_number = Column(String, unique=True, nullable=False, index=True)
-    user_id = Column(String, ForeignKey("users.id"), nullable=False)
+    user_id = Column(String, ForeignKey("users.id"), nullable=False, index=True)
     category = Column(SQLEnum(PolicyCategory), nullable=False)
     title = Column(String, nullable=False)
     coverage_amount = Column(Numeric(12, 2), nullable=False)
@@ -180,6 +180,11 @@ class Claim(Base):
     documents = relationship("Document", back_populates="claim", cascade="all, delete-orphan")
 
 
+# Claim-history lookups: per-policy claims newest first, and duplicate-invoice checks
+Index("ix_claims_policy_number_submission_date", Claim.policy_number, Claim.submission_date.desc())
+Index("ix_claims_invoice_number", Claim.polymorphic_data["invoice_number"].as_string())
+
+
 class Document(Base):
     """Document model matching frontend Document interface"""
     __tablename__ = "documents"
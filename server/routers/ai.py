@@ -917,7 +917,7 @@ async def analyze_claim_fraud_endpoint(
         
         # Step 4: Extract structured fields using LLM
         logger.info("Extracting structured fields using LLM")
-        extracted_fields = extract_fields_from_text(
+        extracted_fields = await extract_fields_from_text(
             ocr_text=merged_ocr_text,
             claim_category=claim.type
         )
@@ -16,9 +16,12 @@ from sqlalchemy.orm import selectinload
 from database import get_db, async_session_maker
 from models import Claim, Policy, User, ClaimStatus, RiskLevel, Document, DocumentType, UserRole, DocumentCategory, FraudStatus
 from schemas import (
-    ClaimCreate, ClaimResponse, ClaimStatusUpdate, DocumentResponse, DocumentUpload
+    ClaimCreate, ClaimResponse, ClaimStatusUpdate, DocumentResponse, DocumentUpload,
+    claim_to_response,
 )
 from dependencies import get_current_user
+from services.background_fraud_service import notify_document_uploaded
+from services.fraud_detection_service import invalidate_claim_history
 
 logger = logging.getLogger("claims_router")
 
@@ -234,7 +237,9 @@ def calculate_risk_score(claim_data: ClaimCreate) -> tuple[int, RiskLevel]:
     return min(score, 100), level
 
 
-@router.get("/", response_model=list[ClaimResponse])
+# Claim routes return model_construct()-built responses (see claim_to_response);
+# response_model=None stops FastAPI from re-validating them, `responses` keeps the docs.
+@router.get("/", response_model=None, responses={200: {"model": list[ClaimResponse]}})
 async def get_claims(
     status: Optional[str] = Query(None, description="Filter by claim status"),
     min_risk_score: Optional[int] = Query(None, description="Filter by minimum risk score"),
@@ -283,7 +288,7 @@ async def get_claims(
         c = claims[0]
         print(f"[DEBUG] First claim: id={c.id}, claimant_name={c.claimant_name}, status={c.status}")
     
-    return claims
+    return [claim_to_response(claim) for claim in claims]
 
 
 @router.post("/{claim_id}/trigger-fraud-detection", status_code=status.HTTP_202_ACCEPTED)
@@ -392,7 +397,7 @@ async def finalize_claim(
         }
 
 
-@router.post("/", response_model=ClaimResponse, status_code=status.HTTP_201_CREATED)
+@router.post("/", response_model=None, responses={201: {"model": ClaimResponse}}, status_code=status.HTTP_201_CREATED)
 async def create_claim(
     claim_data: ClaimCreate,
     db: AsyncSession = Depends(get_db),
@@ -510,14 +515,17 @@ async def create_claim(
     await db.commit()
     await db.refresh(new_claim, attribute_names=['documents'])
     
+    # The owner's cached claim history no longer includes every claim
+    invalidate_claim_history(policy.user_id)
+    
     print(f"[DEBUG] Claim created successfully: {new_claim.id}")
     print(f"[DEBUG] Returning claim - status: {new_claim.status}, claimant_name: {new_claim.claimant_name}")
     print(f"[DEBUG] Fraud status: {new_claim.fraud_status.value}, will run analysis when documents uploaded")
     
-    return new_claim
+    return claim_to_response(new_claim)
 
 
-@router.get("/{claim_id}", response_model=ClaimResponse)
+@router.get("/{claim_id}", response_model=None, responses={200: {"model": ClaimResponse}})
 async def get_claim(
     claim_id: str,
     db: AsyncSession = Depends(get_db),
@@ -554,10 +562,10 @@ async def get_claim(
             detail=f"Claim {claim_id} not found"
         )
     
-    return claim
+    return claim_to_response(claim)
 
 
-@router.patch("/{claim_id}/status", response_model=ClaimResponse)
+@router.patch("/{claim_id}/status", response_model=None, responses={200: {"model": ClaimResponse}})
 async def update_claim_status(
     claim_id: str,
     status_update: ClaimStatusUpdate,
@@ -611,7 +619,7 @@ async def update_claim_status(
     await db.commit()
     await db.refresh(claim)
     
-    return claim
+    return claim_to_response(claim)
 
 
 # Document upload endpoints
@@ -724,6 +732,7 @@ async def upload_document(
         db.add(document)
         await db.commit()
         await db.refresh(document)
+        notify_document_uploaded(claim_id)
         
         logger.info(f"[DOCUMENT-UPLOAD] Document '{document.name}' uploaded for claim {claim_id}. Fraud detection will trigger after finalization.")
         
@@ -260,26 +260,11 @@ async def process_all_documents(
     result = await db.execute(query)
     documents = result.scalars().all()
 
-    from services.knowledge_bridge import process_document
-
-    results: list[dict] = []
-    processed = 0
-    failed = 0
-
-    for doc in documents:
-        try:
-            res = await process_document(doc.id)
-            results.append({"document_id": doc.id, "status": "success", **res})
-            processed += 1
-        except Exception as e:
-            logger.exception("Failed to process document %s", doc.id)
-            results.append({
-                "document_id": doc.id,
-                "document_name": doc.name,
-                "status": "error",
-                "error": str(e),
-            })
-            failed += 1
+    from services.knowledge_bridge import process_documents
+
+    results = await process_documents([doc.id for doc in documents])
+    processed = sum(1 for res in results if res["status"] == "success")
+    failed = len(results) - processed
 
     return BatchProcessResponse(
         total_documents=len(documents),
@@ -376,7 +361,7 @@ async def retrieve_documents(
     an LLM prompt, plus the individual ranked `chunks` with full metadata.
     """
     from services.rag_service import (
-        retrieve_context,
+        aretrieve_context,
         ScopeViolationError,
         EmptyQueryError,
     )
@@ -405,7 +390,7 @@ async def retrieve_documents(
 
     # ── Call the RAG service ──────────────────────────────────────────────
     try:
-        result = retrieve_context(
+        result = await aretrieve_context(
             query=request.query,
             filters=filters,
             n_results=request.n_results,
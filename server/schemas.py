@@ -2,12 +2,34 @@
 Pydantic schemas for request/response validation.
 """
 
-from typing import Optional, List
-from datetime import date, datetime
-from pydantic import BaseModel, EmailStr, Field
+from typing import Annotated, Any, Literal, Optional, List
+from datetime import date, datetime, time
+from decimal import Decimal
+from enum import Enum
+from pydantic import BaseModel, BeforeValidator, EmailStr, Field, PlainSerializer, StringConstraints
 from models import UserRole
 
 
+def _blank_to_none(value: Any) -> Any:
+    """Treat empty form strings as missing values."""
+    return None if value == "" else value
+
+
+def _to_iso(value: Optional[date | time]) -> Optional[str]:
+    """Serialize dates/times as ISO-8601 strings (also for model_dump into JSON columns)."""
+    return value.isoformat() if value is not None else None
+
+
+# Parsed once at ingress; dumped back as ISO strings
+OptionalDate = Annotated[Optional[date], BeforeValidator(_blank_to_none), PlainSerializer(_to_iso)]
+OptionalTime = Annotated[Optional[time], BeforeValidator(_blank_to_none), PlainSerializer(_to_iso)]
+
+# Syntax-only email check for trusted/internal inputs. EmailStr (email-validator)
+# is reserved for public signup and login.
+EMAIL_RE = r"^[^@\s]+@[^@\s]+\.[^@\s]+$"
+CheapEmail = Annotated[str, StringConstraints(strip_whitespace=True, pattern=EMAIL_RE, max_length=254)]
+
+
 # User Schemas
 class UserCreate(BaseModel):
     """Schema for user registration."""
@@ -27,7 +49,7 @@ class UserLogin(BaseModel):
 class UserUpdate(BaseModel):
     """Schema for updating user details."""
     name: Optional[str] = None
-    email: Optional[EmailStr] = None
+    email: Optional[CheapEmail] = None
     avatar: Optional[str] = None
     notifications_enabled: Optional[bool] = None
 
@@ -61,13 +83,13 @@ class TokenData(BaseModel):
 # Policy Schemas
 class PolicyCreate(BaseModel):
     """Schema for creating a new policy."""
-    category: str  # 'Life', 'Health', 'Vehicle', 'Property'
+    category: Literal["Life", "Health", "Vehicle", "Property", "Travel"]
     title: str
     coverage_amount: float
     premium: float
     policy_number: Optional[str] = None  # Auto-generated if not provided
     expiry_date: Optional[str] = None  # Can be set later
-    status: Optional[str] = "Active"  # 'Active', 'Expired', 'Pending'
+    status: Optional[Literal["Active", "Expired", "Pending"]] = "Active"
     features: Optional[list[str]] = None
 
 
@@ -106,11 +128,11 @@ class DocumentUpload(BaseModel):
 class DocumentCreate(BaseModel):
     """Schema for creating a document."""
     name: str
-    type: str  # 'PDF', 'DOCX', 'JPG', 'PNG'
+    type: Literal["PDF", "DOCX", "JPG", "PNG"]
     url: Optional[str] = None
     size: str
     summary: Optional[str] = None
-    category: Optional[str] = None  # 'Legal', 'Evidence', 'Medical', 'Financial', 'Other'
+    category: Optional[Literal["Legal", "Evidence", "Medical", "Financial", "Other"]] = None
 
 
 class DocumentResponse(BaseModel):
@@ -152,19 +174,19 @@ class VehicleInfo(BaseModel):
     policeReportFiled: Optional[bool] = None
     policeReportNo: Optional[str] = None
     location: Optional[str] = None
-    time: Optional[str] = None
+    time: OptionalTime = None
     incidentType: Optional[str] = None
 
 
 class HealthInfo(BaseModel):
     """Health-specific claim information."""
-    dob: Optional[str] = None
+    dob: OptionalDate = None
     patientName: Optional[str] = None
     relationship: Optional[str] = None
     hospitalName: Optional[str] = None
     hospitalAddress: Optional[str] = None
-    admissionDate: Optional[str] = None
-    dischargeDate: Optional[str] = None
+    admissionDate: OptionalDate = None
+    dischargeDate: OptionalDate = None
     doctorName: Optional[str] = None
     diagnosis: Optional[str] = None
     treatment: Optional[str] = None
@@ -174,15 +196,15 @@ class HealthInfo(BaseModel):
 class LifeInfo(BaseModel):
     """Life insurance-specific claim information."""
     deceasedName: Optional[str] = None
-    deceasedDob: Optional[str] = None
-    dateOfDeath: Optional[str] = None
+    deceasedDob: OptionalDate = None
+    dateOfDeath: OptionalDate = None
     causeOfDeath: Optional[str] = None
     nomineeName: Optional[str] = None
     nomineeRelationship: Optional[str] = None
     nomineeContact: Optional[str] = None
     bankDetails: Optional[str] = None
     sumAssured: Optional[float] = None
-    policyStartDate: Optional[str] = None
+    policyStartDate: OptionalDate = None
 
 
 class PropertyInfo(BaseModel):
@@ -253,5 +275,60 @@ class ClaimResponse(BaseModel):
 
 class ClaimStatusUpdate(BaseModel):
     """Schema for updating claim status."""
-    status: str  # 'New', 'In Review', 'Approved', 'Rejected', 'Flagged', 'Paid'
-
+    status: Literal["New", "In Review", "Approved", "Rejected", "Flagged", "Paid"]
+
+
+# LLM fraud analysis output (also sent to the provider as the JSON schema).
+# Extra keys are ignored when parsing, since not every model is constrained
+# by the schema; the strict schema sent to providers still forbids them.
+class FraudAnalysis(BaseModel):
+    """Schema for one LLM fraud analysis."""
+    fraud_score: int = Field(ge=0, le=100)
+    risk_level: Literal["LOW", "MEDIUM", "HIGH"]
+    decision: Literal["AUTO_APPROVE", "MANUAL_REVIEW", "FRAUD_ALERT"]
+    fraud_indicators: List[str]
+    reasoning: str
+    red_flags_count: int
+    confidence: Literal["LOW", "MEDIUM", "HIGH"]
+
+
+class ClaimFraudAnalysis(FraudAnalysis):
+    """Schema for one claim's entry in a multi-claim fraud analysis."""
+    claim_id: str
+
+
+class FraudAnalysisBatch(BaseModel):
+    """Schema for a multi-claim fraud analysis."""
+    results: List[ClaimFraudAnalysis]
+
+
+# ORM -> response conversion without re-validation
+def _plain(value: Any) -> Any:
+    """Unwrap ORM column values (enums, Decimals) into their JSON-native form."""
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def document_to_response(document: Any) -> DocumentResponse:
+    """Build a DocumentResponse from a trusted Document ORM row, skipping validation."""
+    return DocumentResponse.model_construct(**{
+        name: _plain(getattr(document, name, None))
+        for name in DocumentResponse.model_fields
+    })
+
+
+def claim_to_response(claim: Any) -> ClaimResponse:
+    """
+    Build a ClaimResponse from a trusted Claim ORM row (documents loaded),
+    skipping per-field and per-document validation.
+    """
+    fields = {
+        name: _plain(getattr(claim, name, None))
+        for name in ClaimResponse.model_fields
+        if name != "documents"
+    }
+    fields["documents"] = [document_to_response(doc) for doc in claim.documents or []]
+    return ClaimResponse.model_construct(**fields)
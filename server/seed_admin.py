@@ -1,21 +1,21 @@
 
 import asyncio
+from sqlalchemy import select
 from database import async_session_maker
 from models import User, UserRole
 from auth_utils import Hash
 
 async def seed_admin():
     async with async_session_maker() as session:
-        # Check if admin exists
-        from sqlalchemy import select
-        result = await session.execute(select(User).where(User.email == "admin@vantage.ai"))
-        admin = result.scalar_one_or_none()
+        # Check if admin exists (only the id column - no need to hydrate a User)
+        result = await session.execute(select(User.id).where(User.email == "admin@vantage.ai"))
+        admin_id = result.scalar()
         
-        if admin:
+        if admin_id:
             print("Admin user already exists.")
             return
 
-        # Create admin
+        # Create admin (hash only once we know it is needed - bcrypt is slow)
         print("Creating admin user...")
         hashed_password = Hash.hash_password("password123")
         new_admin = User(
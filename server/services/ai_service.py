@@ -5,11 +5,19 @@ Uses the OpenAI-compatible API provided by OpenRouter to access models
 like Gemini, Claude, GPT, etc. through a single API key.
 """
 
+import asyncio
+import functools
 import os
-import json
 from typing import Optional
+
+import anyio
+import orjson
 from dotenv import load_dotenv
-from openai import OpenAI
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
 
 # Load environment variables from .env file
 load_dotenv()
@@ -20,36 +28,112 @@ load_dotenv()
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
 _AI_MODEL = "google/gemini-2.0-flash-001"  # fast + capable on OpenRouter
 
-if OPENROUTER_API_KEY:
+if not OPENROUTER_API_KEY:
+    print("[WARN] OPENROUTER_API_KEY not set. AI features will be disabled.")
+
+
+@functools.cache
+def _get_client():
+    """
+    Build the OpenRouter client on first use.
+
+    The openai SDK is imported here rather than at module top so importing
+    this module (worker boot, tests) does not pay for it.
+    """
+    if not OPENROUTER_API_KEY:
+        return None
+
+    from openai import OpenAI
+
     client = OpenAI(
         base_url="https://openrouter.ai/api/v1",
         api_key=OPENROUTER_API_KEY,
     )
     print(f"[OK] OpenRouter AI service ready (model: {_AI_MODEL})")
-else:
-    client = None
-    print("[WARN] OPENROUTER_API_KEY not set. AI features will be disabled.")
+    return client
 
+# Risk level per clamped score (0-100): <40 Low, <60 Medium, <75 High, else Critical
+_LEVEL_TABLE = ("Low",) * 40 + ("Medium",) * 20 + ("High",) * 15 + ("Critical",) * 26
+_VALID_LEVELS = frozenset(("Low", "Medium", "High", "Critical"))
 
-def _chat(system_prompt: str, user_prompt: str, *, temperature: float = 0.3, max_tokens: int = 1024) -> str:
+# Keys the model must return for each kind of response
+_REQUIRED_RISK_FIELDS = frozenset(("risk_score", "risk_level", "reasoning"))
+_REQUIRED_SUMMARY_FIELDS = frozenset(("summary", "entities"))
+
+# Copilot context keys and the prompt line each one produces (in prompt order)
+_CTX_LABELS = (
+    ("active_category", "Current context: {}"),
+    ("user_role", "User role: {}"),
+    ("claim_id", "Discussing claim: {}"),
+    ("policy_id", "Discussing policy: {}"),
+)
+
+# Document text budget for summarize_document prompts
+_SUMMARY_MAX_TOKENS = 1500
+_SUMMARY_FAST_PATH_CHARS = 4000  # shorter texts are sent as-is without tokenizing
+_SUMMARY_MAX_CHARS = 5000  # character cap used when tiktoken is unavailable
+
+# Worker threads available to the blocking OpenAI SDK calls made by _chat
+_CHAT_LIMITER = anyio.CapacityLimiter(32)
+
+# Cap on concurrent LLM calls issued by analyze_claim_bundle (OpenRouter rate limits)
+_LLM_SEMAPHORE = asyncio.Semaphore(8)
+
+
+async def _chat(system_prompt: str, user_prompt: str, *, temperature: float = 0.3, max_tokens: int = 1024) -> str:
     """
     Send a chat completion request to OpenRouter and return the text response.
+
+    The OpenAI SDK client is synchronous, so the request runs in a worker
+    thread to keep the event loop free while waiting on the network.
     """
+    client = _get_client()
     if not client:
         raise ValueError("OPENROUTER_API_KEY not configured. Cannot perform AI operations.")
 
-    completion = client.chat.completions.create(
-        model=_AI_MODEL,
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt},
-        ],
-        temperature=temperature,
-        max_tokens=max_tokens,
+    completion = await anyio.to_thread.run_sync(
+        functools.partial(
+            client.chat.completions.create,
+            model=_AI_MODEL,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt},
+            ],
+            temperature=temperature,
+            max_tokens=max_tokens,
+        ),
+        limiter=_CHAT_LIMITER,
     )
     return completion.choices[0].message.content.strip()
 
 
+@functools.cache
+def get_token_encoder():
+    """Shared tiktoken encoding, loaded once; None if tiktoken is unavailable."""
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model("gpt-4o")
+    except Exception as e:
+        print(f"[WARN] tiktoken encoding unavailable, truncating by characters: {e}")
+        return None
+
+
+def _truncate_document(document_text: str) -> str:
+    """Trim document text to the summarization prompt's token budget."""
+    if len(document_text) < _SUMMARY_FAST_PATH_CHARS:
+        return document_text
+
+    encoder = get_token_encoder()
+    if encoder is None:
+        return document_text[:_SUMMARY_MAX_CHARS]
+
+    tokens = encoder.encode(document_text)
+    if len(tokens) <= _SUMMARY_MAX_TOKENS:
+        return document_text
+    return encoder.decode(tokens[:_SUMMARY_MAX_TOKENS])
+
+
 async def analyze_risk(claim_data: dict) -> dict:
     """
     Analyze claim risk using OpenRouter AI.
@@ -64,7 +148,7 @@ async def analyze_risk(claim_data: dict) -> dict:
         ValueError: If API key is not configured
         Exception: If AI analysis fails
     """
-    if not client:
+    if not OPENROUTER_API_KEY:
         raise ValueError("OPENROUTER_API_KEY not configured. Cannot perform AI analysis.")
 
     # Prepare claim data for analysis
@@ -87,7 +171,7 @@ async def analyze_risk(claim_data: dict) -> dict:
     user_prompt = f"""Analyze the following insurance claim and provide a comprehensive risk assessment.
 
 Claim Details:
-{json.dumps(claim_summary, indent=2)}
+{orjson.dumps(claim_summary, default=str).decode()}
 
 Respond in this exact JSON format:
 {{
@@ -106,7 +190,7 @@ Consider the following factors in your analysis:
 5. Type-specific risk factors (vehicle, health, life, property)"""
 
     try:
-        response_text = _chat(system_prompt, user_prompt, temperature=0.2, max_tokens=1024)
+        response_text = await _chat(system_prompt, user_prompt, temperature=0.2, max_tokens=1024)
 
         # Remove markdown code blocks if present
         if response_text.startswith("```json"):
@@ -118,34 +202,25 @@ Consider the following factors in your analysis:
         response_text = response_text.strip()
 
         # Parse JSON response
-        analysis = json.loads(response_text)
+        analysis = orjson.loads(response_text)
 
         # Validate required fields
-        required_fields = ["risk_score", "risk_level", "reasoning"]
-        for field in required_fields:
-            if field not in analysis:
-                raise ValueError(f"AI response missing required field: {field}")
+        if not _REQUIRED_RISK_FIELDS.issubset(analysis):
+            missing = ", ".join(sorted(_REQUIRED_RISK_FIELDS - analysis.keys()))
+            raise ValueError(f"AI response missing required field(s): {missing}")
 
         # Ensure risk_score is within bounds
-        analysis["risk_score"] = max(0, min(100, int(analysis["risk_score"])))
-
-        # Validate risk_level
-        valid_levels = ["Low", "Medium", "High", "Critical"]
-        if analysis["risk_level"] not in valid_levels:
-            # Map to valid level based on score
-            score = analysis["risk_score"]
-            if score >= 75:
-                analysis["risk_level"] = "Critical"
-            elif score >= 60:
-                analysis["risk_level"] = "High"
-            elif score >= 40:
-                analysis["risk_level"] = "Medium"
-            else:
-                analysis["risk_level"] = "Low"
+        score = int(analysis["risk_score"])
+        score = 0 if score < 0 else 100 if score > 100 else score
+        analysis["risk_score"] = score
+
+        # Validate risk_level, mapping to a valid level based on score
+        if analysis["risk_level"] not in _VALID_LEVELS:
+            analysis["risk_level"] = _LEVEL_TABLE[score]
 
         return analysis
 
-    except json.JSONDecodeError as e:
+    except orjson.JSONDecodeError as e:
         print(f"Failed to parse AI response as JSON: {e}")
         # Return fallback analysis
         return {
@@ -171,7 +246,7 @@ async def copilot_chat(message: str, context: Optional[dict] = None) -> str:
     Returns:
         AI-generated response text
     """
-    if not client:
+    if not OPENROUTER_API_KEY:
         raise ValueError("OPENROUTER_API_KEY not configured. Cannot perform AI chat.")
 
     context = context or {}
@@ -189,21 +264,12 @@ async def copilot_chat(message: str, context: Optional[dict] = None) -> str:
     )
 
     # Add context information
-    context_info = []
-    if context.get("active_category"):
-        context_info.append(f"Current context: {context['active_category']}")
-    if context.get("user_role"):
-        context_info.append(f"User role: {context['user_role']}")
-    if context.get("claim_id"):
-        context_info.append(f"Discussing claim: {context['claim_id']}")
-    if context.get("policy_id"):
-        context_info.append(f"Discussing policy: {context['policy_id']}")
-
-    context_str = "\n".join(context_info) if context_info else "General inquiry"
+    context_info = [template.format(value) for key, template in _CTX_LABELS if (value := context.get(key))]
+    context_str = "\n".join(context_info) or "General inquiry"
     user_prompt = f"Context: {context_str}\n\nUser Question: {message}"
 
     try:
-        return _chat(system_prompt, user_prompt)
+        return await _chat(system_prompt, user_prompt)
     except Exception as e:
         print(f"Copilot chat error: {e}")
         raise
@@ -220,7 +286,7 @@ async def summarize_document(document_text: str, document_type: str) -> dict:
     Returns:
         Dictionary with summary and extracted entities
     """
-    if not client:
+    if not OPENROUTER_API_KEY:
         raise ValueError("OPENROUTER_API_KEY not configured. Cannot perform document summarization.")
 
     system_prompt = (
@@ -233,7 +299,7 @@ async def summarize_document(document_text: str, document_type: str) -> dict:
 2. Key entities extracted (names, dates, amounts, locations, etc.)
 
 Document:
-{document_text[:5000]}
+{_truncate_document(document_text)}
 
 Provide your response in JSON format:
 {{
@@ -248,7 +314,7 @@ Provide your response in JSON format:
 }}"""
 
     try:
-        response_text = _chat(system_prompt, user_prompt, max_tokens=1024)
+        response_text = await _chat(system_prompt, user_prompt, max_tokens=1024)
 
         # Clean response
         if response_text.startswith("```json"):
@@ -259,7 +325,12 @@ Provide your response in JSON format:
             response_text = response_text[:-3]
         response_text = response_text.strip()
 
-        return json.loads(response_text)
+        summary = orjson.loads(response_text)
+        if not _REQUIRED_SUMMARY_FIELDS.issubset(summary):
+            missing = ", ".join(sorted(_REQUIRED_SUMMARY_FIELDS - summary.keys()))
+            raise ValueError(f"AI response missing required field(s): {missing}")
+
+        return summary
 
     except Exception as e:
         print(f"Document summarization error: {e}")
@@ -267,3 +338,29 @@ Provide your response in JSON format:
             "summary": "Failed to generate summary.",
             "entities": {}
         }
+
+
+async def _guarded(coro):
+    """Await *coro* while holding a slot of the LLM concurrency semaphore."""
+    async with _LLM_SEMAPHORE:
+        return await coro
+
+
+async def analyze_claim_bundle(claim_data: dict, documents: list[dict]) -> list:
+    """
+    Run risk analysis and per-document summarization concurrently.
+
+    Args:
+        claim_data: Dictionary containing claim information
+        documents: List of dicts with "text" and "type" keys
+
+    Returns:
+        List whose first item is the analyze_risk result, followed by one
+        summarize_document result per document (in order). Failed calls
+        are returned as exception instances rather than raised.
+    """
+    return await asyncio.gather(
+        _guarded(analyze_risk(claim_data)),
+        *(_guarded(summarize_document(doc["text"], doc["type"])) for doc in documents),
+        return_exceptions=True,
+    )
@@ -7,18 +7,140 @@ It automatically updates claim status based on fraud score thresholds.
 
 import logging
 import asyncio
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update
+from sqlalchemy.orm import selectinload
 
 from models import Claim, ClaimStatus, RiskLevel
-from services.fraud_detection_service import analyze_claim_fraud
-from services.ocr_service import extract_text_from_document
+from services.fraud_detection_service import analyze_claim_fraud, get_claim_history
 from services.field_extraction_service import extract_fields_from_text
-from database import get_db
+from database import async_session_maker
+from core.config import settings
 
 logger = logging.getLogger("background_fraud_service")
 
+# Bounds how many fraud pipelines (OCR buffers, DB sessions, LLM calls)
+# are in flight at once; extra submissions wait their turn.
+_fraud_sem = asyncio.Semaphore(settings.MAX_CONCURRENT_FRAUD or 8)
+
+# claim_id -> Event set by the document upload endpoint, so a job waiting
+# for documents wakes as soon as one lands instead of sleeping blindly.
+_upload_events: Dict[str, asyncio.Event] = {}
+_UPLOAD_WAIT_TIMEOUT = 30  # seconds
+
+
+def notify_document_uploaded(claim_id: str):
+    """Wake the background fraud job (if any) waiting on this claim's documents."""
+    event = _upload_events.get(claim_id)
+    if event is not None:
+        event.set()
+
+
+# ============================================================================
+# Batched OCR
+# ============================================================================
+
+# Documents submitted by concurrent fraud jobs within _OCR_BATCH_WINDOW are
+# OCR'd together, so TrOCR batches pages across them. Pages are rendered
+# lazily and OCR'd _OCR_MAX_PAGES at a time, which bounds the page images
+# held in memory regardless of how many documents are in the batch.
+_OCR_MAX_BATCH = 16
+_OCR_MAX_PAGES = 16
+_OCR_BATCH_WINDOW = 0.05  # seconds
+_ocr_queue: Optional[asyncio.Queue] = None
+_ocr_worker_task: Optional[asyncio.Task] = None
+
+
+def _ocr_documents(documents: List[tuple]) -> List[Any]:
+    """
+    OCR a batch of (file_data, file_type) documents (runs in a worker thread).
+    
+    Returns one merged text per document, or the exception that document raised.
+    """
+    from services.ocr_service import iter_document_pages, extract_text_from_image_batch
+    
+    page_texts: List[List[str]] = [[] for _ in documents]
+    errors: List[Optional[Exception]] = [None] * len(documents)
+    pending: List[Any] = []  # page images awaiting OCR
+    owners: List[int] = []  # document index of each pending page
+    
+    def run_pending():
+        texts = extract_text_from_image_batch(pending)
+        for owner, text in zip(owners, texts):
+            if text:
+                page_texts[owner].append(text)
+        pending.clear()
+        owners.clear()
+    
+    for i, (file_data, file_type) in enumerate(documents):
+        pages = iter_document_pages(file_data, file_type, page_batch=_OCR_MAX_PAGES)
+        while True:
+            # A document that fails to render fails alone; an OCR failure
+            # (run_pending) fails the whole batch
+            try:
+                images = next(pages, None)
+            except Exception as e:
+                errors[i] = e
+                break
+            if images is None:
+                break
+            for image in images:
+                pending.append(image)
+                owners.append(i)
+                if len(pending) >= _OCR_MAX_PAGES:
+                    run_pending()
+            del images
+    if pending:
+        run_pending()
+    
+    return [
+        error if error is not None else "\n\n".join(texts)
+        for error, texts in zip(errors, page_texts)
+    ]
+
+
+async def _ocr_worker(queue: asyncio.Queue):
+    """Drain queued documents in small batches and resolve their futures."""
+    loop = asyncio.get_running_loop()
+    while True:
+        items = [await queue.get()]
+        try:
+            while len(items) < _OCR_MAX_BATCH:
+                items.append(await asyncio.wait_for(queue.get(), timeout=_OCR_BATCH_WINDOW))
+        except asyncio.TimeoutError:
+            pass
+        
+        logger.info(f"Running OCR batch of {len(items)} document(s)")
+        try:
+            results = await loop.run_in_executor(
+                None, _ocr_documents, [document for document, _ in items]
+            )
+        except Exception as e:
+            results = [e] * len(items)
+        
+        for (_, future), result in zip(items, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+async def _submit_ocr(file_data: bytes, file_type: str) -> str:
+    """OCR one document through the shared batching worker."""
+    global _ocr_queue, _ocr_worker_task
+    
+    loop = asyncio.get_running_loop()
+    if _ocr_worker_task is None or _ocr_worker_task.done() or _ocr_worker_task.get_loop() is not loop:
+        _ocr_queue = asyncio.Queue()
+        _ocr_worker_task = loop.create_task(_ocr_worker(_ocr_queue))
+    
+    future = loop.create_future()
+    await _ocr_queue.put(((file_data, file_type), future))
+    return await future
+
 
 async def run_fraud_detection_background(
     claim_id: str,
@@ -43,49 +165,88 @@ async def run_fraud_detection_background(
         claim_category: Claim category (Health, Vehicle, etc.)
     """
     
+    async with _fraud_sem:
+        await _run_fraud_detection(claim_id, user_id, policy_number, claim_category)
+
+
+async def _run_fraud_detection(
+    claim_id: str,
+    user_id: str,
+    policy_number: str,
+    claim_category: str
+):
+    """Fraud detection pipeline body; see run_fraud_detection_background."""
     logger.info(f"Starting background fraud detection for claim {claim_id}")
     
-    # Get database session
-    async for db in get_db():
+    # Register before the first DB read so an upload racing with us is not missed
+    upload_event = _upload_events.setdefault(claim_id, asyncio.Event())
+    
+    async with async_session_maker() as db:
         try:
-            # Step 1: Update claim status to ANALYZING
-            await _update_claim_status(db, claim_id, ClaimStatus.ANALYZING)
-            logger.info(f"Claim {claim_id} status set to ANALYZING")
-            
-            # Step 2: Wait for documents (simulate processing time)
-            await asyncio.sleep(5)  # Give user time to upload documents
-            
-            # Step 3: Get claim documents
-            result = await db.execute(
-                select(Claim).where(Claim.id == claim_id)
-            )
-            claim = result.scalar_one_or_none()
+            # Step 1: Update claim status to ANALYZING and load the claim
+            # (short transaction, so the status is visible while we work)
+            async with db.begin():
+                await _update_claim_status(db, claim_id, ClaimStatus.ANALYZING)
+                result = await db.execute(
+                    select(Claim)
+                    .options(selectinload(Claim.documents))
+                    .where(Claim.id == claim_id)
+                )
+                claim = result.scalar_one_or_none()
             
             if not claim:
                 logger.error(f"Claim {claim_id} not found")
                 return
+            logger.info(f"Claim {claim_id} status set to ANALYZING")
+            
+            # Step 2: If nothing is attached yet, wait for the upload endpoint
+            # (outside any transaction, so the upload is not blocked)
+            documents_uploaded = False
+            if not claim.documents:
+                try:
+                    await asyncio.wait_for(upload_event.wait(), timeout=_UPLOAD_WAIT_TIMEOUT)
+                    documents_uploaded = True
+                except asyncio.TimeoutError:
+                    logger.info(f"No documents uploaded for claim {claim_id}; using claim data")
+            
+            # Step 3: OCR and the LLM analysis run outside any write
+            # transaction; only the final UPDATE takes the database write lock
+            if documents_uploaded:
+                await db.refresh(claim, ["documents"])
             
-            # Step 4: Extract fields from documents (if available)
+            # Step 4: OCR the first document (batched with other claims' documents,
+            # off the event loop) while the claim history is fetched from the database
             extracted_fields = {}
             
-            if claim.documents and len(claim.documents) > 0:
-                # Process first document
+            if claim.documents:
                 doc = claim.documents[0]
                 logger.info(f"Processing document: {doc.name}")
-                
+                ocr_task = _submit_ocr(doc.file_data, doc.type)
+            else:
+                ocr_task = asyncio.sleep(0, result=None)
+            
+            ocr_text, claim_history = await asyncio.gather(
+                ocr_task,
+                get_claim_history(user_id, claim_category, db),
+                return_exceptions=True,
+            )
+            
+            if isinstance(ocr_text, Exception):
+                logger.warning(f"Document processing failed: {ocr_text}")
+            elif ocr_text:
+                logger.info(f"OCR extracted {len(ocr_text)} characters")
                 try:
-                    # OCR
-                    ocr_text = extract_text_from_document(doc.content, doc.type)
-                    logger.info(f"OCR extracted {len(ocr_text)} characters")
-                    
-                    # Field extraction
-                    extracted_fields = extract_fields_from_text(ocr_text, claim_category)
+                    # Field extraction (async LLM call)
+                    extracted_fields = await extract_fields_from_text(ocr_text, claim_category)
                     logger.info(f"Extracted fields: {list(extracted_fields.keys())}")
-                    
                 except Exception as e:
-                    logger.warning(f"Document processing failed: {e}")
+                    logger.warning(f"Field extraction failed: {e}")
                     # Continue with claim data only
             
+            if isinstance(claim_history, Exception):
+                logger.warning(f"Claim history fetch failed: {claim_history}")
+                claim_history = None
+            
             # If no documents or extraction failed, use claim data
             if not extracted_fields:
                 extracted_fields = {
@@ -102,7 +263,9 @@ async def run_fraud_detection_background(
                 claim_category=claim_category,
                 user_id=user_id,
                 policy_number=policy_number,
-                db=db
+                db=db,
+                claim_history=claim_history,
+                claim_id=claim_id,
             )
             
             # Step 6: Update claim with fraud results
@@ -114,40 +277,45 @@ async def run_fraud_detection_background(
             # Step 7: Determine new status based on fraud score
             new_status = _determine_status_from_fraud(fraud_score, fraud_decision)
             
-            # Step 8: Update claim
-            claim.fraud_score = fraud_score / 100.0  # Convert to 0.0-1.0
-            claim.fraud_risk_level = fraud_result.get("risk_level", "MEDIUM")
-            claim.fraud_decision = fraud_decision
-            claim.fraud_indicators = fraud_result.get("fraud_indicators", [])
-            claim.fraud_reasoning = fraud_result.get("reasoning", "")
-            claim.extracted_fields = extracted_fields
-            claim.risk_score = fraud_score  # Also update risk_score
-            claim.risk_level = _get_risk_level(fraud_score)
-            claim.status = new_status
-            
+            # Step 8: Update claim (single UPDATE, no re-select). The reads
+            # above autobegan a (read-only) transaction; end it first so the
+            # write gets its own short one.
             await db.commit()
+            async with db.begin():
+                await db.execute(
+                    update(Claim)
+                    .where(Claim.id == claim_id)
+                    .values(
+                        fraud_score=fraud_score / 100.0,  # Convert to 0.0-1.0
+                        fraud_risk_level=fraud_result.get("risk_level", "MEDIUM"),
+                        fraud_decision=fraud_decision,
+                        fraud_indicators=fraud_result.get("fraud_indicators", []),
+                        fraud_reasoning=fraud_result.get("reasoning", ""),
+                        extracted_fields=extracted_fields,
+                        risk_score=fraud_score,  # Also update risk_score
+                        risk_level=get_risk_level(fraud_score),
+                        status=new_status,
+                    )
+                )
             
             logger.info(f"Claim {claim_id} updated: status={new_status.value}, score={fraud_score}")
             
         except Exception as e:
             logger.error(f"Background fraud detection failed for claim {claim_id}: {e}")
             # Set claim back to IN_REVIEW on error
-            await _update_claim_status(db, claim_id, ClaimStatus.IN_REVIEW)
+            await db.rollback()
+            async with db.begin():
+                await _update_claim_status(db, claim_id, ClaimStatus.IN_REVIEW)
         
         finally:
-            break  # Exit the async for loop
+            _upload_events.pop(claim_id, None)
 
 
 async def _update_claim_status(db: AsyncSession, claim_id: str, status: ClaimStatus):
-    """Update claim status."""
-    result = await db.execute(
-        select(Claim).where(Claim.id == claim_id)
+    """Update claim status (within the caller's transaction)."""
+    await db.execute(
+        update(Claim).where(Claim.id == claim_id).values(status=status)
     )
-    claim = result.scalar_one_or_none()
-    
-    if claim:
-        claim.status = status
-        await db.commit()
 
 
 def _determine_status_from_fraud(fraud_score: int, fraud_decision: str) -> ClaimStatus:
@@ -168,7 +336,7 @@ def _determine_status_from_fraud(fraud_score: int, fraud_decision: str) -> Claim
         return ClaimStatus.IN_REVIEW
 
 
-def _get_risk_level(fraud_score: int) -> RiskLevel:
+def get_risk_level(fraud_score: int) -> RiskLevel:
     """Convert fraud score to risk level."""
     if fraud_score >= 70:
         return RiskLevel.CRITICAL
@@ -2,8 +2,14 @@
 Document processing service for RAG pipeline.
 Handles PDF extraction, text cleaning, and chunking.
 """
+import asyncio
 import logging
-from typing import List, Dict, Any
+import multiprocessing
+import os
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Optional
 from pathlib import Path
 import hashlib
 from datetime import datetime
@@ -13,10 +19,48 @@ try:
 except ImportError:
     PyPDF2 = None
 
+try:
+    import pypdfium2 as pdfium
+except ImportError:
+    pdfium = None
+
 from core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# PDFs with at most this many pages are extracted in a single worker
+_PAGES_PER_WORKER = 8
+# Leaves cores for the OCR threads and the embedding pool
+_PDF_MAX_WORKERS = 4
+
+_pdf_pool: Optional[ProcessPoolExecutor] = None
+
+# One sentence per match: text up to and including a period, or a run of
+# text up to a line break (mirrors splitting on '.' and '\n').
+_SENT_RE = re.compile(r"[^.\n]*\.|[^.\n]+")
+
+
+def get_pdf_pool() -> ProcessPoolExecutor:
+    """Lazily create the shared process pool used for PDF text extraction."""
+    global _pdf_pool
+    if _pdf_pool is None:
+        # spawn, not fork: the parent already holds torch, FAISS and threads
+        _pdf_pool = ProcessPoolExecutor(
+            max_workers=min(os.cpu_count() or 1, _PDF_MAX_WORKERS),
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pdf_pool
+
+
+def _extract_pdfium_pages(file_path: str, start: int, stop: int) -> List[str]:
+    """Extract text from pages [start, stop) with PDFium (runs in a worker process)."""
+    pdf = pdfium.PdfDocument(file_path)
+    try:
+        return [pdf[i].get_textpage().get_text_range() for i in range(start, stop)]
+    finally:
+        pdf.close()
+
+
 class DocumentProcessor:
     """Handles document extraction and chunking for RAG."""
     
@@ -26,6 +70,13 @@ class DocumentProcessor:
     
     async def extract_text_from_pdf(self, file_path: Path) -> str:
         """Extract text content from PDF file."""
+        if settings.PDF_BACKEND == "pypdfium2" and pdfium:
+            try:
+                return await self._extract_text_with_pdfium(file_path)
+            except Exception as e:
+                logger.error(f"Failed to extract text from {file_path}: {e}")
+                raise
+
         if not PyPDF2:
             raise ImportError("PyPDF2 not installed. Run: pip install PyPDF2")
         
@@ -42,70 +93,87 @@ class DocumentProcessor:
             logger.error(f"Failed to extract text from {file_path}: {e}")
             raise
     
+    async def _extract_text_with_pdfium(self, file_path: Path) -> str:
+        """Extract text with PDFium, splitting page ranges across worker processes."""
+        path = str(file_path)
+        pdf = pdfium.PdfDocument(path)
+        try:
+            page_count = len(pdf)
+        finally:
+            pdf.close()
+
+        loop = asyncio.get_running_loop()
+
+        if page_count <= _PAGES_PER_WORKER:
+            pages = await loop.run_in_executor(None, _extract_pdfium_pages, path, 0, page_count)
+            return "\n".join(pages)
+
+        workers = min(os.cpu_count() or 1, _PDF_MAX_WORKERS)
+        step = max(_PAGES_PER_WORKER, -(-page_count // workers))  # ceil division
+        pool = get_pdf_pool()
+        page_ranges = await asyncio.gather(*(
+            loop.run_in_executor(pool, _extract_pdfium_pages, path, start, min(start + step, page_count))
+            for start in range(0, page_count, step)
+        ))
+        return "\n".join(text for pages in page_ranges for text in pages)
+    
     def create_chunks(self, text: str, metadata: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Split text into overlapping chunks with metadata."""
+        # Per-document constants, computed once rather than per chunk
+        processed_at = datetime.utcnow().isoformat()
+        id_prefix = f"{metadata.get('document_id', 'unknown')}_chunk_"
+        
         # Simple chunking by sentences
-        sentences = text.replace('.', '.\n').split('\n')
         chunks = []
-        current_chunk = ""
+        cur_parts: List[str] = []
+        cur_len = 0  # len(" ".join(cur_parts))
+        # Trailing words of the text seen so far, used as the next chunk's overlap
+        tail_words = deque(maxlen=self.chunk_overlap)
         chunk_index = 0
         
-        for sentence in sentences:
-            sentence = sentence.strip()
+        for match in _SENT_RE.finditer(text):
+            sentence = match.group().strip()
             if not sentence:
                 continue
                 
             # Check if adding sentence would exceed chunk size
-            if len(current_chunk) + len(sentence) > self.max_chunk_size:
-                if current_chunk:  # Save current chunk
-                    chunk_id = self._generate_chunk_id(metadata, chunk_index)
-                    chunks.append({
-                        "id": chunk_id,
-                        "text": current_chunk.strip(),
-                        "metadata": {
-                            **metadata,
-                            "chunk_index": chunk_index,
-                            "processed_at": datetime.utcnow().isoformat()
-                        }
-                    })
-                    
-                    # Start new chunk with overlap
-                    overlap_text = self._get_overlap_text(current_chunk)
-                    current_chunk = overlap_text + " " + sentence
-                    chunk_index += 1
-                else:
-                    current_chunk = sentence
-            else:
-                current_chunk += " " + sentence if current_chunk else sentence
+            if cur_parts and cur_len + len(sentence) > self.max_chunk_size:
+                # Save current chunk
+                chunks.append({
+                    "id": f"{id_prefix}{chunk_index:03d}",
+                    "text": " ".join(cur_parts),
+                    "metadata": {
+                        **metadata,
+                        "chunk_index": chunk_index,
+                        "processed_at": processed_at
+                    }
+                })
+                
+                # Start new chunk with overlap
+                overlap_text = " ".join(tail_words)
+                cur_parts = [overlap_text] if overlap_text else []
+                cur_len = len(overlap_text)
+                chunk_index += 1
+            
+            cur_len += len(sentence) + 1 if cur_parts else len(sentence)
+            cur_parts.append(sentence)
+            tail_words.extend(sentence.split())
         
         # Add final chunk
-        if current_chunk.strip():
-            chunk_id = self._generate_chunk_id(metadata, chunk_index)
+        if cur_parts:
             chunks.append({
-                "id": chunk_id,
-                "text": current_chunk.strip(),
+                "id": f"{id_prefix}{chunk_index:03d}",
+                "text": " ".join(cur_parts),
                 "metadata": {
                     **metadata,
                     "chunk_index": chunk_index,
-                    "processed_at": datetime.utcnow().isoformat()
+                    "processed_at": processed_at
                 }
             })
         
         logger.info(f"Created {len(chunks)} chunks from document")
         return chunks
     
-    def _generate_chunk_id(self, metadata: Dict[str, Any], chunk_index: int) -> str:
-        """Generate unique chunk ID."""
-        doc_id = metadata.get("document_id", "unknown")
-        return f"{doc_id}_chunk_{chunk_index:03d}"
-    
-    def _get_overlap_text(self, text: str) -> str:
-        """Get overlap text for next chunk."""
-        words = text.split()
-        if len(words) <= self.chunk_overlap:
-            return text
-        return " ".join(words[-self.chunk_overlap:])
-    
     async def process_document(self, 
                              file_path: Path,
                              document_metadata: Dict[str, Any]) -> List[Dict[str, Any]]:
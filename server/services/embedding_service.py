@@ -2,9 +2,14 @@
 Embedding service using sentence-transformers.
 Generates vector embeddings for text chunks.
 """
+import asyncio
 import logging
-from typing import List, Union
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Union
 import numpy as np
+import faiss
 from pathlib import Path
 
 try:
@@ -12,10 +17,60 @@ try:
 except ImportError:
     SentenceTransformer = None
 
+try:
+    import torch
+except ImportError:
+    torch = None
+
 from core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Batches larger than this are sharded across worker processes on CPU-only hosts
+_PARALLEL_MIN_TEXTS = 128
+# Each worker holds its own copy of the model, so keep the pool small
+_EMBED_MAX_WORKERS = 4
+
+_embed_pool: Optional[ProcessPoolExecutor] = None
+_worker_model = None  # per-process model used by _encode_shard
+
+
+def _embed_workers() -> int:
+    """Number of worker processes used for sharded encoding."""
+    return min(os.cpu_count() or 1, _EMBED_MAX_WORKERS)
+
+
+def _init_embed_worker(model_name: str, cache_dir: str):
+    """Worker initializer: one torch thread per process, model loaded once."""
+    global _worker_model
+    if torch is not None:
+        torch.set_num_threads(1)
+    _worker_model = SentenceTransformer(model_name, cache_folder=cache_dir)
+
+
+def _get_embed_pool(model_name: str, cache_dir: str) -> ProcessPoolExecutor:
+    """Lazily create the shared process pool used for sharded encoding."""
+    global _embed_pool
+    if _embed_pool is None:
+        # spawn, not fork: the parent has already initialised torch
+        _embed_pool = ProcessPoolExecutor(
+            max_workers=_embed_workers(),
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_embed_worker,
+            initargs=(model_name, cache_dir),
+        )
+    return _embed_pool
+
+
+def _encode_shard(texts: List[str], batch_size: int) -> np.ndarray:
+    """Encode one shard of texts (runs in a worker process)."""
+    return _worker_model.encode(
+        texts,
+        batch_size=batch_size,
+        show_progress_bar=False,
+        convert_to_numpy=True
+    )
+
 class EmbeddingService:
     """Handles text embeddings using sentence-transformers."""
     
@@ -47,31 +102,68 @@ class EmbeddingService:
         self._load_model()
         
         # Generate embedding
-        embedding = self.model.encode([text], show_progress_bar=False)[0]
+        embedding = np.asarray(
+            self.model.encode([text], show_progress_bar=False)[0], dtype=np.float32
+        )
         
-        # Normalize for cosine similarity
-        embedding = embedding / np.linalg.norm(embedding)
+        # Normalize for cosine similarity (in place; guard against zero vectors)
+        embedding /= max(float(np.linalg.norm(embedding)), 1e-12)
         
-        return embedding.astype(np.float32)
+        return embedding
+    
+    def _shards(self, texts: List[str]) -> Optional[List[List[str]]]:
+        """Split a large CPU batch into one shard per worker, or None to encode in-process."""
+        workers = _embed_workers()
+        on_gpu = torch is not None and torch.cuda.is_available()
+        if len(texts) <= _PARALLEL_MIN_TEXTS or workers <= 1 or on_gpu:
+            return None
+        shard_size = -(-len(texts) // workers)
+        return [texts[i:i + shard_size] for i in range(0, len(texts), shard_size)]
     
-    def embed_batch(self, texts: List[str], batch_size: int = 8) -> List[np.ndarray]:
-        """Generate embeddings for multiple texts."""
+    def embed_batch(self, texts: List[str], batch_size: int = 8) -> np.ndarray:
+        """Generate embeddings for multiple texts (one L2-normalized row per text)."""
         self._load_model()
         
         logger.info(f"Generating embeddings for {len(texts)} texts")
         
-        embeddings = self.model.encode(
-            texts,
-            batch_size=batch_size,
-            show_progress_bar=True,
-            convert_to_numpy=True
-        )
+        shards = self._shards(texts)
+        if shards is not None:
+            # CPU-bound transformer inference: one shard per worker
+            pool = _get_embed_pool(self.model_name, str(self.cache_dir))
+            results = pool.map(_encode_shard, shards, [batch_size] * len(shards))
+            embeddings = np.vstack(list(results))
+        else:
+            embeddings = self.model.encode(
+                texts,
+                batch_size=batch_size,
+                show_progress_bar=True,
+                convert_to_numpy=True
+            )
         
-        # Normalize embeddings
-        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
-        embeddings = embeddings / norms
+        return self._normalize(embeddings)
+    
+    async def aembed_batch(self, texts: List[str], batch_size: int = 8) -> np.ndarray:
+        """Async embed_batch: encoding runs off the event loop."""
+        shards = self._shards(texts)
+        if shards is None:
+            return await asyncio.to_thread(self.embed_batch, texts, batch_size)
         
-        return [emb.astype(np.float32) for emb in embeddings]
+        logger.info(f"Generating embeddings for {len(texts)} texts")
+        
+        loop = asyncio.get_running_loop()
+        pool = _get_embed_pool(self.model_name, str(self.cache_dir))
+        results = await asyncio.gather(*(
+            loop.run_in_executor(pool, _encode_shard, shard, batch_size)
+            for shard in shards
+        ))
+        return self._normalize(np.vstack(results))
+    
+    @staticmethod
+    def _normalize(embeddings: np.ndarray) -> np.ndarray:
+        """Normalize embeddings in place (single pass, C-contiguous float32)."""
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        faiss.normalize_L2(embeddings)
+        return embeddings
     
     def embed_chunks(self, chunks: List[dict]) -> List[dict]:
         """Add embeddings to chunk objects."""
@@ -79,8 +171,8 @@ class EmbeddingService:
         embeddings = self.embed_batch(texts)
         
         # Add embeddings to chunks
-        for chunk, embedding in zip(chunks, embeddings):
-            chunk["embedding"] = embedding
+        for i, chunk in enumerate(chunks):
+            chunk["embedding"] = embeddings[i]
         
         return chunks
     
@@ -5,17 +5,24 @@ High-performance vector store using FAISS and sentence-transformers.
 Provides accurate semantic search for insurance policy documents.
 """
 
+import asyncio
+import atexit
+import functools
 import json
 import os
 import logging
 import pickle
-from typing import Optional
+import sys
+import threading
+from typing import Any, Callable, Optional
 
 import numpy as np
 import faiss
 from sentence_transformers import SentenceTransformer
 from dotenv import load_dotenv
 
+from core.config import settings
+
 load_dotenv()
 
 logger = logging.getLogger("faiss_vector_store")
@@ -23,14 +30,62 @@ logger = logging.getLogger("faiss_vector_store")
 # Storage paths
 _STORE_DIR = os.path.join(os.path.dirname(__file__), "..", "faiss_data")
 _INDEX_FILE = os.path.join(os.path.abspath(_STORE_DIR), "faiss.index")
-_METADATA_FILE = os.path.join(os.path.abspath(_STORE_DIR), "metadata.json")
+_METADATA_FILE = os.path.join(os.path.abspath(_STORE_DIR), "metadata.pkl")
+_LEGACY_METADATA_FILE = os.path.join(os.path.abspath(_STORE_DIR), "metadata.json")
 _MODEL_CACHE = os.path.join(os.path.abspath(_STORE_DIR), "model_cache")
 
 # Global state
 _index: faiss.Index | None = None
 _metadata: list[dict] = []
+_id_to_idx: dict[str, int] = {}  # chunk id -> position in _metadata / index
+# Secondary indexes (metadata value -> index positions) used to restrict
+# FAISS search to the caller's chunks via an IDSelector. Chunks without a
+# user_id (base policies) are tracked under "".
+_by_user: dict[str, set[int]] = {}
+_by_policy: dict[str, set[int]] = {}
 _model: SentenceTransformer | None = None
+_gpu_resources = None  # faiss.StandardGpuResources once the index lives on GPU
 _embedding_dim = 384  # all-MiniLM-L6-v2 dimension
+# Held around every read or write of the index and lookups: searches run on
+# worker threads (aquery, RAG to_thread) while the writer task upserts on
+# another, and FAISS add() during search() is not thread-safe.
+_store_lock = threading.RLock()
+# Bumped whenever the stored chunks change, so callers can key result caches on it
+_generation = 0
+
+# Index type for newly created stores: "hnsw" (graph ANN, sublinear search)
+# or "flat" (exhaustive scan). Existing index files keep their type.
+_INDEX_TYPE = os.getenv("FAISS_INDEX_TYPE", "hnsw").lower()
+# Vector storage: "sq8" (int8 scalar quantizer, 4x smaller) or "none" (fp32).
+_QUANTIZE = os.getenv("FAISS_QUANTIZE", "sq8").lower()
+_SQ_MIN_TRAIN = 256
+_HNSW_M = 32
+_HNSW_EF_CONSTRUCTION = 200
+_HNSW_EF_SEARCH = 64
+
+# Upserts are persisted in batches: the index and metadata are rewritten once
+# this many chunks have changed (and at interpreter exit), not on every call.
+_FLUSH_EVERY = 256
+_dirty_since_flush = 0
+
+# Query micro-batching: concurrent aquery() calls arriving within
+# _ENCODE_WINDOW seconds share one model.encode() call.
+_MAX_ENCODE_BATCH = 32
+_ENCODE_WINDOW = 0.005
+_encode_queue: asyncio.Queue | None = None
+_batcher_task: asyncio.Task | None = None
+
+# Texts per forward pass when embedding chunks for ingestion (throughput
+# matters more than latency there)
+_INGEST_ENCODE_BATCH = 128
+
+# Async upserts go through a single writer task, so index/metadata updates
+# never overlap. Upserts arriving within _WRITE_WINDOW seconds (up to
+# _WRITE_MAX_CHUNKS chunks) are applied as one upsert_chunks() call.
+_WRITE_MAX_CHUNKS = 256
+_WRITE_WINDOW = 0.05
+_write_queue: asyncio.Queue | None = None
+_writer_task: asyncio.Task | None = None
 
 
 def _ensure_dir():
@@ -48,30 +103,127 @@ def _get_model() -> SentenceTransformer:
     if _model is not None:
         return _model
 
-    logger.info("Loading sentence transformer model (all-MiniLM-L6-v2)...")
+    device = "cpu"
+    if settings.USE_GPU:
+        import torch
+        if torch.cuda.is_available():
+            device = "cuda"
+
+    logger.info("Loading sentence transformer model (all-MiniLM-L6-v2) on %s...", device)
     _model = SentenceTransformer(
         'sentence-transformers/all-MiniLM-L6-v2',
-        cache_folder=_MODEL_CACHE
+        cache_folder=_MODEL_CACHE,
+        device=device,
     )
     logger.info("Model loaded successfully")
+    _encode_cached.cache_clear()  # cached vectors belong to the previous model
     return _model
 
 
+def _new_index() -> faiss.Index:
+    """Create an empty inner-product index (cosine similarity on normalized vectors)."""
+    quantize = _QUANTIZE == "sq8"
+
+    if _INDEX_TYPE == "flat":
+        if quantize:
+            return faiss.IndexScalarQuantizer(
+                _embedding_dim, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_INNER_PRODUCT
+            )
+        return faiss.IndexFlatIP(_embedding_dim)
+
+    if quantize:
+        index = faiss.IndexHNSWSQ(
+            _embedding_dim, faiss.ScalarQuantizer.QT_8bit, _HNSW_M, faiss.METRIC_INNER_PRODUCT
+        )
+    else:
+        index = faiss.IndexHNSWFlat(_embedding_dim, _HNSW_M, faiss.METRIC_INNER_PRODUCT)
+    index.hnsw.efConstruction = _HNSW_EF_CONSTRUCTION
+    index.hnsw.efSearch = _HNSW_EF_SEARCH
+    return index
+
+
+def _to_device(index: faiss.Index) -> faiss.Index:
+    """Move a flat index onto GPU 0 when USE_GPU is set and faiss-gpu is installed."""
+    global _gpu_resources
+
+    if not settings.USE_GPU or not hasattr(faiss, "StandardGpuResources"):
+        return index
+    if faiss.get_num_gpus() == 0 or not isinstance(index, faiss.IndexFlat):
+        # HNSW graphs have no GPU implementation; keep them on CPU
+        return index
+
+    if _gpu_resources is None:
+        _gpu_resources = faiss.StandardGpuResources()
+    logger.info("Moving FAISS index to GPU")
+    return faiss.index_cpu_to_gpu(_gpu_resources, 0, index)
+
+
+def _track_chunk(idx: int, meta: dict):
+    """Add an index position to the secondary lookups."""
+    _by_user.setdefault(str(meta.get("user_id") or ""), set()).add(idx)
+    if "policy_number" in meta:
+        _by_policy.setdefault(str(meta["policy_number"]), set()).add(idx)
+
+
+def _untrack_chunk(idx: int, meta: dict):
+    """Remove an index position from the secondary lookups."""
+    _by_user.get(str(meta.get("user_id") or ""), set()).discard(idx)
+    if "policy_number" in meta:
+        _by_policy.get(str(meta["policy_number"]), set()).discard(idx)
+
+
+def _rebuild_lookups():
+    """Rebuild the id and metadata lookups from _metadata."""
+    global _id_to_idx, _by_user, _by_policy, _generation
+    _generation += 1
+    _id_to_idx = {}
+    _by_user = {}
+    _by_policy = {}
+    for idx, chunk in enumerate(_metadata):
+        _id_to_idx[chunk["id"]] = idx
+        meta = chunk["metadata"]
+        # Unpickled strings are not interned; owner checks compare user_id
+        if isinstance(meta.get("user_id"), str):
+            meta["user_id"] = sys.intern(meta["user_id"])
+        _track_chunk(idx, meta)
+
+
 def _load_index(force: bool = False):
     """Load FAISS index and metadata from disk (only once unless forced)."""
+    # Skip if already loaded (unless forced)
+    if not force and _index is not None and len(_metadata) > 0:
+        return
+
+    with _store_lock:
+        _load_index_locked(force)
+
+
+def _load_index_locked(force: bool):
     global _index, _metadata
 
-    # Skip if already loaded (unless forced)
     if not force and _index is not None and len(_metadata) > 0:
         return
 
     _ensure_dir()
 
-    if os.path.exists(_INDEX_FILE) and os.path.exists(_METADATA_FILE):
+    metadata_file = _METADATA_FILE
+    if not os.path.exists(metadata_file) and os.path.exists(_LEGACY_METADATA_FILE):
+        # Stores written before the pickle format; migrated on next save
+        metadata_file = _LEGACY_METADATA_FILE
+
+    if os.path.exists(_INDEX_FILE) and os.path.exists(metadata_file):
         try:
             _index = faiss.read_index(_INDEX_FILE)
-            with open(_METADATA_FILE, 'r', encoding='utf-8') as f:
-                _metadata = json.load(f)
+            if isinstance(_index, faiss.IndexHNSW):
+                _index.hnsw.efSearch = _HNSW_EF_SEARCH
+            _index = _to_device(_index)
+            if metadata_file == _METADATA_FILE:
+                with open(metadata_file, 'rb') as f:
+                    _metadata = pickle.load(f)
+            else:
+                with open(metadata_file, 'r', encoding='utf-8') as f:
+                    _metadata = json.load(f)
+            _rebuild_lookups()
             logger.info(
                 "Loaded FAISS index with %d vectors (dim=%d)",
                 _index.ntotal, _embedding_dim
@@ -81,29 +233,137 @@ def _load_index(force: bool = False):
             logger.warning("Failed to load FAISS index: %s. Creating new index.", e)
             _index = None
             _metadata = []
+            _rebuild_lookups()
 
     if _index is None:
         # Create new index (Inner Product for cosine similarity with normalized vectors)
-        _index = faiss.IndexFlatIP(_embedding_dim)
+        _index = _to_device(_new_index())
         _metadata = []
-        logger.info("Created new FAISS index (dim=%d)", _embedding_dim)
+        _rebuild_lookups()
+        logger.info("Created new FAISS %s index (dim=%d)", _INDEX_TYPE, _embedding_dim)
 
 
 def _save_index():
     """Persist FAISS index and metadata to disk."""
+    global _dirty_since_flush
     _ensure_dir()
-    faiss.write_index(_index, _INDEX_FILE)
-    with open(_METADATA_FILE, 'w', encoding='utf-8') as f:
-        json.dump(_metadata, f)
+    gpu_index_cls = getattr(faiss, "GpuIndex", None)
+    if gpu_index_cls is not None and isinstance(_index, gpu_index_cls):
+        cpu_index = faiss.index_gpu_to_cpu(_index)
+    else:
+        cpu_index = _index
+    faiss.write_index(cpu_index, _INDEX_FILE)
+    with open(_METADATA_FILE, 'wb') as f:
+        pickle.dump(_metadata, f, protocol=pickle.HIGHEST_PROTOCOL)
+    _dirty_since_flush = 0
     logger.info("Saved FAISS index with %d vectors", _index.ntotal)
 
 
-def _normalize_vector(vec: np.ndarray) -> np.ndarray:
-    """Normalize vector for cosine similarity."""
-    norm = np.linalg.norm(vec)
-    if norm > 0:
-        return vec / norm
-    return vec
+def _encode_batch(texts: list[str], batch_size: int = _MAX_ENCODE_BATCH) -> np.ndarray:
+    """Encode texts into L2-normalized float32 embeddings (one row per text)."""
+    embeddings = _get_model().encode(
+        texts,
+        batch_size=batch_size,
+        show_progress_bar=False,
+        convert_to_numpy=True,
+        normalize_embeddings=True,
+    )
+    return embeddings.astype(np.float32)
+
+
+@functools.lru_cache(maxsize=1024)
+def _encode_cached(key: str) -> np.ndarray:
+    embedding = _encode_batch([key])
+    embedding.setflags(write=False)  # shared between callers
+    return embedding
+
+
+def _encode_query(text: str) -> np.ndarray:
+    """
+    Encode a query as a (1, dim) normalized vector, caching repeated questions.
+
+    Keyed by the stripped, lower-cased text; all-MiniLM-L6-v2 lower-cases its
+    input anyway, so this does not change the embedding.
+    """
+    return _encode_cached(text.strip().lower())
+
+
+async def _encode_batcher(queue: asyncio.Queue):
+    """Drain queued query texts in small batches and resolve their futures."""
+    loop = asyncio.get_running_loop()
+    while True:
+        items = [await queue.get()]
+        try:
+            while len(items) < _MAX_ENCODE_BATCH:
+                items.append(await asyncio.wait_for(queue.get(), timeout=_ENCODE_WINDOW))
+        except asyncio.TimeoutError:
+            pass
+
+        texts = [text for text, _ in items]
+        try:
+            embeddings = await loop.run_in_executor(None, _encode_batch, texts)
+        except Exception as e:
+            for _, future in items:
+                if not future.done():
+                    future.set_exception(e)
+            continue
+
+        for (_, future), embedding in zip(items, embeddings):
+            if not future.done():
+                future.set_result(embedding)
+
+
+async def _encode_async(text: str) -> np.ndarray:
+    """Encode one query text via the shared micro-batcher."""
+    global _encode_queue, _batcher_task
+
+    loop = asyncio.get_running_loop()
+    if _batcher_task is None or _batcher_task.done() or _batcher_task.get_loop() is not loop:
+        _encode_queue = asyncio.Queue()
+        _batcher_task = loop.create_task(_encode_batcher(_encode_queue))
+
+    future = loop.create_future()
+    await _encode_queue.put((text, future))
+    return await future
+
+
+async def _writer(queue: asyncio.Queue):
+    """Apply queued upserts one batch at a time and resolve their futures."""
+    loop = asyncio.get_running_loop()
+    while True:
+        items = [await queue.get()]
+        pending_chunks = len(items[0][0])
+        try:
+            while pending_chunks < _WRITE_MAX_CHUNKS:
+                item = await asyncio.wait_for(queue.get(), timeout=_WRITE_WINDOW)
+                items.append(item)
+                pending_chunks += len(item[0])
+        except asyncio.TimeoutError:
+            pass
+
+        # Merge by chunk id (a later upsert of the same id wins)
+        merged: dict[str, tuple[str, dict]] = {}
+        for ids, documents, metadatas, _ in items:
+            for chunk_id, doc_text, meta in zip(ids, documents, metadatas):
+                merged[chunk_id] = (doc_text, meta)
+
+        try:
+            total = await loop.run_in_executor(
+                None,
+                upsert_chunks,
+                list(merged),
+                [doc_text for doc_text, _ in merged.values()],
+                [meta for _, meta in merged.values()],
+            )
+        except Exception as e:
+            for *_, future in items:
+                if not future.done():
+                    future.set_exception(e)
+            continue
+
+        for *_, future in items:
+            if not future.done():
+                future.set_result(total)
 
 
 # ---------------------------------------------------------------------------
@@ -126,13 +386,35 @@ def upsert_chunks(
     Returns:
         Total number of chunks in the store.
     """
-    global _index, _metadata
-
     _load_index()
-    model = _get_model()
 
-    # Build lookup of existing IDs
-    existing_ids = {meta["id"]: idx for idx, meta in enumerate(_metadata)}
+    # Embed the chunks that are not stored yet before taking the lock, so
+    # searches are not blocked on the model
+    with _store_lock:
+        pending = [
+            (chunk_id, doc_text)
+            for chunk_id, doc_text in zip(ids, documents)
+            if chunk_id not in _id_to_idx
+        ]
+    embeddings = {}
+    if pending:
+        logger.info("Encoding %d new documents...", len(pending))
+        # All sections in one call, normalized for cosine similarity by the model
+        rows = _encode_batch([doc_text for _, doc_text in pending], batch_size=_INGEST_ENCODE_BATCH)
+        embeddings = {chunk_id: row for (chunk_id, _), row in zip(pending, rows)}
+
+    with _store_lock:
+        return _apply_upsert(ids, documents, metadatas, embeddings)
+
+
+def _apply_upsert(
+    ids: list[str],
+    documents: list[str],
+    metadatas: list[dict],
+    embeddings: dict[str, np.ndarray],
+) -> int:
+    """Write chunks into the index and lookups (caller holds _store_lock)."""
+    global _dirty_since_flush, _generation
 
     # Separate new and update chunks
     new_ids = []
@@ -140,10 +422,12 @@ def upsert_chunks(
     new_metas = []
 
     for chunk_id, doc_text, meta in zip(ids, documents, metadatas):
-        if chunk_id in existing_ids:
+        idx = _id_to_idx.get(chunk_id)
+        if idx is not None:
             # Update existing: remove old and add new
-            idx = existing_ids[chunk_id]
+            _untrack_chunk(idx, _metadata[idx]["metadata"])
             _metadata[idx] = {"id": chunk_id, "text": doc_text, "metadata": meta}
+            _track_chunk(idx, meta)
             # Note: FAISS doesn't support in-place updates, so we mark for rebuild
         else:
             new_ids.append(chunk_id)
@@ -152,11 +436,26 @@ def upsert_chunks(
 
     # Add new chunks
     if new_docs:
-        logger.info("Encoding %d new documents...", len(new_docs))
-        embeddings = model.encode(new_docs, show_progress_bar=False, convert_to_numpy=True)
-        
-        # Normalize for cosine similarity
-        embeddings = np.array([_normalize_vector(emb) for emb in embeddings], dtype=np.float32)
+        # Chunks missing from the pre-encoded set (e.g. the store was
+        # cleared in between) are encoded now
+        missing = [i for i, chunk_id in enumerate(new_ids) if chunk_id not in embeddings]
+        if missing:
+            rows = _encode_batch([new_docs[i] for i in missing], batch_size=_INGEST_ENCODE_BATCH)
+            embeddings = {**embeddings, **{new_ids[i]: row for i, row in zip(missing, rows)}}
+        embeddings = np.ascontiguousarray(np.vstack([embeddings[chunk_id] for chunk_id in new_ids]))
+
+        # Scalar-quantized indexes learn their per-dimension ranges once,
+        # from the first batch. Small first batches are padded with the unit
+        # bounds so later vectors are never clipped.
+        if not _index.is_trained:
+            train = embeddings
+            if len(train) < _SQ_MIN_TRAIN:
+                bounds = np.vstack([
+                    np.full((1, _embedding_dim), -1.0, dtype=np.float32),
+                    np.full((1, _embedding_dim), 1.0, dtype=np.float32),
+                ])
+                train = np.vstack([embeddings, bounds])
+            _index.train(train)
 
         # Add to index
         _index.add(embeddings)
@@ -168,12 +467,43 @@ def upsert_chunks(
                 "text": doc_text,
                 "metadata": meta,
             })
+            _id_to_idx[chunk_id] = len(_metadata) - 1
+            _track_chunk(len(_metadata) - 1, meta)
 
+    _generation += 1
+    _dirty_since_flush += len(ids)
+    if _dirty_since_flush >= _FLUSH_EVERY:
         _save_index()
 
     return len(_metadata)
 
 
+async def aupsert_chunks(
+    ids: list[str],
+    documents: list[str],
+    metadatas: list[dict],
+) -> int:
+    """
+    Async variant of upsert_chunks() for use inside the event loop.
+
+    Writes are funnelled through the single writer task (never concurrent)
+    and run off the event loop; concurrent callers share one batched write.
+
+    Returns:
+        Total number of chunks in the store after the write.
+    """
+    global _write_queue, _writer_task
+
+    loop = asyncio.get_running_loop()
+    if _writer_task is None or _writer_task.done() or _writer_task.get_loop() is not loop:
+        _write_queue = asyncio.Queue()
+        _writer_task = loop.create_task(_writer(_write_queue))
+
+    future = loop.create_future()
+    await _write_queue.put((ids, documents, metadatas, future))
+    return await future
+
+
 def query(
     query_text: str,
     n_results: int = 5,
@@ -188,29 +518,98 @@ def query(
         where_filter: Optional metadata filter dict.
             Simple: {"user_id": "abc"}
             Compound: {"$and": [{"user_id": "abc"}, {"policy_number": "POL-1"}]}
+            Also $or, {"key": {"$in": [...]}} and {"key": None} (key missing).
 
     Returns:
         List of dicts with keys: id, text, metadata, distance.
     """
-    global _index, _metadata
+    _load_index()
+
+    if _index.ntotal == 0:
+        return []
+
+    query_emb = _encode_query(query_text)
+    return _search(query_emb, n_results, where_filter)
+
+
+def query_batch(
+    query_texts: list[str],
+    n_results: int = 5,
+    where_filter: dict | None = None,
+) -> list[list[dict]]:
+    """
+    query() for several texts sharing one filter: the texts are embedded in
+    a single model.encode() call, then each row is searched in turn.
 
+    Returns one result list per text, in order.
+    """
+    _load_index()
+
+    if _index.ntotal == 0 or not query_texts:
+        return [[] for _ in query_texts]
+
+    query_embs = _encode_batch([text.strip().lower() for text in query_texts])
+    return [_search(query_embs[i:i + 1], n_results, where_filter) for i in range(len(query_texts))]
+
+
+async def aquery(
+    query_text: str,
+    n_results: int = 5,
+    where_filter: dict | None = None,
+) -> list[dict]:
+    """
+    Async variant of query() for use inside the event loop.
+
+    The query embedding is computed by a shared micro-batcher, so
+    concurrent callers are encoded together in one model.encode() call.
+    """
     _load_index()
 
     if _index.ntotal == 0:
         return []
 
-    model = _get_model()
+    query_emb = (await _encode_async(query_text)).reshape(1, -1)
+    return _search(query_emb, n_results, where_filter)
+
 
-    # Encode query
-    query_emb = model.encode([query_text], show_progress_bar=False, convert_to_numpy=True)[0]
-    query_emb = _normalize_vector(query_emb).reshape(1, -1).astype(np.float32)
+def _search(
+    query_emb: np.ndarray,
+    n_results: int,
+    where_filter: dict | None,
+) -> list[dict]:
+    """Search the index with a (1, dim) normalized query embedding and apply filters."""
+    with _store_lock:
+        return _search_locked(query_emb, n_results, where_filter)
+
+
+def _search_locked(
+    query_emb: np.ndarray,
+    n_results: int,
+    where_filter: dict | None,
+) -> list[dict]:
+    allowed = _allowed_positions(where_filter)
+    if allowed is not None and not allowed:
+        return []
 
     # Search FAISS index
     # Get more results than needed for filtering
-    k = min(_index.ntotal, n_results * 10)
-    distances, indices = _index.search(query_emb, k)
+    gpu_index_cls = getattr(faiss, "GpuIndex", None)
+    on_gpu = gpu_index_cls is not None and isinstance(_index, gpu_index_cls)
+    if allowed is not None and not on_gpu:
+        # Only score the caller's chunks
+        k = min(len(allowed), n_results * 10)
+        selector = faiss.IDSelectorBatch(np.fromiter(allowed, dtype=np.int64, count=len(allowed)))
+        if isinstance(_index, faiss.IndexHNSW):
+            params = faiss.SearchParametersHNSW(sel=selector, efSearch=max(_HNSW_EF_SEARCH, k))
+        else:
+            params = faiss.SearchParameters(sel=selector)
+        distances, indices = _index.search(query_emb, k, params=params)
+    else:
+        k = min(_index.ntotal, n_results * 10)
+        distances, indices = _index.search(query_emb, k)
 
     # Apply metadata filters
+    matches = _compile_filter(where_filter)
     filtered_results = []
     for dist, idx in zip(distances[0], indices[0]):
         if idx == -1:  # FAISS returns -1 for missing results
@@ -219,11 +618,11 @@ def query(
         chunk_data = _metadata[idx]
         
         # Apply filter
-        if where_filter and not _matches_filter(chunk_data["metadata"], where_filter):
+        if not matches(chunk_data["metadata"]):
             continue
 
         # Convert distance (cosine similarity) to distance metric
-        # FAISS IndexFlatIP returns dot product (cosine similarity for normalized vectors)
+        # Inner-product indexes return dot product (cosine similarity for normalized vectors)
         # Convert to distance: distance = 1 - similarity
         similarity = float(dist)
         distance = 1.0 - similarity
@@ -241,6 +640,21 @@ def query(
     return filtered_results
 
 
+def flush():
+    """Write any pending (unsaved) upserts to disk."""
+    with _store_lock:
+        if _dirty_since_flush and _index is not None:
+            _save_index()
+
+
+atexit.register(flush)
+
+
+def generation() -> int:
+    """Return a counter that changes whenever the stored chunks change."""
+    return _generation
+
+
 def count() -> int:
     """Return total number of chunks in the store."""
     _load_index()
@@ -250,30 +664,100 @@ def count() -> int:
 def clear():
     """Clear all data from the vector store."""
     global _index, _metadata
-    _index = faiss.IndexFlatIP(_embedding_dim)
-    _metadata = []
-    _save_index()
+    with _store_lock:
+        _index = _to_device(_new_index())
+        _metadata = []
+        _rebuild_lookups()
+        _save_index()
     logger.info("Cleared FAISS vector store")
 
 
-def _matches_filter(metadata: dict, where_filter: dict) -> bool:
-    """Check if metadata matches the filter criteria."""
+def _allowed_positions(where_filter: dict | None) -> set[int] | None:
+    """
+    Resolve user_id / policy_number constraints to index positions.
+
+    Equality and user_id None (no owner, i.e. base policies) are resolved
+    through the secondary lookups; $and intersects and $or unions its
+    branches. Returns None when the filter cannot be narrowed this way
+    (search everything, filter afterwards). The result may be a superset
+    of the matching chunks; _compile_filter has the final say.
+    """
+    if not where_filter:
+        return None
+
+    if "$and" in where_filter:
+        allowed = None
+        for cond in where_filter["$and"]:
+            positions = _allowed_positions(cond)
+            if positions is not None:
+                allowed = positions if allowed is None else allowed & positions
+        return allowed
+
+    if "$or" in where_filter:
+        allowed = set()
+        for cond in where_filter["$or"]:
+            positions = _allowed_positions(cond)
+            if positions is None:
+                return None
+            allowed |= positions
+        return allowed
+
+    allowed = None
+    for key, lookup in (("user_id", _by_user), ("policy_number", _by_policy)):
+        if key not in where_filter:
+            continue
+        value = where_filter[key]
+        if isinstance(value, dict):
+            if "$eq" not in value:
+                continue
+            value = value["$eq"]
+        if value is None:
+            if key != "user_id":
+                continue
+            value = ""
+        positions = lookup.get(str(value), set())
+        allowed = positions.copy() if allowed is None else allowed & positions
+    return allowed
+
+
+def _compile_filter(where_filter: dict | None) -> Callable[[dict], bool]:
+    """
+    Compile a metadata filter into a predicate over a chunk's metadata dict.
+
+    Done once per query so the per-candidate check does no dict dispatch
+    or repeated str() of the filter values.
+    """
     if not where_filter:
-        return True
+        return lambda metadata: True
 
     # Handle $and compound filter
     if "$and" in where_filter:
-        conditions = where_filter["$and"]
-        return all(_matches_filter(metadata, cond) for cond in conditions)
+        preds = [_compile_filter(cond) for cond in where_filter["$and"]]
+        return lambda metadata: all(pred(metadata) for pred in preds)
 
     # Handle $or compound filter
     if "$or" in where_filter:
-        conditions = where_filter["$or"]
-        return any(_matches_filter(metadata, cond) for cond in conditions)
+        preds = [_compile_filter(cond) for cond in where_filter["$or"]]
+        return lambda metadata: any(pred(metadata) for pred in preds)
 
     # Simple key-value filter
-    for key, value in where_filter.items():
-        if str(metadata.get(key, "")) != str(value):
-            return False
+    preds = [_compile_condition(key, value) for key, value in where_filter.items()]
+    if len(preds) == 1:
+        return preds[0]
+    return lambda metadata: all(pred(metadata) for pred in preds)
 
-    return True
+
+def _compile_condition(key: str, value: Any) -> Callable[[dict], bool]:
+    """
+    Predicate for one metadata key: a plain value or {"$eq": value} for
+    equality, {"$in": [...]} for membership, None for "missing or empty".
+    """
+    if isinstance(value, dict):
+        if "$in" in value:
+            values = frozenset(str(v) for v in value["$in"])
+            return lambda metadata: str(metadata.get(key, "")) in values
+        value = value["$eq"]
+    if value is None:
+        return lambda metadata: not metadata.get(key)
+    value = str(value)
+    return lambda metadata: str(metadata.get(key, "")) == value
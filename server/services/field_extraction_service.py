@@ -4,12 +4,23 @@ Field Extraction Service using LLM.
 Converts OCR text into structured JSON fields using OpenRouter/Gemini AI.
 """
 
+import functools
 import logging
-import json
 import os
+import re
+from contextlib import suppress
+from datetime import datetime
 from typing import Dict, Optional, Any
+import orjson
 from dotenv import load_dotenv
-import requests
+
+try:
+    import google.generativeai as genai
+except ImportError:
+    genai = None
+
+from services import llm_cache
+from services.http_client import post_openrouter
 
 load_dotenv()
 
@@ -19,8 +30,36 @@ logger = logging.getLogger("field_extraction_service")
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
+OPENROUTER_MODEL = "meta-llama/llama-3.1-8b-instruct:free"  # Fast and free model
+GEMINI_MODEL = "gemini-pro"
+
+if genai is not None and GEMINI_API_KEY:
+    genai.configure(api_key=GEMINI_API_KEY)
+
+# Bump when the extraction prompt changes so cached results are not reused
+PROMPT_VERSION = "2"
+
+# Output bound: the field set below serializes to well under 1K tokens
+_MAX_EXTRACTION_TOKENS = 1024
+
+# Field validation
+DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+AMOUNT_RE = re.compile(r"[^0-9.\-]")
+DATE_FIELDS = ("admission_date", "discharge_date", "accident_date", "incident_date", "date_of_death")
+
+# No-LLM fallback: only values printed next to an explicit label, found in a
+# single pass over the OCR text (first match per field wins). Dates and
+# unlabelled amounts are left to the LLM, since guessing them is unreliable.
+_FALLBACK_RE = re.compile(
+    r"\b(?:grand\s+total|total\s+amount|net\s+(?:amount\s+)?payable|amount\s+payable|bill\s+amount|claim(?:ed)?\s+amount)"
+    r"\s*[:\-]?\s*(?:rs\.?|inr|₹)?\s*(?P<claim_amount>\d[\d,]*(?:\.\d{1,2})?)"
+    r"|\b(?:invoice|bill)\s*(?:no\.?|number|#)\s*[:\-]?\s*(?P<invoice_number>(?=[A-Z\-/]*\d)[A-Z0-9][A-Z0-9\-/]*)"
+    r"|\bpolicy\s*(?:no\.?|number|#)\s*[:\-]?\s*(?P<policy_number>(?=[A-Z\-/]*\d)[A-Z0-9][A-Z0-9\-/]*)",
+    re.IGNORECASE,
+)
 
-def extract_fields_from_text(
+
+async def extract_fields_from_text(
     ocr_text: str,
     claim_category: str = "Health"
 ) -> Dict[str, Any]:
@@ -35,15 +74,17 @@ def extract_fields_from_text(
         Dictionary with extracted fields
     """
     
-    # Build extraction prompt based on category
-    prompt = _build_extraction_prompt(ocr_text, claim_category)
+    # Static instructions (per category) go in the system prompt, the OCR
+    # text in a short user message
+    system_prompt = _build_extraction_system_prompt(claim_category)
+    prompt = _build_extraction_prompt(ocr_text)
     
     # Try OpenRouter first, fallback to Gemini
     try:
         if OPENROUTER_API_KEY:
-            return _extract_with_openrouter(prompt)
-        elif GEMINI_API_KEY:
-            return _extract_with_gemini(prompt)
+            return await _extract_with_openrouter(system_prompt, prompt)
+        elif GEMINI_API_KEY and genai is not None:
+            return await _extract_with_gemini(system_prompt, prompt)
         else:
             logger.error("No API keys configured for LLM extraction")
             return _extract_fallback(ocr_text)
@@ -52,12 +93,8 @@ def extract_fields_from_text(
         return _extract_fallback(ocr_text)
 
 
-def _build_extraction_prompt(ocr_text: str, claim_category: str) -> str:
-    """
-    Build extraction prompt based on claim category.
-    """
-    
-    base_fields = """
+# Static parts of the extraction system prompt
+_BASE_FIELDS = """
     Extract the following fields from the insurance claim document text:
     
     REQUIRED FIELDS:
@@ -76,16 +113,16 @@ def _build_extraction_prompt(ocr_text: str, claim_category: str) -> str:
     - surgery_performed: Whether surgery was performed (true/false)
     - itemized_expenses: List of expense items with amounts
     """
-    
-    category_specific = {
-        "Health": """
+
+_CATEGORY_FIELDS = {
+    "Health": """
         ADDITIONAL HEALTH FIELDS:
         - relationship_to_policyholder: Relationship (Self/Spouse/Child/Parent)
         - pre_existing_condition: Any pre-existing conditions mentioned
         - emergency_admission: Was it an emergency admission (true/false)
         """,
-        
-        "Vehicle": """
+
+    "Vehicle": """
         ADDITIONAL VEHICLE FIELDS:
         - vehicle_make_model: Vehicle make and model
         - registration_number: Vehicle registration number
@@ -94,8 +131,8 @@ def _build_extraction_prompt(ocr_text: str, claim_category: str) -> str:
         - police_report_number: Police report number if filed
         - repair_garage: Name of repair garage
         """,
-        
-        "Life": """
+
+    "Life": """
         ADDITIONAL LIFE FIELDS:
         - deceased_name: Name of deceased
         - date_of_death: Date of death
@@ -103,25 +140,33 @@ def _build_extraction_prompt(ocr_text: str, claim_category: str) -> str:
         - nominee_name: Nominee name
         - nominee_relationship: Relationship to deceased
         """,
-        
-        "Property": """
+
+    "Property": """
         ADDITIONAL PROPERTY FIELDS:
         - property_address: Address of damaged property
         - incident_type: Type of incident (Fire/Theft/Natural Disaster)
         - incident_date: Date of incident
         - fire_dept_report: Fire department report number if applicable
         """
-    }
+}
+
+
+@functools.lru_cache(maxsize=8)
+def _build_extraction_system_prompt(claim_category: str) -> str:
+    """
+    Build the static extraction instructions for a claim category.
+    
+    Memoized: the text only depends on the category.
+    """
     
-    specific = category_specific.get(claim_category, "")
+    specific = _CATEGORY_FIELDS.get(claim_category, "")
     
     prompt = f"""You are an expert at extracting structured data from insurance claim documents.
 
-{base_fields}
+{_BASE_FIELDS}
 {specific}
 
-DOCUMENT TEXT:
-{ocr_text}
+The user message contains the DOCUMENT TEXT.
 
 INSTRUCTIONS:
 1. Extract ALL available fields from the text
@@ -141,18 +186,38 @@ Example:
     "admission_date": "2026-02-10",
     "discharge_date": "2026-02-14",
     ...
-}}
+}}"""
+    
+    return prompt
+
+
+def _build_extraction_prompt(ocr_text: str) -> str:
+    """
+    Build the user message (document text only) for extraction.
+    """
+    return f"""DOCUMENT TEXT:
+{ocr_text}
 
 JSON OUTPUT:
 """
-    
-    return prompt
 
 
-def _extract_with_openrouter(prompt: str) -> Dict[str, Any]:
+def _cache_key(model: str, system_prompt: str, prompt: str) -> str:
+    """
+    Cache key for one extraction (system prompt + user message).
+    """
+    return llm_cache.make_key(model, PROMPT_VERSION, f"{system_prompt}\n\n{prompt}")
+
+
+async def _extract_with_openrouter(system_prompt: str, prompt: str) -> Dict[str, Any]:
     """
     Extract fields using OpenRouter API.
     """
+    cache_key = _cache_key(OPENROUTER_MODEL, system_prompt, prompt)
+    cached = llm_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
     logger.info("Extracting fields using OpenRouter")
     
     url = "https://openrouter.ai/api/v1/chat/completions"
@@ -162,49 +227,72 @@ def _extract_with_openrouter(prompt: str) -> Dict[str, Any]:
     }
     
     payload = {
-        "model": "meta-llama/llama-3.1-8b-instruct:free",  # Fast and free model
+        "model": OPENROUTER_MODEL,
         "messages": [
+            {
+                "role": "system",
+                "content": system_prompt
+            },
             {
                 "role": "user",
                 "content": prompt
             }
         ],
         "temperature": 0.1,  # Low temperature for consistent extraction
-        "max_tokens": 2000
+        "max_tokens": _MAX_EXTRACTION_TOKENS
     }
     
-    response = requests.post(url, headers=headers, json=payload, timeout=30)
+    response = await post_openrouter(url, headers, payload, timeout=30)
     response.raise_for_status()
     
     result = response.json()
     content = result["choices"][0]["message"]["content"]
     
     # Parse JSON from response
-    return _parse_json_response(content)
+    fields = _parse_json_response(content)
+    llm_cache.set(cache_key, fields, model=OPENROUTER_MODEL)
+    return fields
 
 
-def _extract_with_gemini(prompt: str) -> Dict[str, Any]:
+@functools.lru_cache(maxsize=1)
+def _get_gemini_model():
+    """
+    Return the Gemini model, created once.
+    
+    gemini-pro does not accept system_instruction, so callers send the
+    system prompt as the first part of the contents instead.
+    """
+    if genai is None:
+        raise RuntimeError("google-generativeai is not installed; cannot use Gemini")
+    return genai.GenerativeModel(GEMINI_MODEL)
+
+
+async def _extract_with_gemini(system_prompt: str, prompt: str) -> Dict[str, Any]:
     """
     Extract fields using Google Gemini API.
     """
+    cache_key = _cache_key(GEMINI_MODEL, system_prompt, prompt)
+    cached = llm_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
     logger.info("Extracting fields using Gemini")
     
     try:
-        import google.generativeai as genai
+        model = _get_gemini_model()
         
-        genai.configure(api_key=GEMINI_API_KEY)
-        model = genai.GenerativeModel('gemini-pro')
-        
-        response = model.generate_content(
-            prompt,
+        response = await model.generate_content_async(
+            [system_prompt, prompt],
             generation_config={
                 "temperature": 0.1,
-                "max_output_tokens": 2000
+                "max_output_tokens": _MAX_EXTRACTION_TOKENS
             }
         )
         
         content = response.text
-        return _parse_json_response(content)
+        fields = _parse_json_response(content)
+        llm_cache.set(cache_key, fields, model=GEMINI_MODEL)
+        return fields
         
     except Exception as e:
         logger.error(f"Gemini extraction failed: {e}")
@@ -227,8 +315,8 @@ def _parse_json_response(content: str) -> Dict[str, Any]:
     content = content.strip()
     
     try:
-        return json.loads(content)
-    except json.JSONDecodeError as e:
+        return orjson.loads(content)
+    except orjson.JSONDecodeError as e:
         logger.error(f"Failed to parse JSON: {e}")
         logger.error(f"Content: {content[:500]}")
         raise ValueError("LLM did not return valid JSON")
@@ -237,19 +325,28 @@ def _parse_json_response(content: str) -> Dict[str, Any]:
 def _extract_fallback(ocr_text: str) -> Dict[str, Any]:
     """
     Fallback extraction using simple pattern matching.
-    Returns empty/null fields if LLM is unavailable.
+    Only labelled amounts, invoice numbers and policy numbers are filled in;
+    every other field is null.
     """
     logger.warning("Using fallback extraction (no LLM available)")
     
+    found: Dict[str, str] = {}
+    for match in _FALLBACK_RE.finditer(ocr_text or ""):
+        for field, value in match.groupdict().items():
+            if value is not None:
+                found.setdefault(field, value)
+    
+    claim_amount = found.get("claim_amount")
+    
     return {
-        "claim_amount": None,
+        "claim_amount": float(claim_amount.replace(",", "")) if claim_amount else None,
         "hospital_name": None,
         "admission_date": None,
         "discharge_date": None,
         "diagnosis": None,
         "treatment_type": None,
-        "invoice_number": None,
-        "policy_number": None,
+        "invoice_number": found.get("invoice_number"),
+        "policy_number": found.get("policy_number"),
         "patient_name": None,
         "doctor_name": None,
         "extraction_method": "fallback",
@@ -267,24 +364,96 @@ def validate_extracted_fields(fields: Dict[str, Any]) -> Dict[str, Any]:
     Returns:
         Validated and cleaned fields
     """
-    # Ensure numeric fields are numbers
-    if fields.get("claim_amount"):
+    # Ensure numeric fields are numbers (currency symbols/commas stripped)
+    amount = fields.get("claim_amount")
+    if amount and not isinstance(amount, (int, float)):
         try:
-            fields["claim_amount"] = float(str(fields["claim_amount"]).replace(",", ""))
-        except (ValueError, TypeError):
+            # lstrip: the dot of a prefix like "Rs." survives the substitution
+            fields["claim_amount"] = float(AMOUNT_RE.sub("", str(amount)).lstrip("."))
+        except ValueError:
             fields["claim_amount"] = None
     
-    # Validate date formats (basic check)
-    for date_field in ["admission_date", "discharge_date", "accident_date", "date_of_death"]:
-        if fields.get(date_field):
-            # Basic validation: should be YYYY-MM-DD format
-            date_str = str(fields[date_field])
-            if len(date_str) != 10 or date_str.count("-") != 2:
-                logger.warning(f"Invalid date format for {date_field}: {date_str}")
+    # Dates must be real YYYY-MM-DD dates; anything else is dropped
+    invalid_dates = []
+    for date_field in DATE_FIELDS:
+        value = fields.get(date_field)
+        if not value:
+            continue
+        normalized = None
+        if isinstance(value, str) and DATE_RE.match(value):
+            with suppress(ValueError):
+                normalized = datetime.strptime(value, "%Y-%m-%d").date().isoformat()
+        if normalized is None:
+            invalid_dates.append(f"{date_field}={value!r}")
+        fields[date_field] = normalized
+    
+    if invalid_dates:
+        logger.warning(f"Invalid date format, cleared: {', '.join(invalid_dates)}")
     
     return fields
 
 
+# polymorphic_data projection per claim type: container key and
+# (source key, extracted field) pairs
+_CLAIM_TYPE_FIELDS = {
+    "Health": {
+        "container": "healthInfo",
+        "fields": (
+            ("patientName", "patient_name"),
+            ("dob", "dob"),
+            ("relationship", "relationship"),
+            ("hospitalName", "hospital_name"),
+            ("hospitalAddress", "hospital_address"),
+            ("admissionDate", "admission_date"),
+            ("dischargeDate", "discharge_date"),
+            ("doctorName", "doctor_name"),
+            ("diagnosis", "diagnosis"),
+            ("treatment", "treatment"),
+            ("surgeryPerformed", "surgery_performed"),
+        ),
+    },
+    "Vehicle": {
+        "container": "vehicleInfo",
+        "fields": (
+            ("makeModel", "vehicle_make_model"),
+            ("regNumber", "registration_number"),
+            ("vin", "vin"),
+            ("odometer", "odometer"),
+            ("policeReportFiled", "police_report_filed"),
+            ("policeReportNo", "police_report_number"),
+            ("location", "accident_location"),
+            ("time", "accident_time"),
+            ("incidentType", "incident_type"),
+        ),
+    },
+    "Life": {
+        "container": "lifeInfo",
+        "fields": (
+            ("deceasedName", "deceased_name"),
+            ("deceasedDob", "deceased_dob"),
+            ("dateOfDeath", "date_of_death"),
+            ("causeOfDeath", "cause_of_death"),
+            ("nomineeName", "nominee_name"),
+            ("nomineeRelationship", "nominee_relationship"),
+            ("nomineeContact", "nominee_contact"),
+            ("bankDetails", "bank_details"),
+            ("sumAssured", "sum_assured"),
+            ("policyStartDate", "policy_start_date"),
+        ),
+    },
+    "Property": {
+        "container": "propertyInfo",
+        "fields": (
+            ("address", "property_address"),
+            ("incidentType", "incident_type"),
+            ("locationOfDamage", "location_of_damage"),
+            ("fireDeptInvolved", "fire_dept_involved"),
+            ("reportNumber", "report_number"),
+        ),
+    },
+}
+
+
 def extract_fields_from_claim(claim) -> Dict[str, Any]:
     """
     Extract structured fields from claim object data.
@@ -312,60 +481,10 @@ def extract_fields_from_claim(claim) -> Dict[str, Any]:
     # Extract polymorphic data based on claim type
     poly_data = claim.polymorphic_data or {}
     
-    if claim.type == "Health" and "healthInfo" in poly_data:
-        health = poly_data["healthInfo"]
-        extracted.update({
-            "patient_name": health.get("patientName"),
-            "dob": health.get("dob"),
-            "relationship": health.get("relationship"),
-            "hospital_name": health.get("hospitalName"),
-            "hospital_address": health.get("hospitalAddress"),
-            "admission_date": health.get("admissionDate"),
-            "discharge_date": health.get("dischargeDate"),
-            "doctor_name": health.get("doctorName"),
-            "diagnosis": health.get("diagnosis"),
-            "treatment": health.get("treatment"),
-            "surgery_performed": health.get("surgeryPerformed"),
-        })
-    
-    elif claim.type == "Vehicle" and "vehicleInfo" in poly_data:
-        vehicle = poly_data["vehicleInfo"]
-        extracted.update({
-            "vehicle_make_model": vehicle.get("makeModel"),
-            "registration_number": vehicle.get("regNumber"),
-            "vin": vehicle.get("vin"),
-            "odometer": vehicle.get("odometer"),
-            "police_report_filed": vehicle.get("policeReportFiled"),
-            "police_report_number": vehicle.get("policeReportNo"),
-            "accident_location": vehicle.get("location"),
-            "accident_time": vehicle.get("time"),
-            "incident_type": vehicle.get("incidentType"),
-        })
-    
-    elif claim.type == "Life" and "lifeInfo" in poly_data:
-        life = poly_data["lifeInfo"]
-        extracted.update({
-            "deceased_name": life.get("deceasedName"),
-            "deceased_dob": life.get("deceasedDob"),
-            "date_of_death": life.get("dateOfDeath"),
-            "cause_of_death": life.get("causeOfDeath"),
-            "nominee_name": life.get("nomineeName"),
-            "nominee_relationship": life.get("nomineeRelationship"),
-            "nominee_contact": life.get("nomineeContact"),
-            "bank_details": life.get("bankDetails"),
-            "sum_assured": life.get("sumAssured"),
-            "policy_start_date": life.get("policyStartDate"),
-        })
-    
-    elif claim.type == "Property" and "propertyInfo" in poly_data:
-        prop = poly_data["propertyInfo"]
-        extracted.update({
-            "property_address": prop.get("address"),
-            "incident_type": prop.get("incidentType"),
-            "location_of_damage": prop.get("locationOfDamage"),
-            "fire_dept_involved": prop.get("fireDeptInvolved"),
-            "report_number": prop.get("reportNumber"),
-        })
+    spec = _CLAIM_TYPE_FIELDS.get(claim.type)
+    if spec and spec["container"] in poly_data:
+        source = poly_data[spec["container"]]
+        extracted.update({dest: source.get(key) for key, dest in spec["fields"]})
     
     # Add itemized loss if present
     if "itemizedLoss" in poly_data:
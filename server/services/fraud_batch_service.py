@@ -0,0 +1,295 @@
+"""
+Bulk Fraud Re-scoring Service.
+
+Re-scores many existing claims (nightly runs, backfills) through the
+provider's asynchronous batch API instead of one interactive request per
+claim:
+1. Builds the usual fraud prompt for every claim
+2. Uploads them as one JSONL file (one chat-completion request per line)
+3. Polls the batch job until it finishes
+4. Parses each result and writes it back to its claim
+
+Interactive analysis (new claims) keeps using analyze_claim_fraud. If no
+batch endpoint is configured, or it does not offer the batch API, claims
+are instead re-scored with multi-claim prompts via batch_analyze_claim_fraud.
+
+Run from the server directory (e.g. nightly from cron):
+    python -m services.fraud_batch_service            # all analyzed claims
+    python -m services.fraud_batch_service CLM-...    # specific claims
+"""
+
+import asyncio
+import logging
+import os
+from datetime import datetime
+from typing import Any, Dict, List
+
+import httpx
+import orjson
+from dotenv import load_dotenv
+from sqlalchemy import select, update
+from sqlalchemy.orm import selectinload
+
+from database import async_session_maker
+from models import Claim, FraudStatus
+from services.http_client import close_http_client, get_http_client, phase_timeouts
+from services.fraud_detection_service import (
+    FRAUD_MAX_BATCH,
+    OPENROUTER_MODEL,
+    batch_analyze_claim_fraud,
+    build_fraud_requests,
+    cache_fraud_analysis,
+    fraud_chat_request,
+    parse_fraud_analysis,
+)
+from services.background_fraud_service import get_risk_level
+
+load_dotenv()
+
+logger = logging.getLogger("fraud_batch_service")
+
+# OpenAI-compatible batch API (files + batches endpoints), e.g.
+# https://api.openai.com/v1. OpenRouter has no batch API, so there is no
+# default; without it claims are re-scored with multi-claim prompts.
+BATCH_API_BASE = os.getenv("FRAUD_BATCH_API_BASE")
+BATCH_API_KEY = os.getenv("FRAUD_BATCH_API_KEY")
+BATCH_MODEL = os.getenv("FRAUD_BATCH_MODEL", OPENROUTER_MODEL)
+
+BATCH_COMPLETION_WINDOW = "24h"
+BATCH_POLL_INTERVAL = 60  # seconds
+
+_TERMINAL_STATES = frozenset(("completed", "failed", "expired", "cancelled"))
+
+
+async def rescore_claims(claim_ids: List[str]) -> Dict[str, Any]:
+    """
+    Re-run fraud analysis for existing claims as one bulk job.
+
+    Args:
+        claim_ids: IDs of the claims to re-score
+
+    Returns:
+        Summary with the number of claims updated and the IDs that failed
+    """
+    logger.info(f"Starting bulk fraud re-scoring for {len(claim_ids)} claims")
+
+    async with async_session_maker() as db:
+        requests = await _build_claim_requests(db, claim_ids)
+
+    if not requests:
+        return {"updated": 0, "failed": list(claim_ids)}
+
+    if not (BATCH_API_BASE and BATCH_API_KEY):
+        logger.info("No batch API configured; re-scoring with multi-claim prompts")
+        results = await _run_prompt_batches(requests)
+    else:
+        try:
+            results = await _run_batch_job(requests)
+        except httpx.HTTPStatusError as e:
+            logger.warning(
+                f"Batch API unavailable ({e.response.status_code}); "
+                f"re-scoring with multi-claim prompts instead"
+            )
+            results = await _run_prompt_batches(requests)
+
+    async with async_session_maker() as db:
+        async with db.begin():
+            for request in requests:
+                analysis = results.get(request["claim_id"])
+                if analysis is not None:
+                    await _apply_analysis(db, request, analysis)
+
+    failed = [claim_id for claim_id in claim_ids if claim_id not in results]
+    logger.info(f"Bulk re-scoring finished: {len(results)} updated, {len(failed)} failed")
+    return {"updated": len(results), "failed": failed}
+
+
+async def _build_claim_requests(db, claim_ids: List[str]) -> List[Dict[str, Any]]:
+    """
+    Load each claim and build the same prompt the interactive path uses.
+    """
+    result = await db.execute(
+        select(Claim)
+        .options(selectinload(Claim.policy))
+        .where(Claim.id.in_(claim_ids))
+    )
+    claims = []
+    for claim in result.scalars().all():
+        if claim.policy is None:
+            logger.warning(f"Claim {claim.id} has no policy; skipping")
+            continue
+        claims.append({
+            "claim_id": claim.id,
+            "claim_category": claim.type,
+            "user_id": claim.policy.user_id,
+            "policy_number": claim.policy_number,
+            "extracted_fields": claim.extracted_fields or {
+                "claim_amount": float(claim.amount),
+                "claim_type": claim.type,
+                "description": claim.description,
+                "claimant_name": claim.claimant_name
+            },
+        })
+
+    return await build_fraud_requests(claims, db)
+
+
+def _build_batch_jsonl(requests: List[Dict[str, Any]]) -> bytes:
+    """
+    One chat-completion request per line, keyed by claim ID.
+    """
+    lines = []
+    for request in requests:
+        lines.append(orjson.dumps({
+            "custom_id": request["claim_id"],
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": fraud_chat_request(request, BATCH_MODEL)
+        }))
+    return b"\n".join(lines) + b"\n"
+
+
+async def _run_batch_job(requests: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """
+    Upload the requests, wait for the batch job and return {claim_id: analysis}.
+    """
+    client = get_http_client()
+    headers = {"Authorization": f"Bearer {BATCH_API_KEY}"}
+
+    # Step 1: Upload the JSONL input file
+    response = await client.post(
+        f"{BATCH_API_BASE}/files",
+        headers=headers,
+        data={"purpose": "batch"},
+        files={"file": ("fraud_rescore.jsonl", _build_batch_jsonl(requests), "application/jsonl")},
+        timeout=phase_timeouts(120)
+    )
+    response.raise_for_status()
+    input_file_id = response.json()["id"]
+
+    # Step 2: Create the batch job
+    response = await client.post(
+        f"{BATCH_API_BASE}/batches",
+        headers=headers,
+        json={
+            "input_file_id": input_file_id,
+            "endpoint": "/v1/chat/completions",
+            "completion_window": BATCH_COMPLETION_WINDOW
+        },
+        timeout=phase_timeouts(60)
+    )
+    response.raise_for_status()
+    batch = response.json()
+    logger.info(f"Submitted fraud batch {batch['id']} ({len(requests)} claims)")
+
+    # Step 3: Poll until the job reaches a terminal state
+    while batch.get("status") not in _TERMINAL_STATES:
+        await asyncio.sleep(BATCH_POLL_INTERVAL)
+        response = await client.get(f"{BATCH_API_BASE}/batches/{batch['id']}", headers=headers, timeout=phase_timeouts(60))
+        response.raise_for_status()
+        batch = response.json()
+        logger.info(f"Fraud batch {batch['id']} status: {batch.get('status')}")
+
+    if not batch.get("output_file_id"):
+        logger.error(f"Fraud batch {batch['id']} ended as {batch.get('status')} without output")
+        return {}
+
+    # Step 4: Download and parse the results
+    response = await client.get(
+        f"{BATCH_API_BASE}/files/{batch['output_file_id']}/content",
+        headers=headers,
+        timeout=phase_timeouts(120)
+    )
+    response.raise_for_status()
+
+    requests_by_id = {request["claim_id"]: request for request in requests}
+    results = {}
+    for line in response.content.splitlines():
+        if not line.strip():
+            continue
+        entry = orjson.loads(line)
+        claim_id = entry.get("custom_id")
+        try:
+            content = entry["response"]["body"]["choices"][0]["message"]["content"]
+            analysis = parse_fraud_analysis(content)
+        except (KeyError, IndexError, TypeError, ValueError) as e:
+            logger.warning(f"No usable batch result for claim {claim_id}: {e}")
+            continue
+        if analysis.get("fallback") or claim_id not in requests_by_id:
+            continue
+
+        cache_fraud_analysis(BATCH_MODEL, requests_by_id[claim_id], analysis)
+        results[claim_id] = analysis
+
+    return results
+
+
+async def _run_prompt_batches(requests: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """
+    Fallback when the batch API is unavailable: multi-claim prompts, in turn.
+    """
+    results = {}
+    for start in range(0, len(requests), FRAUD_MAX_BATCH):
+        chunk = requests[start:start + FRAUD_MAX_BATCH]
+        try:
+            analyses = await batch_analyze_claim_fraud(chunk)
+        except Exception as e:
+            logger.error(f"Multi-claim fraud analysis failed: {e}")
+            continue
+        for request, analysis in zip(chunk, analyses):
+            if not analysis.get("fallback"):
+                results[request["claim_id"]] = analysis
+    return results
+
+
+async def _apply_analysis(db, request: Dict[str, Any], analysis: Dict[str, Any]):
+    """
+    Write one analysis back to its claim (within the caller's transaction).
+    
+    Only the fraud fields are refreshed; the claim's workflow status is left
+    alone since these claims have usually been decided already.
+    """
+    fraud_score = analysis.get("fraud_score", 50)
+    fraud_decision = analysis.get("decision", "MANUAL_REVIEW")
+
+    await db.execute(
+        update(Claim)
+        .where(Claim.id == request["claim_id"])
+        .values(
+            fraud_score=fraud_score / 100.0,  # Convert to 0.0-1.0
+            fraud_risk_level=analysis.get("risk_level", "MEDIUM"),
+            fraud_decision=fraud_decision,
+            fraud_indicators=analysis.get("fraud_indicators", []),
+            fraud_reasoning=analysis.get("reasoning", ""),
+            extracted_fields=request["extracted_fields"],
+            fraud_analyzed_at=datetime.utcnow(),
+            risk_score=fraud_score,
+            risk_level=get_risk_level(fraud_score),
+        )
+    )
+
+
+async def analyzed_claim_ids() -> List[str]:
+    """
+    IDs of every claim whose fraud analysis has completed (the nightly set).
+    """
+    async with async_session_maker() as db:
+        result = await db.execute(
+            select(Claim.id).where(Claim.fraud_status == FraudStatus.COMPLETED)
+        )
+        return list(result.scalars().all())
+
+
+async def _main(claim_ids: List[str]):
+    try:
+        summary = await rescore_claims(claim_ids or await analyzed_claim_ids())
+    finally:
+        await close_http_client()
+    print(f"Re-scored {summary['updated']} claims; failed: {summary['failed'] or 'none'}")
+
+
+if __name__ == "__main__":
+    import sys
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main(sys.argv[1:]))
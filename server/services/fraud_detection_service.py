@@ -8,18 +8,31 @@ This service:
 4. Returns fraud score, risk level, decision, and reasoning
 """
 
+import asyncio
+import copy
+import functools
 import logging
-import json
 import os
-from typing import Dict, List, Optional, Any
+import time
+from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime, timedelta
+import httpx
+import orjson
 from dotenv import load_dotenv
-import requests
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select, func, case
+from pydantic import BaseModel, ValidationError
 
-from models import Claim, Policy, User
-from services.rag_service import retrieve_for_user
+try:
+    import google.generativeai as genai
+except ImportError:
+    genai = None
+
+from models import Claim, ClaimStatus, Policy, User
+from schemas import ClaimFraudAnalysis, FraudAnalysis, FraudAnalysisBatch
+from services.rag_service import aretrieve_contexts_batch, aretrieve_for_user
+from services import llm_cache
+from services.http_client import stream_openrouter_json
 
 load_dotenv()
 
@@ -29,13 +42,58 @@ logger = logging.getLogger("fraud_detection_service")
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
+OPENROUTER_MODEL = "meta-llama/llama-3.1-8b-instruct:free"
+GEMINI_MODEL = "gemini-pro"
+
+# Structured output is only requested from models known to support it; the
+# others get json_object (OpenRouter) or plain text (Gemini) and are held to
+# the schema by the prompt plus validation and the repair retry.
+_JSON_SCHEMA_MODEL_PREFIXES = ("openai/", "google/gemini")
+_GEMINI_SCHEMA_MODEL_PREFIXES = ("gemini-1.5", "gemini-2")
+
+if genai is not None and GEMINI_API_KEY:
+    genai.configure(api_key=GEMINI_API_KEY)
+
+# Bump when the fraud prompt changes so cached analyses are not reused
+PROMPT_VERSION = "2"
+
+# Output bounds: one analysis is a short JSON object (~300-600 tokens)
+_MAX_ANALYSIS_TOKENS = 1024
+
+# Fraud analyses that queue up while earlier ones are in flight are sent to
+# the LLM as one multi-claim prompt, so throughput is not capped by the
+# provider's requests-per-minute limit. A lone request is sent straight away.
+FRAUD_MAX_BATCH = 4
+_FRAUD_BATCH_WINDOW = 0.2  # seconds, only waited for once a batch has started
+_FRAUD_MAX_INFLIGHT = 8  # batches sent to the LLM at once
+_fraud_queue: Optional[asyncio.Queue] = None
+_fraud_batcher_task: Optional[asyncio.Task] = None
+_fraud_batch_tasks: set = set()  # strong references to running batches
+
+# Short-lived caches for the DB context of a prompt. Entries are
+# (expires_at, value, prompt JSON), so a cache hit also skips re-rendering.
+_POLICY_INFO_TTL = 300  # seconds
+_CLAIM_HISTORY_TTL = 60  # seconds
+_CONTEXT_CACHE_SIZE = 10_000
+_policy_info_cache: Dict[str, Tuple[float, Dict[str, Any], str]] = {}
+_claim_history_cache: Dict[Tuple[str, str], Tuple[float, Dict[str, Any], str]] = {}
+
+# RAG context strings per (category, user, hospital, diagnosis), least
+# recently used evicted first. The TTL bounds staleness after new documents
+# are indexed at runtime.
+_RAG_CONTEXT_TTL = 600  # seconds
+_RAG_CONTEXT_CACHE_SIZE = 1024
+_rag_context_cache: Dict[Tuple[str, str, str, str], Tuple[float, str]] = {}
+
 
 async def analyze_claim_fraud(
     extracted_fields: Dict[str, Any],
     claim_category: str,
     user_id: str,
     policy_number: str,
-    db: AsyncSession
+    db: AsyncSession,
+    claim_history: Optional[Dict[str, Any]] = None,
+    claim_id: Optional[str] = None
 ) -> Dict[str, Any]:
     """
     Analyze claim for fraud using LLM-based approach.
@@ -46,6 +104,8 @@ async def analyze_claim_fraud(
         user_id: User ID for database queries
         policy_number: Policy number
         db: Database session
+        claim_history: Pre-fetched claim history (fetched here if omitted)
+        claim_id: Claim ID used to tag the claim when it is batched with others
         
     Returns:
         Fraud analysis results
@@ -53,31 +113,200 @@ async def analyze_claim_fraud(
     
     logger.info(f"Analyzing fraud for claim category: {claim_category}")
     
-    # Step 1: Get claim history from database
-    claim_history = await _get_claim_history(user_id, claim_category, db)
-    
-    # Step 2: Get policy information from database
-    policy_info = await _get_policy_info(policy_number, db)
-    
-    # Step 3: Get category-specific context from RAG
-    rag_context = await _get_category_context(claim_category, user_id, extracted_fields)
+    # Steps 1-3: claim history + policy info (database) and category context
+    # (RAG) are independent, so the RAG lookup overlaps the DB queries
+    (claim_history_json, policy_info_json), rag_context = await asyncio.gather(
+        _get_db_context(user_id, claim_category, policy_number, db, claim_history),
+        _get_category_context(claim_category, user_id, extracted_fields),
+    )
     
-    # Step 4: Build fraud analysis prompt
-    prompt = _build_fraud_analysis_prompt(
-        extracted_fields=extracted_fields,
-        claim_category=claim_category,
-        claim_history=claim_history,
-        policy_info=policy_info,
-        rag_context=rag_context
+    # Step 4: Build fraud analysis prompt (static instructions go in the
+    # per-category system prompt, the claim data in the user message)
+    request = _fraud_request(
+        claim_id, extracted_fields, claim_category, claim_history_json, policy_info_json, rag_context
     )
     
-    # Step 5: Get LLM fraud analysis
-    fraud_analysis = await _get_llm_fraud_analysis(prompt)
+    # Step 5: Get LLM fraud analysis (micro-batched with concurrent claims)
+    fraud_analysis = await _get_llm_fraud_analysis(
+        request["system_prompt"], request["prompt"], claim=request
+    )
     
     return fraud_analysis
 
 
-async def _get_claim_history(
+async def build_fraud_requests(
+    claims: List[Dict[str, Any]],
+    db: AsyncSession
+) -> List[Dict[str, Any]]:
+    """
+    Build the fraud prompts for several claims, as analyze_claim_fraud does.
+    
+    The RAG context of all claims is fetched with one batched lookup.
+    
+    Args:
+        claims: One dict per claim with claim_id, claim_category, user_id,
+            policy_number and extracted_fields
+        db: Database session
+        
+    Returns:
+        One request per claim with claim_id, extracted_fields,
+        claim_category, claim_history_json, policy_info_json, rag_context,
+        system_prompt and prompt
+    """
+    rag_contexts = await _get_category_contexts([
+        (claim["claim_category"], claim["user_id"], claim["extracted_fields"])
+        for claim in claims
+    ])
+    
+    requests = []
+    for claim, rag_context in zip(claims, rag_contexts):
+        claim_history_json, policy_info_json = await _get_db_context(
+            claim["user_id"], claim["claim_category"], claim["policy_number"], db
+        )
+        requests.append(_fraud_request(
+            claim["claim_id"],
+            claim["extracted_fields"],
+            claim["claim_category"],
+            claim_history_json,
+            policy_info_json,
+            rag_context
+        ))
+    return requests
+
+
+def _fraud_request(
+    claim_id: Optional[str],
+    extracted_fields: Dict[str, Any],
+    claim_category: str,
+    claim_history_json: str,
+    policy_info_json: str,
+    rag_context: str
+) -> Dict[str, Any]:
+    """
+    One claim's prompt components plus its system prompt and user message.
+    """
+    return {
+        "claim_id": claim_id,
+        "extracted_fields": extracted_fields,
+        "claim_category": claim_category,
+        "claim_history_json": claim_history_json,
+        "policy_info_json": policy_info_json,
+        "rag_context": rag_context,
+        "system_prompt": _fraud_system_prompt(claim_category),
+        "prompt": _build_fraud_analysis_prompt(
+            extracted_fields=extracted_fields,
+            claim_category=claim_category,
+            claim_history_json=claim_history_json,
+            policy_info_json=policy_info_json,
+            rag_context=rag_context
+        ),
+    }
+
+
+async def _get_db_context(
+    user_id: str,
+    claim_category: str,
+    policy_number: str,
+    db: AsyncSession,
+    claim_history: Optional[Dict[str, Any]] = None
+) -> Tuple[str, str]:
+    """
+    Get the prompt JSON of the claim history (rendered from claim_history if
+    already fetched) and of the policy info.
+    
+    Both queries use the same session, which does not allow concurrent
+    operations, so they run one after the other.
+    """
+    if claim_history is None:
+        _, claim_history_json = await _claim_history_entry(user_id, claim_category, db)
+    else:
+        claim_history_json = _render_json(claim_history)
+    _, policy_info_json = await _policy_info_entry(policy_number, db)
+    return claim_history_json, policy_info_json
+
+
+def _context_cache_get(cache: Dict, key) -> Optional[Tuple[Dict[str, Any], str]]:
+    """
+    Return a live entry's (value, prompt JSON), dropping it if expired.
+    """
+    entry = cache.get(key)
+    if entry is None:
+        return None
+    if entry[0] < time.monotonic():
+        del cache[key]
+        return None
+    return entry[1], entry[2]
+
+
+def _context_cache_set(cache: Dict, key, value: Dict[str, Any], ttl: float) -> Tuple[Dict[str, Any], str]:
+    """
+    Cache a context value together with its rendered prompt JSON.
+    """
+    if key not in cache and len(cache) >= _CONTEXT_CACHE_SIZE:
+        del cache[next(iter(cache))]
+    rendered = _render_json(value)
+    cache[key] = (time.monotonic() + ttl, value, rendered)
+    return value, rendered
+
+
+async def get_claim_history(
+    user_id: str,
+    claim_category: str,
+    db: AsyncSession
+) -> Dict[str, Any]:
+    """
+    Get user's claim history (cached for _CLAIM_HISTORY_TTL seconds).
+    
+    Public so callers can fetch it ahead of analyze_claim_fraud (e.g. in
+    parallel with OCR) and pass it in as claim_history. The result is a
+    copy, so callers may modify it without affecting the cache.
+    
+    Args:
+        user_id: User whose claims are summarised
+        claim_category: Category counted separately in the summary
+        db: Database session
+        
+    Returns:
+        Claim statistics (counts, amounts, invoice numbers, flags)
+    """
+    claim_history, _ = await _claim_history_entry(user_id, claim_category, db)
+    return copy.deepcopy(claim_history)
+
+
+async def _claim_history_entry(
+    user_id: str,
+    claim_category: str,
+    db: AsyncSession
+) -> Tuple[Dict[str, Any], str]:
+    """
+    Claim history and its prompt JSON, from the cache when live.
+    """
+    key = (user_id, claim_category)
+    entry = _context_cache_get(_claim_history_cache, key)
+    if entry is None:
+        claim_history = await _fetch_claim_history(user_id, claim_category, db)
+        if "error" in claim_history:
+            return claim_history, _render_json(claim_history)
+        entry = _context_cache_set(_claim_history_cache, key, claim_history, _CLAIM_HISTORY_TTL)
+    return entry
+
+
+def invalidate_claim_history(user_id: str):
+    """
+    Drop every cached claim history of a user.
+    
+    Call after a claim is created so duplicate and frequency checks see it
+    straight away. All categories go, since each summary also carries the
+    user's overall totals.
+    
+    Args:
+        user_id: User whose cached history is stale
+    """
+    for key in [key for key in _claim_history_cache if key[0] == user_id]:
+        del _claim_history_cache[key]
+
+
+async def _fetch_claim_history(
     user_id: str,
     claim_category: str,
     db: AsyncSession
@@ -88,53 +317,54 @@ async def _get_claim_history(
     logger.info(f"Fetching claim history for user: {user_id}")
     
     try:
-        # Get all claims for this user
-        result = await db.execute(
-            select(Claim)
+        six_months_ago = datetime.utcnow() - timedelta(days=180)
+        user_claims = (
+            select()
+            .select_from(Claim)
             .join(Policy, Claim.policy_number == Policy.policy_number)
             .where(Policy.user_id == user_id)
-            .order_by(Claim.submission_date.desc())
         )
-        claims = result.scalars().all()
-        
-        # Get category-specific claims
-        category_claims = [c for c in claims if c.type == claim_category]
-        
-        # Calculate statistics
-        total_claims = len(claims)
-        category_claims_count = len(category_claims)
         
-        # Get recent claims (last 6 months)
-        six_months_ago = datetime.utcnow() - timedelta(days=180)
-        recent_claims = [c for c in claims if c.submission_date >= six_months_ago]
+        # All statistics in one aggregate row instead of loading every claim
+        # (same session, so the two queries run one after the other)
+        stats = (await db.execute(
+            user_claims.add_columns(
+                func.count(Claim.id),
+                func.count(case((Claim.type == claim_category, 1))),
+                func.count(case((Claim.submission_date >= six_months_ago, 1))),
+                func.coalesce(func.sum(Claim.amount), 0),
+                func.max(Claim.submission_date),
+                func.count(case((Claim.status == ClaimStatus.REJECTED, 1))),
+                func.count(case((Claim.status == ClaimStatus.FLAGGED, 1))),
+            )
+        )).one()
+        (total_claims, category_claims_count, recent_claims_count,
+         total_claimed, last_claim_date, rejected_count, flagged_count) = stats
         
-        # Calculate total claimed amount
-        total_claimed = sum(float(c.amount) for c in claims)
+        # Check for duplicate invoice numbers (extracted from JSON in SQL)
+        invoice_number = Claim.polymorphic_data["invoice_number"].as_string()
+        result = await db.execute(
+            user_claims.add_columns(invoice_number)
+            .where(invoice_number.is_not(None), invoice_number != "")
+            .order_by(Claim.submission_date.desc())
+        )
+        invoice_numbers = list(result.scalars().all())
         
-        # Get last claim date
-        last_claim_date = claims[0].submission_date if claims else None
         days_since_last_claim = (
             (datetime.utcnow() - last_claim_date).days
             if last_claim_date else None
         )
         
-        # Check for duplicate invoice numbers
-        invoice_numbers = [
-            c.polymorphic_data.get("invoice_number")
-            for c in claims
-            if c.polymorphic_data and c.polymorphic_data.get("invoice_number")
-        ]
-        
         return {
             "total_claims": total_claims,
             "category_claims_count": category_claims_count,
-            "recent_claims_count": len(recent_claims),
-            "total_claimed_amount": total_claimed,
+            "recent_claims_count": recent_claims_count,
+            "total_claimed_amount": float(total_claimed),
             "days_since_last_claim": days_since_last_claim,
             "invoice_numbers": invoice_numbers,
-            "claim_frequency": len(recent_claims) / 6.0,  # Claims per month
-            "has_rejected_claims": any(c.status == "Rejected" for c in claims),
-            "has_flagged_claims": any(c.status == "Flagged" for c in claims)
+            "claim_frequency": recent_claims_count / 6.0,  # Claims per month
+            "has_rejected_claims": rejected_count > 0,
+            "has_flagged_claims": flagged_count > 0
         }
         
     except Exception as e:
@@ -145,7 +375,20 @@ async def _get_claim_history(
         }
 
 
-async def _get_policy_info(policy_number: str, db: AsyncSession) -> Dict[str, Any]:
+async def _policy_info_entry(policy_number: str, db: AsyncSession) -> Tuple[Dict[str, Any], str]:
+    """
+    Policy information and its prompt JSON (cached for _POLICY_INFO_TTL seconds).
+    """
+    entry = _context_cache_get(_policy_info_cache, policy_number)
+    if entry is None:
+        policy_info = await _fetch_policy_info(policy_number, db)
+        if "error" in policy_info:
+            return policy_info, _render_json(policy_info)
+        entry = _context_cache_set(_policy_info_cache, policy_number, policy_info, _POLICY_INFO_TTL)
+    return entry
+
+
+async def _fetch_policy_info(policy_number: str, db: AsyncSession) -> Dict[str, Any]:
     """
     Get policy information from database.
     """
@@ -184,6 +427,119 @@ async def _get_category_context(
     claim_category: str,
     user_id: str,
     extracted_fields: Dict[str, Any]
+) -> str:
+    """
+    Get category-specific RAG context (cached for _RAG_CONTEXT_TTL seconds).
+    
+    Claims for the same hospital and diagnosis recur often, so the joined
+    context string is reused instead of repeating the FAISS search.
+    """
+    key = _rag_context_key(claim_category, user_id, extracted_fields)
+    context = _rag_context_cache_get(key)
+    if context is None:
+        context = await _fetch_category_context(*key)
+        _rag_context_cache_set(key, context)
+    return context
+
+
+async def _get_category_contexts(
+    claims: List[Tuple[str, str, Dict[str, Any]]]
+) -> List[str]:
+    """
+    _get_category_context for several (claim_category, user_id,
+    extracted_fields) triples at once.
+    
+    Cache misses are searched with one batched RAG call, so claims of the
+    same user share a single query-embedding pass.
+    """
+    keys = [_rag_context_key(*claim) for claim in claims]
+    contexts = [_rag_context_cache_get(key) for key in keys]
+    missing = list(dict.fromkeys(key for key, context in zip(keys, contexts) if context is None))
+    if not missing:
+        return contexts
+    
+    logger.info(f"Fetching RAG context for {len(missing)} claims in one batch")
+    
+    try:
+        rag_results = await aretrieve_contexts_batch(
+            [_category_query(*key) for key in missing],
+            [{"user_id": key[1]} for key in missing],
+            n_results=5
+        )
+        fetched = {key: _format_category_context(result) for key, result in zip(missing, rag_results)}
+    except Exception as e:
+        logger.error(f"Failed to fetch RAG context: {e}")
+        fetched = {key: f"Error retrieving context: {str(e)}" for key in missing}
+    
+    for key, context in fetched.items():
+        _rag_context_cache_set(key, context)
+    return [context if context is not None else fetched[key] for key, context in zip(keys, contexts)]
+
+
+def _rag_context_key(
+    claim_category: str,
+    user_id: str,
+    extracted_fields: Dict[str, Any]
+) -> Tuple[str, str, str, str]:
+    """
+    Cache key of a claim's RAG context, in _fetch_category_context order.
+    """
+    return (
+        claim_category,
+        user_id,
+        extracted_fields.get("hospital_name", ""),
+        extracted_fields.get("diagnosis", "")
+    )
+
+
+def _rag_context_cache_get(key: Tuple[str, str, str, str]) -> Optional[str]:
+    """
+    Return a live RAG context, marking it most recently used.
+    """
+    entry = _rag_context_cache.pop(key, None)
+    if entry is None or entry[0] < time.monotonic():
+        return None
+    _rag_context_cache[key] = entry  # re-insert as most recently used
+    return entry[1]
+
+
+def _rag_context_cache_set(key: Tuple[str, str, str, str], context: str):
+    """
+    Cache a RAG context unless the lookup failed.
+    """
+    if context.startswith("Error retrieving context"):
+        return
+    if len(_rag_context_cache) >= _RAG_CONTEXT_CACHE_SIZE:
+        del _rag_context_cache[next(iter(_rag_context_cache))]
+    _rag_context_cache[key] = (time.monotonic() + _RAG_CONTEXT_TTL, context)
+
+
+def _category_query(claim_category: str, user_id: str, hospital_name: str, diagnosis: str) -> str:
+    """
+    RAG query text for a claim.
+    """
+    return f"{claim_category} insurance claim for {diagnosis} treatment at {hospital_name}"
+
+
+def _format_category_context(rag_results: Dict[str, Any]) -> str:
+    """
+    Join retrieved chunks into the prompt's context block.
+    """
+    context_parts = []
+    # Fix: rag_service returns "chunks", not "results"
+    for chunk in rag_results.get("chunks", []):
+        text = chunk.get("text", "")
+        source = chunk.get("metadata", {}).get("source", "Unknown")
+        context_parts.append(f"[Source: {source}]\n{text}")
+    
+    return "\n\n".join(context_parts) if context_parts else "No relevant context found"
+
+
+async def _fetch_category_context(
+    claim_category: str,
+    user_id: str,
+    hospital_name: str,
+    diagnosis: str
 ) -> str:
     """
     Get category-specific context from RAG (FAISS).
@@ -196,66 +552,67 @@ async def _get_category_context(
     logger.info(f"Fetching RAG context for category: {claim_category}")
     
     try:
-        # Build query based on extracted fields
-        hospital_name = extracted_fields.get("hospital_name", "")
-        diagnosis = extracted_fields.get("diagnosis", "")
-        treatment = extracted_fields.get("treatment_type", "")
-        
         # Query for category-specific information
-        query = f"{claim_category} insurance claim for {diagnosis} treatment at {hospital_name}"
+        query = _category_query(claim_category, user_id, hospital_name, diagnosis)
         
-        # Retrieve context from RAG
-        rag_results = retrieve_for_user(
+        # Retrieve context from RAG (FAISS search runs off the event loop)
+        rag_results = await aretrieve_for_user(
             query=query,
             user_id=user_id,
             n_results=5
         )
         
-        # Format context
-        context_parts = []
-        # Fix: rag_service returns "chunks", not "results"
-        for chunk in rag_results.get("chunks", []):
-            text = chunk.get("text", "")
-            source = chunk.get("metadata", {}).get("source", "Unknown")
-            context_parts.append(f"[Source: {source}]\n{text}")
-        
-        return "\n\n".join(context_parts) if context_parts else "No relevant context found"
+        return _format_category_context(rag_results)
         
     except Exception as e:
         logger.error(f"Failed to fetch RAG context: {e}")
         return f"Error retrieving context: {str(e)}"
 
 
-def _build_fraud_analysis_prompt(
+def _render_json(value: Any) -> str:
+    """
+    Pretty-print a value for the prompt.
+    """
+    return orjson.dumps(value, default=str, option=orjson.OPT_INDENT_2).decode()
+
+
+def _build_claim_sections(
     extracted_fields: Dict[str, Any],
     claim_category: str,
-    claim_history: Dict[str, Any],
-    policy_info: Dict[str, Any],
+    claim_history_json: str,
+    policy_info_json: str,
     rag_context: str
 ) -> str:
     """
-    Build comprehensive fraud analysis prompt for LLM.
-    """
+    Build the claim / policy / history / RAG sections for one claim.
     
-    prompt = f"""You are an expert insurance fraud investigator with 20+ years of experience. Analyze this {claim_category} insurance claim for fraud risk.
-
-=== CLAIM INFORMATION ===
-Category: {claim_category}
+    Policy info and claim history arrive as prompt JSON, pre-rendered when
+    they came from the context caches.
+    """
+    return f"""Category: {claim_category}
 Extracted Fields:
-{json.dumps(extracted_fields, indent=2)}
+{_render_json(extracted_fields)}
 
 === POLICY INFORMATION ===
-{json.dumps(policy_info, indent=2)}
+{policy_info_json}
 
 === CLAIM HISTORY ===
-{json.dumps(claim_history, indent=2)}
+{claim_history_json}
 
 === RELEVANT POLICY RULES & HOSPITAL INFORMATION ===
-{rag_context}
+{rag_context}"""
+
+
+def _category_checks(claim_category: str) -> str:
+    """
+    Category-specific lines of the fraud checklist.
+    """
+    return f"""   {"- Pre-existing condition claims within waiting period" if claim_category == "Health" else ""}
+   {"- Accident location and police report consistency" if claim_category == "Vehicle" else ""}
+   {"- Cause of death and policy terms alignment" if claim_category == "Life" else ""}"""
 
-=== FRAUD INDICATORS TO CHECK ===
 
-1. **Claim Amount Analysis**
+_FRAUD_INDICATOR_CHECKLIST = """1. **Claim Amount Analysis**
    - Is claim amount reasonable for the treatment?
    - Does it exceed policy coverage?
    - Is it suspiciously round (e.g., exactly 100,000)?
@@ -285,17 +642,9 @@ Extracted Fields:
    - Previous rejected/flagged claims?
    - Escalating claim amounts?
 
-7. **Category-Specific Checks**
-   {"- Pre-existing condition claims within waiting period" if claim_category == "Health" else ""}
-   {"- Accident location and police report consistency" if claim_category == "Vehicle" else ""}
-   {"- Cause of death and policy terms alignment" if claim_category == "Life" else ""}
-
-=== YOUR TASK ===
-
-Provide a comprehensive fraud analysis in JSON format:
+"""
 
-{{
-    "fraud_score": <0-100 integer>,
+_ANALYSIS_JSON_FIELDS = """    "fraud_score": <0-100 integer>,
     "risk_level": "<LOW|MEDIUM|HIGH>",
     "decision": "<AUTO_APPROVE|MANUAL_REVIEW|FRAUD_ALERT>",
     "fraud_indicators": [
@@ -305,107 +654,539 @@ Provide a comprehensive fraud analysis in JSON format:
     ],
     "reasoning": "Detailed explanation of your analysis and decision",
     "red_flags_count": <number of red flags found>,
-    "confidence": "<LOW|MEDIUM|HIGH>"
+    "confidence": "<LOW|MEDIUM|HIGH>\""""
+
+_DECISION_CRITERIA = """- fraud_score 0-39: LOW risk → AUTO_APPROVE
+- fraud_score 40-69: MEDIUM risk → MANUAL_REVIEW  
+- fraud_score 70-100: HIGH risk → FRAUD_ALERT"""
+
+
+@functools.lru_cache(maxsize=8)
+def _fraud_system_prompt(claim_category: str) -> str:
+    """
+    Static fraud-analysis instructions for one claim category.
+    
+    Identical across calls for the same category, so providers can reuse
+    the cached prefix (and it is only formatted once per category here).
+    """
+    return f"""You are an expert insurance fraud investigator with 20+ years of experience. Analyze the {claim_category} insurance claim in the user message for fraud risk.
+
+=== FRAUD INDICATORS TO CHECK ===
+
+{_FRAUD_INDICATOR_CHECKLIST}7. **Category-Specific Checks**
+{_category_checks(claim_category)}
+
+=== YOUR TASK ===
+
+Provide a comprehensive fraud analysis in JSON format:
+
+{{
+{_ANALYSIS_JSON_FIELDS}
 }}
 
 === DECISION CRITERIA ===
-- fraud_score 0-39: LOW risk → AUTO_APPROVE
-- fraud_score 40-69: MEDIUM risk → MANUAL_REVIEW  
-- fraud_score 70-100: HIGH risk → FRAUD_ALERT
+{_DECISION_CRITERIA}
 
-Be thorough, objective, and specific. Cite exact numbers and facts.
+Be thorough, objective, and specific. Cite exact numbers and facts. Respond with the JSON object only."""
 
-JSON OUTPUT:
-"""
+
+@functools.lru_cache(maxsize=1)
+def _batch_fraud_system_prompt() -> str:
+    """
+    Static instructions for multi-claim fraud analysis.
+    """
+    category_checks = "\n".join(
+        _category_checks(category) for category in ("Health", "Vehicle", "Life")
+    )
+    
+    return f"""You are an expert insurance fraud investigator with 20+ years of experience. Analyze each insurance claim in the user message for fraud risk. Treat every claim independently; information about one claim must not influence another.
+
+=== FRAUD INDICATORS TO CHECK (FOR EACH CLAIM) ===
+
+{_FRAUD_INDICATOR_CHECKLIST}7. **Category-Specific Checks** (apply those matching the claim's category)
+{category_checks}
+
+=== YOUR TASK ===
+
+Provide a comprehensive fraud analysis for every claim in JSON format, one entry per claim, using the claim_id given in the claim block:
+
+{{
+  "results": [
+    {{
+    "claim_id": "<claim_id>",
+{_ANALYSIS_JSON_FIELDS}
+    }},
+    ...
+  ]
+}}
+
+=== DECISION CRITERIA ===
+{_DECISION_CRITERIA}
+
+Be thorough, objective, and specific. Cite exact numbers and facts. Respond with the JSON object only."""
+
+
+def _build_fraud_analysis_prompt(
+    extracted_fields: Dict[str, Any],
+    claim_category: str,
+    claim_history_json: str,
+    policy_info_json: str,
+    rag_context: str
+) -> str:
+    """
+    Build the user message (claim data only) for fraud analysis.
+    """
+    
+    claim_sections = _build_claim_sections(
+        extracted_fields, claim_category, claim_history_json, policy_info_json, rag_context
+    )
+    
+    return f"""=== CLAIM INFORMATION ===
+{claim_sections}"""
+
+
+def _build_batch_fraud_analysis_prompt(claims: List[Dict[str, Any]]) -> str:
+    """
+    Build the user message for a multi-claim analysis, one block per claim
+    tagged with its claim_id.
+    """
+    
+    claim_blocks = []
+    for n, claim in enumerate(claims, start=1):
+        claim_sections = _build_claim_sections(
+            claim["extracted_fields"],
+            claim["claim_category"],
+            claim["claim_history_json"],
+            claim["policy_info_json"],
+            claim["rag_context"]
+        )
+        claim_blocks.append(
+            f"=== CLAIM {n} ===\nclaim_id: {claim['claim_id']}\n{claim_sections}"
+        )
     
-    return prompt
+    return "\n\n".join(claim_blocks)
+
+
+def _get_llm_provider() -> Optional[tuple]:
+    """
+    Return (model, completion function) for the configured LLM, or None.
+    """
+    if OPENROUTER_API_KEY:
+        return OPENROUTER_MODEL, _complete_with_openrouter
+    if GEMINI_API_KEY and genai is not None:
+        return GEMINI_MODEL, _complete_with_gemini
+    return None
+
+
+def _analysis_cache_key(model: str, system_prompt: str, prompt: str) -> str:
+    """
+    Cache key for one claim's analysis (system prompt + user message).
+    """
+    return llm_cache.make_key(model, PROMPT_VERSION, f"{system_prompt}\n\n{prompt}")
+
 
+def cache_fraud_analysis(model: str, request: Dict[str, Any], analysis: Dict[str, Any]):
+    """
+    Store an analysis obtained outside analyze_claim_fraud (e.g. from a bulk
+    batch job) so re-analyzing the unchanged claim reuses it.
+    """
+    llm_cache.set(
+        _analysis_cache_key(model, request["system_prompt"], request["prompt"]),
+        analysis,
+        model=model
+    )
 
-async def _get_llm_fraud_analysis(prompt: str) -> Dict[str, Any]:
+
+async def _get_llm_fraud_analysis(
+    system_prompt: str,
+    prompt: str,
+    claim: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
     """
     Get fraud analysis from LLM.
+    
+    Results are cached by system prompt + user message (which embeds the
+    extracted fields, policy info and history), so re-analyzing an unchanged
+    claim skips the LLM.
+    When the claim's prompt components are given, the call goes through the
+    batching queue and may share one LLM request with other claims.
     """
+    provider = _get_llm_provider()
+    if provider is None:
+        logger.error("No API keys configured for fraud analysis")
+        return _fallback_analysis()
+    model = provider[0]
+    
+    cache_key = _analysis_cache_key(model, system_prompt, prompt)
+    cached = llm_cache.get(cache_key)
+    if cached is not None:
+        return cached
     
     try:
-        if OPENROUTER_API_KEY:
-            return await _analyze_with_openrouter(prompt)
-        elif GEMINI_API_KEY:
-            return await _analyze_with_gemini(prompt)
+        if claim is None:
+            analysis = await _analyze_single(system_prompt, prompt)
         else:
-            logger.error("No API keys configured for fraud analysis")
-            return _fallback_analysis()
+            analysis = await _submit_fraud_analysis(claim)
     except Exception as e:
         logger.error(f"LLM fraud analysis failed: {e}")
         return _fallback_analysis()
+    
+    if not analysis.get("fallback"):
+        llm_cache.set(cache_key, analysis, model=model)
+    return analysis
 
 
-async def _analyze_with_openrouter(prompt: str) -> Dict[str, Any]:
+async def _analyze_single(system_prompt: str, prompt: str) -> Dict[str, Any]:
     """
-    Analyze fraud using OpenRouter API.
+    Analyze one claim prompt with the configured LLM.
+    
+    Output is schema-constrained where the model supports it; if it still fails
+    validation, the model gets one retry with the validation error.
     """
-    logger.info("Analyzing fraud using OpenRouter")
+    _, complete = _get_llm_provider()
+    content = await complete(system_prompt, prompt, FraudAnalysis)
+    try:
+        return parse_fraud_analysis(content)
+    except ValidationError as e:
+        logger.warning(f"Fraud analysis failed validation, retrying: {e.error_count()} error(s)")
+        error = e
     
-    url = "https://openrouter.ai/api/v1/chat/completions"
-    headers = {
-        "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-        "Content-Type": "application/json"
+    retry_prompt = f"""{prompt}
+
+Your previous answer was:
+{content}
+
+It did not match the required JSON schema:
+{error}
+
+Return the corrected JSON object only.
+"""
+    content = await complete(system_prompt, retry_prompt, FraudAnalysis)
+    try:
+        return parse_fraud_analysis(content)
+    except ValidationError as e:
+        logger.error(f"Fraud analysis failed validation after retry: {e}")
+        logger.error(f"Content: {content[:500]}")
+        return _fallback_analysis()
+
+
+async def batch_analyze_claim_fraud(claims: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Analyze several claims with a single LLM request.
+    
+    Args:
+        claims: One request per claim as built by build_fraud_requests
+            (claim_id, extracted_fields, claim_category, claim_history_json,
+            policy_info_json and rag_context)
+            
+    Returns:
+        Fraud analysis results, in the same order as claims
+    """
+    provider = _get_llm_provider()
+    if provider is None:
+        logger.error("No API keys configured for fraud analysis")
+        return [_fallback_analysis() for _ in claims]
+    model, complete = provider
+    
+    # The model echoes claim_id back; fall back to positional tags when the
+    # caller's IDs are missing or not unique within the batch
+    claim_ids = [claim.get("claim_id") for claim in claims]
+    if None in claim_ids or len(set(claim_ids)) != len(claim_ids):
+        claim_ids = [f"claim-{n}" for n in range(1, len(claims) + 1)]
+    tagged = [dict(claim, claim_id=claim_id) for claim, claim_id in zip(claims, claim_ids)]
+    
+    logger.info(f"Analyzing fraud for {len(claims)} claims in one request")
+    prompt = _build_batch_fraud_analysis_prompt(tagged)
+    content = await complete(
+        _batch_fraud_system_prompt(),
+        prompt,
+        FraudAnalysisBatch,
+        max_tokens=_MAX_ANALYSIS_TOKENS * len(claims)
+    )
+    results = _parse_batch_fraud_json(content)
+    
+    missing = [claim_id for claim_id in claim_ids if claim_id not in results]
+    if missing:
+        logger.warning(f"Batched fraud analysis returned no result for {missing}")
+    return [results.get(claim_id) or _fallback_analysis() for claim_id in claim_ids]
+
+
+async def _fraud_batcher(queue: asyncio.Queue):
+    """
+    Drain queued fraud analyses in small batches, each run as its own task.
+    
+    The window is only waited for when other analyses are already queued;
+    while _FRAUD_MAX_INFLIGHT batches are running, new claims accumulate in
+    the queue and go out together once a slot frees up.
+    """
+    loop = asyncio.get_running_loop()
+    slots = asyncio.Semaphore(_FRAUD_MAX_INFLIGHT)
+    while True:
+        items = [await queue.get()]
+        while len(items) < FRAUD_MAX_BATCH and not queue.empty():
+            items.append(queue.get_nowait())
+        if 1 < len(items) < FRAUD_MAX_BATCH:
+            try:
+                while len(items) < FRAUD_MAX_BATCH:
+                    items.append(await asyncio.wait_for(queue.get(), timeout=_FRAUD_BATCH_WINDOW))
+            except asyncio.TimeoutError:
+                pass
+        
+        await slots.acquire()
+        task = loop.create_task(_run_fraud_batch(items, slots))
+        _fraud_batch_tasks.add(task)
+        task.add_done_callback(_fraud_batch_tasks.discard)
+
+
+async def _run_fraud_batch(items: List[Tuple[Dict[str, Any], asyncio.Future]], slots: asyncio.Semaphore):
+    """Analyze one drained batch and resolve its futures."""
+    try:
+        try:
+            if len(items) == 1:
+                claim = items[0][0]
+                results = [await _analyze_single(claim["system_prompt"], claim["prompt"])]
+            else:
+                results = await batch_analyze_claim_fraud([claim for claim, _ in items])
+        except Exception as e:
+            results = [e] * len(items)
+        
+        # Claims the batch could not answer are retried on their own
+        if len(items) > 1:
+            retry = [
+                n for n, result in enumerate(results)
+                if isinstance(result, Exception) or result.get("fallback")
+            ]
+            retried = await asyncio.gather(
+                *(_analyze_single(items[n][0]["system_prompt"], items[n][0]["prompt"]) for n in retry),
+                return_exceptions=True
+            )
+            for n, result in zip(retry, retried):
+                results[n] = result
+    except asyncio.CancelledError:
+        # Don't leave the callers waiting forever
+        for _, future in items:
+            future.cancel()
+        raise
+    finally:
+        slots.release()
+    
+    for (_, future), result in zip(items, results):
+        if future.done():
+            continue
+        if isinstance(result, Exception):
+            future.set_exception(result)
+        else:
+            future.set_result(result)
+
+
+async def _submit_fraud_analysis(claim: Dict[str, Any]) -> Dict[str, Any]:
+    """Analyze one claim through the shared batching queue."""
+    global _fraud_queue, _fraud_batcher_task
+    
+    loop = asyncio.get_running_loop()
+    if _fraud_batcher_task is None or _fraud_batcher_task.get_loop() is not loop:
+        # Queues are bound to their event loop; only a new loop gets a new one
+        _fraud_queue = asyncio.Queue()
+        _fraud_batcher_task = None
+    if _fraud_batcher_task is None or _fraud_batcher_task.done():
+        # Restart the batcher on the existing queue so queued claims are kept
+        _fraud_batcher_task = loop.create_task(_fraud_batcher(_fraud_queue))
+    
+    future = loop.create_future()
+    await _fraud_queue.put((claim, future))
+    return await future
+
+
+def _json_schema_format(schema: type[BaseModel]) -> Dict[str, Any]:
+    """
+    OpenAI-style response_format that constrains output to the schema.
+    """
+    json_schema = schema.model_json_schema()
+    # Strict mode needs closed objects; parsing itself ignores extra keys
+    for definition in (json_schema, *json_schema.get("$defs", {}).values()):
+        if definition.get("type") == "object":
+            definition["additionalProperties"] = False
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": "fraud_analysis",
+            "strict": True,
+            "schema": json_schema
+        }
     }
+
+
+def _response_format(schema: type[BaseModel], model: str) -> Dict[str, Any]:
+    """
+    response_format for an OpenAI-style model: a strict schema where
+    supported, plain JSON mode otherwise.
+    """
+    if model.startswith(_JSON_SCHEMA_MODEL_PREFIXES):
+        return _json_schema_format(schema)
+    return {"type": "json_object"}
+
+
+def fraud_chat_request(request: Dict[str, Any], model: str = OPENROUTER_MODEL) -> Dict[str, Any]:
+    """
+    OpenAI-style chat-completion body for one claim's fraud prompt.
     
-    payload = {
-        "model": "meta-llama/llama-3.1-8b-instruct:free",
+    Args:
+        request: A request from build_fraud_requests
+        model: Model the body is addressed to
+    """
+    return _chat_body(model, request["system_prompt"], request["prompt"], FraudAnalysis, _MAX_ANALYSIS_TOKENS)
+
+
+def _chat_body(
+    model: str,
+    system_prompt: str,
+    prompt: str,
+    schema: type[BaseModel],
+    max_tokens: int
+) -> Dict[str, Any]:
+    """
+    Chat-completion body with the system prompt, user message and JSON
+    output format.
+    """
+    return {
+        "model": model,
         "messages": [
+            {
+                "role": "system",
+                "content": system_prompt
+            },
             {
                 "role": "user",
                 "content": prompt
             }
         ],
         "temperature": 0.2,
-        "max_tokens": 3000
+        "max_tokens": max_tokens,
+        "response_format": _response_format(schema, model)
+    }
+
+
+async def _complete_with_openrouter(
+    system_prompt: str,
+    prompt: str,
+    schema: type[BaseModel] = FraudAnalysis,
+    max_tokens: int = _MAX_ANALYSIS_TOKENS
+) -> str:
+    """
+    Run a fraud prompt through the OpenRouter API and return the raw JSON text.
+    """
+    logger.info("Analyzing fraud using OpenRouter")
+    
+    url = "https://openrouter.ai/api/v1/chat/completions"
+    headers = {
+        "Authorization": f"Bearer {OPENROUTER_API_KEY}",
+        "Content-Type": "application/json"
     }
     
-    response = requests.post(url, headers=headers, json=payload, timeout=60)
-    response.raise_for_status()
+    payload = _chat_body(OPENROUTER_MODEL, system_prompt, prompt, schema, max_tokens)
     
-    result = response.json()
-    content = result["choices"][0]["message"]["content"]
+    # Streamed: the connection is dropped as soon as the JSON object closes
+    try:
+        return await stream_openrouter_json(url, headers, payload, timeout=60)
+    except httpx.HTTPStatusError as e:
+        # No provider on the route accepts the schema; retry in JSON mode
+        if e.response.status_code != 404 or payload["response_format"]["type"] == "json_object":
+            raise
+        logger.warning(f"No OpenRouter provider for json_schema on {OPENROUTER_MODEL}, retrying with json_object")
+        payload["response_format"] = {"type": "json_object"}
+        return await stream_openrouter_json(url, headers, payload, timeout=60)
+
+
+@functools.lru_cache(maxsize=1)
+def _get_gemini_model():
+    """
+    Return the Gemini model, created once.
     
-    # Parse JSON from response
-    return _parse_fraud_json(content)
+    gemini-pro does not accept system_instruction, so callers send the
+    system prompt as the first part of the contents instead.
+    """
+    if genai is None:
+        raise RuntimeError("google-generativeai is not installed; cannot use Gemini")
+    return genai.GenerativeModel(GEMINI_MODEL)
 
 
-async def _analyze_with_gemini(prompt: str) -> Dict[str, Any]:
+async def _complete_with_gemini(
+    system_prompt: str,
+    prompt: str,
+    schema: type[BaseModel] = FraudAnalysis,
+    max_tokens: int = _MAX_ANALYSIS_TOKENS
+) -> str:
     """
-    Analyze fraud using Google Gemini API.
+    Run a fraud prompt through the Google Gemini API and return the raw JSON text.
     """
     logger.info("Analyzing fraud using Gemini")
     
     try:
-        import google.generativeai as genai
+        model = _get_gemini_model()
         
-        genai.configure(api_key=GEMINI_API_KEY)
-        model = genai.GenerativeModel('gemini-pro')
+        generation_config = {
+            "temperature": 0.2,
+            "max_output_tokens": max_tokens
+        }
+        if GEMINI_MODEL.startswith(_GEMINI_SCHEMA_MODEL_PREFIXES):
+            generation_config["response_mime_type"] = "application/json"
+            generation_config["response_schema"] = schema
         
-        response = model.generate_content(
-            prompt,
-            generation_config={
-                "temperature": 0.2,
-                "max_output_tokens": 3000
-            }
+        response = await model.generate_content_async(
+            [system_prompt, prompt],
+            generation_config=generation_config
         )
         
-        content = response.text
-        return _parse_fraud_json(content)
+        return response.text
         
     except Exception as e:
         logger.error(f"Gemini fraud analysis failed: {e}")
         raise
 
 
-def _parse_fraud_json(content: str) -> Dict[str, Any]:
+def parse_fraud_analysis(content: str) -> Dict[str, Any]:
     """
-    Parse JSON from LLM fraud analysis response.
+    Validate an LLM fraud analysis response against the FraudAnalysis schema.
+    
+    Markdown code fences and extra keys are tolerated, since only some
+    models are constrained by the schema.
+    
+    Raises:
+        ValidationError: if the content is not valid JSON or does not match
+    """
+    return FraudAnalysis.model_validate_json(_strip_code_fences(content)).model_dump()
+
+
+def _parse_batch_fraud_json(content: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Parse a multi-claim response into {claim_id: analysis}.
+    
+    Entries that do not match the schema are skipped so the caller can
+    retry just those claims.
+    """
+    try:
+        results = orjson.loads(_strip_code_fences(content)).get("results", [])
+    except (orjson.JSONDecodeError, AttributeError) as e:
+        logger.error(f"Failed to parse batched fraud analysis JSON: {e}")
+        logger.error(f"Content: {content[:500]}")
+        return {}
+    
+    analyses = {}
+    for entry in results:
+        try:
+            analysis = ClaimFraudAnalysis.model_validate(entry).model_dump()
+        except ValidationError as e:
+            logger.warning(f"Skipping malformed batched fraud analysis: {e.error_count()} error(s)")
+            continue
+        analyses[analysis.pop("claim_id")] = analysis
+    
+    return analyses
+
+
+def _strip_code_fences(content: str) -> str:
+    """
+    Remove markdown code blocks around an LLM JSON response.
     """
-    # Remove markdown code blocks if present
     content = content.strip()
     if content.startswith("```json"):
         content = content[7:]
@@ -413,28 +1194,7 @@ def _parse_fraud_json(content: str) -> Dict[str, Any]:
         content = content[3:]
     if content.endswith("```"):
         content = content[:-3]
-    
-    content = content.strip()
-    
-    try:
-        analysis = json.loads(content)
-        
-        # Validate required fields
-        required_fields = ["fraud_score", "risk_level", "decision", "reasoning"]
-        for field in required_fields:
-            if field not in analysis:
-                raise ValueError(f"Missing required field: {field}")
-        
-        # Ensure fraud_indicators is a list
-        if "fraud_indicators" not in analysis:
-            analysis["fraud_indicators"] = []
-        
-        return analysis
-        
-    except json.JSONDecodeError as e:
-        logger.error(f"Failed to parse fraud analysis JSON: {e}")
-        logger.error(f"Content: {content[:500]}")
-        return _fallback_analysis()
+    return content.strip()
 
 
 def _fallback_analysis() -> Dict[str, Any]:
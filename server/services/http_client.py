@@ -0,0 +1,235 @@
+"""
+Shared async HTTP client.
+
+One pooled httpx.AsyncClient is reused by the LLM helpers (OpenRouter) so
+calls never block the event loop and TCP/TLS connections are kept alive
+between requests. Opened and closed from the FastAPI lifespan.
+
+Timeouts are split per phase (a short connect timeout, so an unreachable
+host fails fast) and each call also gets an overall deadline covering the
+whole exchange, including a streamed body.
+
+OpenRouter calls go through post_openrouter / stream_openrouter_json,
+which bound concurrency, pace requests to the configured requests-per-minute
+budget and retry 429 responses with backoff, so bursts queue instead of
+failing.
+"""
+
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Dict, Optional
+
+import httpx
+import orjson
+
+from core.config import settings
+
+logger = logging.getLogger("http_client")
+
+_client: Optional[httpx.AsyncClient] = None
+
+_CONNECT_TIMEOUT = 5.0  # seconds
+_DEFAULT_TIMEOUT = 60.0  # seconds, overall per request
+_KEEPALIVE_EXPIRY = 60.0  # seconds an idle pooled connection is kept
+
+_RATE_LIMIT_ATTEMPTS = 3
+_RATE_LIMIT_BASE_DELAY = 1.0  # seconds, doubled per attempt
+
+
+class AsyncRateLimiter:
+    """Token bucket allowing max_rate acquisitions per time_period seconds."""
+    
+    def __init__(self, max_rate: float, time_period: float = 60):
+        self.max_rate = max_rate
+        self._rate = max_rate / time_period
+        self._tokens = float(max_rate)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    async def acquire(self):
+        """Wait until a request may be sent."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.max_rate, self._tokens + (now - self._updated) * self._rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self._rate)
+
+
+_openrouter_sem = asyncio.Semaphore(settings.OPENROUTER_MAX_CONCURRENCY)
+_openrouter_limiter = AsyncRateLimiter(settings.OPENROUTER_RPM, 60)
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared AsyncClient, creating it on first use."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=100, keepalive_expiry=_KEEPALIVE_EXPIRY),
+            timeout=phase_timeouts(_DEFAULT_TIMEOUT),
+        )
+    return _client
+
+
+def phase_timeouts(total: float) -> httpx.Timeout:
+    """Per-phase timeouts for a request with the given overall deadline."""
+    return httpx.Timeout(total, connect=min(_CONNECT_TIMEOUT, total))
+
+
+async def post_openrouter(
+    url: str,
+    headers: Dict[str, str],
+    payload: Dict[str, Any],
+    timeout: float
+) -> httpx.Response:
+    """
+    POST to OpenRouter within the shared concurrency and rate limits.
+    
+    timeout is the overall deadline (seconds) for each attempt; waiting for
+    the rate limiter does not count against it.
+    
+    429 responses are retried (honouring Retry-After, otherwise exponential
+    backoff with jitter); the last response is returned either way so the
+    caller's raise_for_status still applies.
+    """
+    for attempt in range(_RATE_LIMIT_ATTEMPTS):
+        async with _openrouter_sem:
+            await _openrouter_limiter.acquire()
+            response = await asyncio.wait_for(
+                get_http_client().post(
+                    url, headers=headers, json=payload, timeout=phase_timeouts(timeout)
+                ),
+                timeout,
+            )
+        
+        if response.status_code != 429 or attempt == _RATE_LIMIT_ATTEMPTS - 1:
+            return response
+        await _backoff(attempt, response)
+    
+    return response
+
+
+async def stream_openrouter_json(
+    url: str,
+    headers: Dict[str, str],
+    payload: Dict[str, Any],
+    timeout: float
+) -> str:
+    """
+    Stream a chat completion and return its content as soon as the
+    top-level JSON object in it is complete.
+    
+    The connection is closed at that point, so trailing output (prose after
+    the object, whitespace up to max_tokens) is never generated or read.
+    If the stream ends without a complete object, all content is returned.
+    Same limits and 429 handling as post_openrouter.
+    """
+    for attempt in range(_RATE_LIMIT_ATTEMPTS):
+        async with _openrouter_sem:
+            await _openrouter_limiter.acquire()
+            response, content = await asyncio.wait_for(
+                _stream_attempt(url, headers, payload, timeout, attempt == _RATE_LIMIT_ATTEMPTS - 1),
+                timeout,
+            )
+            if content is not None:
+                return content
+        await _backoff(attempt, response)
+
+
+async def _stream_attempt(
+    url: str,
+    headers: Dict[str, str],
+    payload: Dict[str, Any],
+    timeout: float,
+    last_attempt: bool
+):
+    """
+    One streamed request. Returns (response, content); content is None when
+    the response was a 429 that should be retried.
+    """
+    async with get_http_client().stream(
+        "POST", url, headers=headers, json={**payload, "stream": True},
+        timeout=phase_timeouts(timeout)
+    ) as response:
+        if response.status_code == 429 and not last_attempt:
+            return response, None
+        response.raise_for_status()
+        return response, await _read_json_stream(response)
+
+
+async def _read_json_stream(response: httpx.Response) -> str:
+    """
+    Accumulate SSE content deltas until the first JSON object closes.
+    
+    If the balanced text does not parse (e.g. a brace in leading prose),
+    early exit is abandoned and the whole content is read.
+    """
+    content = []
+    depth = 0
+    in_string = escaped = False
+    scanning = True
+    object_start = 0
+    length = 0  # characters in content so far
+    
+    async for line in response.aiter_lines():
+        # SSE comments (": OPENROUTER PROCESSING") and blank separators
+        if not line.startswith("data:"):
+            continue
+        data = line[5:].strip()
+        if data == "[DONE]":
+            break
+        delta = orjson.loads(data)["choices"][0].get("delta", {}).get("content") or ""
+        
+        for offset, char in enumerate(delta if scanning else ""):
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif char == "\\":
+                    escaped = True
+                elif char == '"':
+                    in_string = False
+            elif char == '"' and depth:
+                in_string = True
+            elif char == "{":
+                if depth == 0:
+                    object_start = length + offset
+                depth += 1
+            elif char == "}" and depth > 0:
+                depth -= 1
+                if depth == 0:
+                    text = ("".join(content) + delta[:offset + 1])[object_start:]
+                    try:
+                        orjson.loads(text)
+                        return text
+                    except orjson.JSONDecodeError:
+                        scanning = False
+                        break
+        content.append(delta)
+        length += len(delta)
+    
+    return "".join(content)
+
+
+async def _backoff(attempt: int, response: httpx.Response):
+    """Sleep before retrying a 429 (Retry-After, else exponential + jitter)."""
+    try:
+        delay = float(response.headers["Retry-After"])
+    except (KeyError, ValueError):
+        delay = _RATE_LIMIT_BASE_DELAY * 2 ** attempt
+    delay += random.uniform(0, _RATE_LIMIT_BASE_DELAY)
+    logger.warning(f"OpenRouter rate limited; retrying in {delay:.1f}s")
+    await asyncio.sleep(delay)
+
+
+async def close_http_client():
+    """Close the shared client (application shutdown)."""
+    global _client
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+        logger.info("Closed shared HTTP client")
+    _client = None
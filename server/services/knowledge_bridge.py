@@ -6,35 +6,62 @@ intelligent section extraction and Gemini embeddings for vectorization.
 
 Pipeline:
   1. Fetch document binary (PDF) from DB
-  2. Extract raw text via PyPDF2
+  2. Extract raw text via PDFium (PyPDF2 fallback)
   3. Use OpenRouter AI to discover logical sections dynamically
   4. Vectorize each section into ChromaDB with dynamic metadata from the Document model
 """
 
+import functools
+import hashlib
 import io
 import json
 import os
 import logging
+import re
+import sys
 import textwrap
 from datetime import datetime
-from typing import Any
+from typing import Any, Iterator
 
 from dotenv import load_dotenv
 
+from services import llm_cache
+
 load_dotenv()
 
 logger = logging.getLogger("knowledge_bridge")
 
+SECTION_MODEL = "google/gemini-2.0-flash-001"
+# Bump when the section prompt changes so cached extractions are not reused
+SECTION_PROMPT_VERSION = "3"
+
+# Document budget for the section prompt. Sections are returned verbatim,
+# so the response is sized from the input instead of always asking for the max.
+_SECTION_MAX_INPUT_TOKENS = 7500
+_SECTION_MAX_OUTPUT_TOKENS = 4096
+_SECTION_MAX_CHARS = 30000  # character cap used when tiktoken is unavailable
+_CHUNK_MAX_TOKENS = 400  # adjacent small sections are packed up to this size
+# Short documents, or ones with enough numbered headings, are split locally
+# instead of by the LLM
+_HEURISTIC_MAX_CHARS = 3000
+_HEURISTIC_MIN_SECTIONS = 3
+_HEADING_SPLIT_RE = re.compile(r"\n(?=(?:SECTION|CLAUSE|ARTICLE|PART)\s+[IVX\d]+\b)", re.IGNORECASE)
+_HEADING_RE = re.compile(r"(?:SECTION|CLAUSE|ARTICLE|PART)\s+([IVX\d]+)\b[ \t.:-]*(.*)", re.IGNORECASE)
+_SECTION_PARSE_ATTEMPTS = 3  # first try + 2 retries with the parse error as feedback
+
 
 # ---------------------------------------------------------------------------
 # 1.  Dynamic Metadata Introspection
 # ---------------------------------------------------------------------------
 
-def _get_document_foreign_keys() -> list[str]:
+@functools.lru_cache(maxsize=1)
+def _get_document_foreign_keys() -> tuple[str, ...]:
     """
     Dynamically inspect the Document SQLAlchemy model and return all column
     names that are ForeignKey references or useful identifiers.
     This makes the service resilient to schema renames (e.g. policy_id -> policy_number).
+
+    The mapping does not change at runtime, so the inspection runs once.
     """
     from models import Document as DocumentModel
     from sqlalchemy import inspect as sa_inspect
@@ -50,7 +77,7 @@ def _get_document_foreign_keys() -> list[str]:
         elif col.key in ("user_email", "name", "category", "claim_id"):
             fk_columns.append(col.key)
 
-    return list(set(fk_columns))  # deduplicate
+    return tuple(dict.fromkeys(fk_columns))  # deduplicate, keep column order
 
 
 def _build_metadata(document: Any) -> dict[str, str]:
@@ -63,7 +90,7 @@ def _build_metadata(document: Any) -> dict[str, str]:
     for col_name in _get_document_foreign_keys():
         value = getattr(document, col_name, None)
         if value is not None:
-            meta[col_name] = str(value)
+            meta[col_name] = sys.intern(str(value))  # ids repeat across chunks and queries
 
     # Always include the original filename as "source"
     meta["source"] = getattr(document, "name", "unknown")
@@ -77,18 +104,51 @@ def _build_metadata(document: Any) -> dict[str, str]:
 # 2.  PDF Text Extraction
 # ---------------------------------------------------------------------------
 
-def _extract_text_from_pdf(file_data: bytes) -> str:
-    """Extract plain text from a PDF stored as binary bytes."""
+def _extract_pdf_pages(file_data: bytes) -> Iterator[str]:
+    """
+    Yield the text of each PDF page, using PDFium (C-backed) when it is
+    installed and selected by PDF_BACKEND, otherwise PyPDF2. The document
+    is closed as soon as the last page has been read.
+    """
+    from core.config import settings
+
+    try:
+        import pypdfium2 as pdfium
+    except ImportError:
+        pdfium = None
+
+    if pdfium is not None and settings.PDF_BACKEND == "pypdfium2":
+        pdf = pdfium.PdfDocument(file_data)
+        try:
+            for i in range(len(pdf)):
+                yield pdf[i].get_textpage().get_text_range()
+        finally:
+            pdf.close()
+        return
+
     from PyPDF2 import PdfReader
 
-    reader = PdfReader(io.BytesIO(file_data))
-    pages: list[str] = []
-    for i, page in enumerate(reader.pages):
-        text = page.extract_text()
+    stream = io.BytesIO(file_data)
+    try:
+        for page in PdfReader(stream).pages:
+            yield page.extract_text()
+    finally:
+        stream.close()
+
+
+def _extract_text_from_pdf(file_data: bytes) -> str:
+    """Extract plain text from a PDF stored as binary bytes."""
+    # Pages are written straight into one buffer instead of being collected
+    # in a list and joined, so the full text is only held once
+    buf = io.StringIO()
+    for i, text in enumerate(_extract_pdf_pages(file_data)):
         if text:
-            pages.append(f"--- Page {i + 1} ---\n{text}")
+            if buf.tell():
+                buf.write("\n\n")
+            buf.write(f"--- Page {i + 1} ---\n")
+            buf.write(text)
 
-    full_text = "\n\n".join(pages)
+    full_text = buf.getvalue()
     if not full_text.strip():
         raise ValueError("PDF contains no extractable text (may be scanned/image-only).")
 
@@ -99,6 +159,20 @@ def _extract_text_from_pdf(file_data: bytes) -> str:
 # 3.  OpenRouter AI - Dynamic Section Discovery
 # ---------------------------------------------------------------------------
 
+@functools.lru_cache(maxsize=1)
+def _get_openrouter_client(api_key: str):
+    """
+    OpenRouter client shared across section extractions, so consecutive
+    documents reuse its pooled keep-alive connections.
+    """
+    from openai import OpenAI
+
+    return OpenAI(
+        base_url="https://openrouter.ai/api/v1",
+        api_key=api_key,
+    )
+
+
 def _extract_sections(document_text: str) -> list[dict]:
     """
     Use OpenRouter AI to dynamically discover logical sections in the document.
@@ -108,26 +182,31 @@ def _extract_sections(document_text: str) -> list[dict]:
     Returns a list of dicts:
         [{ "extraction_class": "...", "text": "...", "attributes": {...} }, ...]
     """
-    from openai import OpenAI
+    # Truncate very long documents to avoid token limits (both split paths
+    # see the same text)
+    truncated, input_tokens, was_truncated = _truncate_for_sections(document_text)
+
+    # Fast path: numbered headings or a short document need no LLM call
+    heuristic = _heuristic_split(truncated)
+    if heuristic and (
+        len(document_text) < _HEURISTIC_MAX_CHARS or len(heuristic) >= _HEURISTIC_MIN_SECTIONS
+    ):
+        logger.info("Split document locally into %d sections", len(heuristic))
+        return heuristic
 
     api_key = os.getenv("OPENROUTER_API_KEY")
     if not api_key:
         raise ValueError("OPENROUTER_API_KEY not set - cannot extract sections.")
 
-    client = OpenAI(
-        base_url="https://openrouter.ai/api/v1",
-        api_key=api_key,
-    )
+    client = _get_openrouter_client(api_key)
 
-    # Truncate very long documents to avoid token limits
-    max_chars = 30000
-    truncated = document_text[:max_chars]
-    if len(document_text) > max_chars:
+    if was_truncated:
         truncated += "\n\n[... document truncated for processing ...]"
 
     system_prompt = textwrap.dedent("""\
         You are a document analysis AI that identifies logical sections in
-        insurance documents. You output ONLY valid JSON arrays, no markdown.
+        insurance documents. You output ONLY a valid JSON object with a
+        "sections" array, no markdown.
 
         For each section you find, output an object with:
         - "extraction_class": the semantic role (e.g. "header", "clause",
@@ -139,58 +218,73 @@ def _extract_sections(document_text: str) -> list[dict]:
           monetary_values, dates, etc.)
 
         Example output:
-        [
-          {
-            "extraction_class": "coverage_details",
-            "text": "SECTION 1 - COVERAGE\\nThis policy covers...",
-            "attributes": {"section_number": "1", "topic": "coverage"}
-          }
-        ]""")
+        {
+          "sections": [
+            {
+              "extraction_class": "coverage_details",
+              "text": "SECTION 1 - COVERAGE\\nThis policy covers...",
+              "attributes": {"section_number": "1", "topic": "coverage"}
+            }
+          ]
+        }""")
 
     user_prompt = (
         "Identify all logical sections in this insurance document. "
-        "Return a JSON array of section objects.\n\n"
+        "Return a JSON object with a \"sections\" array of section objects.\n\n"
         f"Document:\n{truncated}"
     )
 
-    try:
-        completion = client.chat.completions.create(
-            model="google/gemini-2.0-flash-001",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt},
-            ],
-            temperature=0.1,
-            max_tokens=4096,
-        )
-
-        response_text = completion.choices[0].message.content.strip()
-
-        # Clean markdown fences if present
-        if response_text.startswith("```json"):
-            response_text = response_text[7:]
-        if response_text.startswith("```"):
-            response_text = response_text[3:]
-        if response_text.endswith("```"):
-            response_text = response_text[:-3]
-        response_text = response_text.strip()
-
-        sections_raw = json.loads(response_text)
-
-        # Normalize into our expected format
-        sections: list[dict] = []
-        for item in sections_raw:
-            sections.append({
-                "extraction_class": item.get("extraction_class", "paragraph"),
-                "text": item.get("text", ""),
-                "attributes": item.get("attributes", {}),
-            })
+    messages = [
+        # Static instructions marked cacheable for providers that
+        # support prompt caching (ignored by the others)
+        {
+            "role": "system",
+            "content": [{
+                "type": "text",
+                "text": system_prompt,
+                "cache_control": {"type": "ephemeral"},
+            }],
+        },
+        {"role": "user", "content": user_prompt},
+    ]
+
+    # Invalid JSON is sent back to the model with the parse error so it can
+    # correct itself, rather than giving up on sectioning straight away
+    for attempt in range(1, _SECTION_PARSE_ATTEMPTS + 1):
+        try:
+            completion = client.chat.completions.create(
+                model=SECTION_MODEL,
+                messages=messages,
+                temperature=0.1,
+                max_tokens=min(_SECTION_MAX_OUTPUT_TOKENS, 2 * input_tokens + 256),
+                response_format={"type": "json_object"},
+            )
+        except Exception as e:
+            logger.warning("OpenRouter section extraction failed: %s", e)
+            break
+
+        response_text = completion.choices[0].message.content or ""
+        try:
+            sections = _parse_sections(response_text)
+        except ValueError as e:
+            logger.warning(
+                "Section extraction returned invalid JSON (attempt %d/%d): %s",
+                attempt, _SECTION_PARSE_ATTEMPTS, e,
+            )
+            messages = [
+                *messages,
+                {"role": "assistant", "content": response_text},
+                {
+                    "role": "user",
+                    "content": f"Your output had an error: {e}. "
+                               "Return valid JSON only, in the same format.",
+                },
+            ]
+            continue
 
         if sections:
             return sections
-
-    except Exception as e:
-        logger.warning("OpenRouter section extraction failed: %s", e)
+        break
 
     # Fallback: treat entire document as one chunk
     logger.warning("Section extraction returned 0 sections - using full text as single chunk.")
@@ -201,11 +295,177 @@ def _extract_sections(document_text: str) -> list[dict]:
     }]
 
 
+def _heuristic_split(document_text: str) -> list[dict]:
+    """
+    Split on SECTION / CLAUSE / ARTICLE / PART headings at line starts.
+
+    Text before the first heading becomes a "header" section; each heading
+    starts a "clause" whose number and heading line go into attributes.
+    A document without headings is a single generic "section".
+    """
+    sections: list[dict] = []
+    parts = _HEADING_SPLIT_RE.split(document_text)
+    preamble_class = "header" if len(parts) > 1 else "section"
+    for part in parts:
+        text = part.strip()
+        if not text:
+            continue
+        heading = _HEADING_RE.match(text)
+        if heading:
+            sections.append({
+                "extraction_class": "clause",
+                "text": text,
+                "attributes": {
+                    "section_number": heading.group(1),
+                    "topic": heading.group(2).strip(),
+                },
+            })
+        else:
+            sections.append({"extraction_class": preamble_class, "text": text, "attributes": {}})
+    return sections
+
+
+def _parse_sections(response_text: str) -> list[dict]:
+    """
+    Parse the model's {"sections": [...]} response into normalized sections.
+
+    Raises:
+        ValueError: If the response is not valid JSON of the expected shape
+    """
+    response_text = response_text.strip()
+
+    # Clean markdown fences if present
+    if response_text.startswith("```json"):
+        response_text = response_text[7:]
+    if response_text.startswith("```"):
+        response_text = response_text[3:]
+    if response_text.endswith("```"):
+        response_text = response_text[:-3]
+
+    sections_raw = json.loads(response_text.strip())
+    if isinstance(sections_raw, dict):
+        sections_raw = sections_raw.get("sections")
+    if not isinstance(sections_raw, list):
+        raise ValueError('expected a "sections" array')
+
+    # Normalize into our expected format
+    sections: list[dict] = []
+    for item in sections_raw:
+        if not isinstance(item, dict):
+            raise ValueError(f"section entries must be objects, got {type(item).__name__}")
+        sections.append({
+            "extraction_class": item.get("extraction_class", "paragraph"),
+            "text": item.get("text", ""),
+            "attributes": item.get("attributes", {}),
+        })
+    return sections
+
+
+def _truncate_for_sections(document_text: str) -> tuple[str, int, bool]:
+    """
+    Trim document text to the section prompt's token budget.
+
+    Returns (text, approximate token count, whether it was truncated).
+    """
+    from services.ai_service import get_token_encoder
+
+    encoder = get_token_encoder()
+    if encoder is None:
+        truncated = document_text[:_SECTION_MAX_CHARS]
+        return truncated, len(truncated) // 4, len(document_text) > _SECTION_MAX_CHARS
+
+    tokens = encoder.encode(document_text)
+    if len(tokens) <= _SECTION_MAX_INPUT_TOKENS:
+        return document_text, len(tokens), False
+    return encoder.decode(tokens[:_SECTION_MAX_INPUT_TOKENS]), _SECTION_MAX_INPUT_TOKENS, True
+
+
+def _get_sections(file_data: bytes, document_text: str) -> list[dict]:
+    """
+    Section extraction, cached by the SHA-256 of the file bytes so that
+    re-ingesting the same document does not call the LLM again.
+    """
+    file_hash = hashlib.sha256(file_data).hexdigest()
+    key = llm_cache.make_key(SECTION_MODEL, SECTION_PROMPT_VERSION, file_hash)
+
+    cached = llm_cache.get(key)
+    if cached is not None and _valid_sections(cached.get("sections")):
+        return cached["sections"]
+
+    sections = _extract_sections(document_text)
+    # Don't cache the whole-document fallback used when extraction failed
+    if sections[0]["extraction_class"] != "full_document":
+        llm_cache.set(key, {"sections": sections}, model=SECTION_MODEL)
+    return sections
+
+
+def _valid_sections(sections: Any) -> bool:
+    """Check that a cached value has the shape _extract_sections returns."""
+    return (
+        isinstance(sections, list)
+        and bool(sections)
+        and all(
+            isinstance(s, dict)
+            and isinstance(s.get("extraction_class"), str)
+            and isinstance(s.get("text"), str)
+            and isinstance(s.get("attributes"), dict)
+            for s in sections
+        )
+    )
+
+
 # ---------------------------------------------------------------------------
 # 4.  Vectorization (lightweight vector store)
 # ---------------------------------------------------------------------------
 
-def _vectorize_sections(
+def _coalesce_sections(sections: list[dict], max_tokens: int = _CHUNK_MAX_TOKENS) -> list[dict]:
+    """
+    Greedily pack adjacent sections into chunks of up to max_tokens tokens.
+
+    The model often returns one-line headers and signatures as their own
+    sections; embedding each of them separately adds rows without adding
+    retrievable content. Sections that are already large stay on their own.
+    Merged chunks keep the first section's attributes plus "merged_from",
+    the classes of the sections they contain.
+    """
+    from services.ai_service import get_token_encoder
+
+    encoder = get_token_encoder()
+
+    def n_tokens(text: str) -> int:
+        return len(encoder.encode(text)) if encoder is not None else len(text) // 4
+
+    chunks: list[dict] = []
+    group: list[dict] = []
+    group_tokens = 0
+
+    def flush():
+        if len(group) == 1:
+            chunks.append(group[0])
+        elif group:
+            classes = [s.get("extraction_class", "unknown") for s in group]
+            chunks.append({
+                "extraction_class": classes[0] if len(set(classes)) == 1 else "merged",
+                "text": "\n\n".join(s["text"] for s in group),
+                "attributes": {
+                    **(group[0].get("attributes") or {}),
+                    "merged_from": ", ".join(classes),
+                },
+            })
+
+    for section in sections:
+        tokens = n_tokens(section["text"])
+        if group and group_tokens + tokens > max_tokens:
+            flush()
+            group, group_tokens = [], 0
+        group.append(section)
+        group_tokens += tokens
+    flush()
+
+    return chunks
+
+
+async def _vectorize_sections(
     sections: list[dict],
     metadata_base: dict[str, str],
 ) -> dict:
@@ -217,7 +477,7 @@ def _vectorize_sections(
       - document:  the section text
       - metadata:  base metadata (FKs) + section-specific attributes
     """
-    from services.faiss_vector_store import upsert_chunks, count
+    from services.faiss_vector_store import aupsert_chunks
 
     doc_id = metadata_base.get("document_id", "unknown")
 
@@ -244,7 +504,7 @@ def _vectorize_sections(
         documents.append(section["text"])
         metadatas.append(chunk_meta)
 
-    total = upsert_chunks(ids, documents, metadatas)
+    total = await aupsert_chunks(ids, documents, metadatas)
 
     return {
         "chunks_stored": len(ids),
@@ -266,29 +526,11 @@ async def process_document(document_id: str) -> dict:
 
     Returns a summary dict with processing results.
     """
-    from sqlalchemy import select
-    from database import async_session_maker
-    from models import Document as DocumentModel
-
     # --- Step 1: Fetch document from DB ---
-    async with async_session_maker() as session:
-        result = await session.execute(
-            select(DocumentModel).where(DocumentModel.id == document_id)
-        )
-        document = result.scalar_one_or_none()
-
-        if not document:
-            raise ValueError(f"Document {document_id} not found in database.")
-
-        if not document.file_data:
-            raise ValueError(
-                f"Document {document_id} ('{document.name}') has no binary file data stored."
-            )
-
-        # Build metadata while we still have the ORM instance in session
-        metadata_base = _build_metadata(document)
-        file_data = bytes(document.file_data)
-        doc_name = document.name
+    (document,) = await _load_documents([document_id])
+    if isinstance(document, Exception):
+        raise document
+    metadata_base, file_data, doc_name = document
 
     logger.info("Processing document '%s' (id=%s)", doc_name, document_id)
 
@@ -297,31 +539,153 @@ async def process_document(document_id: str) -> dict:
     logger.info("Extracted %d characters from PDF", len(raw_text))
 
     # --- Step 3: Dynamic section extraction via OpenRouter AI ---
-    sections = _extract_sections(raw_text)
+    sections = _get_sections(file_data, raw_text)
     logger.info("AI found %d sections", len(sections))
 
-    # --- Step 4: Vectorize into ChromaDB ---
-    vector_result = _vectorize_sections(sections, metadata_base)
+    # --- Steps 4-5: Vectorize and update the document record ---
+    return await _store_sections(document_id, doc_name, raw_text, sections, metadata_base)
+
+
+async def process_documents(
+    document_ids: list[str],
+    llm_concurrency: int = 8,
+) -> list[dict]:
+    """
+    Knowledge Bridge pipeline for many documents at once.
+
+    PDF text extraction is spread over the shared PDF process pool and section
+    extraction runs up to llm_concurrency LLM calls at a time; vectorizing
+    and the DB updates stay sequential, as in process_document.
+
+    Returns one entry per document, in input order, with "status" set to
+    "success" (plus the process_document summary) or "error".
+    """
+    import asyncio
+    from services.document_processor import get_pdf_pool
+
+    if not document_ids:
+        return []
+
+    loop = asyncio.get_running_loop()
+    documents = await _load_documents(document_ids)
+
+    # --- Phase 1: PDF text extraction in worker processes ---
+    pool = get_pdf_pool()
+    texts = await asyncio.gather(*(
+        loop.run_in_executor(pool, _extract_text_from_pdf, doc[1])
+        if not isinstance(doc, Exception) else _raise(doc)
+        for doc in documents
+    ), return_exceptions=True)
+
+    # --- Phase 2: Section extraction with bounded LLM concurrency ---
+    sem = asyncio.Semaphore(llm_concurrency)
+
+    async def _bounded_sections(file_data: bytes, raw_text: str) -> list[dict]:
+        async with sem:
+            return await asyncio.to_thread(_get_sections, file_data, raw_text)
+
+    sections_list = await asyncio.gather(*(
+        _bounded_sections(doc[1], text)
+        if not isinstance(text, Exception) else _raise(text)
+        for doc, text in zip(documents, texts)
+    ), return_exceptions=True)
+
+    # --- Phase 3: Vectorize and update records one document at a time ---
+    results: list[dict] = []
+    for document_id, doc, raw_text, sections in zip(document_ids, documents, texts, sections_list):
+        try:
+            if isinstance(sections, Exception):
+                raise sections
+            metadata_base, _, doc_name = doc
+            res = await _store_sections(document_id, doc_name, raw_text, sections, metadata_base)
+            results.append({"document_id": document_id, "status": "success", **res})
+        except Exception as e:
+            logger.error("Failed to process document %s: %s", document_id, e)
+            results.append({
+                "document_id": document_id,
+                "document_name": None if isinstance(doc, Exception) else doc[2],
+                "status": "error",
+                "error": str(e),
+            })
+
+    return results
+
+
+async def _raise(error: Exception):
+    """Awaitable that re-raises an earlier stage's error (keeps gather aligned)."""
+    raise error
+
+
+async def _load_documents(document_ids: list[str]) -> list[tuple | Exception]:
+    """
+    Fetch documents for ingestion: (metadata_base, file_data, name) per ID,
+    or a ValueError for documents that are missing or have no file data.
+    """
+    from sqlalchemy import select
+    from database import async_session_maker
+    from models import Document as DocumentModel
+
+    async with async_session_maker() as session:
+        result = await session.execute(
+            select(DocumentModel).where(DocumentModel.id.in_(document_ids))
+        )
+        by_id = {document.id: document for document in result.scalars()}
+
+        loaded: list[tuple | Exception] = []
+        for document_id in document_ids:
+            document = by_id.get(document_id)
+            if not document:
+                loaded.append(ValueError(f"Document {document_id} not found in database."))
+            elif not document.file_data:
+                loaded.append(ValueError(
+                    f"Document {document_id} ('{document.name}') has no binary file data stored."
+                ))
+            else:
+                # Build metadata while we still have the ORM instance in session.
+                # The driver already returns bytes for LargeBinary; only copy
+                # if it handed back a buffer (e.g. memoryview) instead.
+                file_data = document.file_data
+                if not isinstance(file_data, bytes):
+                    file_data = bytes(file_data)
+                loaded.append((_build_metadata(document), file_data, document.name))
+
+    return loaded
+
+
+async def _store_sections(
+    document_id: str,
+    doc_name: str,
+    raw_text: str,
+    sections: list[dict],
+    metadata_base: dict[str, str],
+) -> dict:
+    """Vectorize a document's sections and record the summary on the document."""
+    from sqlalchemy import update
+    from database import async_session_maker
+    from models import Document as DocumentModel
+
+    # --- Step 4: Vectorize into ChromaDB (small sections packed together) ---
+    vector_result = await _vectorize_sections(_coalesce_sections(sections), metadata_base)
     logger.info(
         "Stored %d chunks in vector store (total: %d)",
         vector_result["chunks_stored"],
         vector_result["collection_total"],
     )
 
-    # --- Step 5: Update document record with summary ---
+    # --- Step 5: Update document record with summary (no re-select) ---
+    section_types = [s.get("extraction_class", "unknown") for s in sections]
+    summary = (
+        f"Processed by Knowledge Bridge: {len(sections)} sections extracted "
+        f"({', '.join(set(section_types))}). "
+        f"{vector_result['chunks_stored']} chunks vectorized into ChromaDB."
+    )
     async with async_session_maker() as session:
-        result = await session.execute(
-            select(DocumentModel).where(DocumentModel.id == document_id)
+        await session.execute(
+            update(DocumentModel)
+            .where(DocumentModel.id == document_id)
+            .values(summary=summary)
         )
-        doc = result.scalar_one_or_none()
-        if doc:
-            section_types = [s.get("extraction_class", "unknown") for s in sections]
-            doc.summary = (
-                f"Processed by Knowledge Bridge: {len(sections)} sections extracted "
-                f"({', '.join(set(section_types))}). "
-                f"{vector_result['chunks_stored']} chunks vectorized into ChromaDB."
-            )
-            await session.commit()
+        await session.commit()
 
     return {
         "document_id": document_id,
@@ -363,3 +727,23 @@ def query_knowledge_base(
         n_results=n_results,
         where_filter=where_filter,
     )
+
+
+def query_knowledge_base_batch(
+    query_texts: list[str],
+    n_results: int = 5,
+    where_filter: dict | None = None,
+) -> list[list[dict]]:
+    """
+    Query the knowledge base with several texts under the same filter.
+
+    Returns:
+        One result list (as from query_knowledge_base) per text, in order.
+    """
+    from services.faiss_vector_store import query_batch
+
+    return query_batch(
+        query_texts=query_texts,
+        n_results=n_results,
+        where_filter=where_filter,
+    )
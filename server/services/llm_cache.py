@@ -0,0 +1,71 @@
+"""
+LLM Response Cache
+==================
+Content-addressable cache for structured LLM results (field extraction,
+fraud analysis). Entries are keyed by sha256(model | prompt version | prompt),
+so re-running the same document or claim snapshot is a hash lookup instead
+of an LLM round-trip.
+
+Entries live in memory and are persisted as one JSON file per key under
+llm_cache/, each stored with the model name and a UTC timestamp for audit.
+"""
+
+import copy
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger("llm_cache")
+
+_CACHE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "llm_cache"))
+
+_memory: Dict[str, Dict[str, Any]] = {}
+
+
+def make_key(model: str, prompt_version: str, prompt: str) -> str:
+    """Build the cache key for a prompt sent to a given model."""
+    return hashlib.sha256(f"{model}|{prompt_version}|{prompt}".encode("utf-8")).hexdigest()
+
+
+def _path(key: str) -> str:
+    return os.path.join(_CACHE_DIR, f"{key}.json")
+
+
+def get(key: str) -> Optional[Dict[str, Any]]:
+    """Return (a copy of) the cached result for key, or None on a miss."""
+    entry = _memory.get(key)
+    if entry is None:
+        try:
+            with open(_path(key), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable cache entry {key}: {e}")
+            return None
+        _memory[key] = entry
+
+    logger.info(f"LLM cache hit ({entry.get('model')}, cached {entry.get('created_at')})")
+    return copy.deepcopy(entry["value"])
+
+
+def set(key: str, value: Dict[str, Any], model: str = ""):
+    """Store a result for key (memory + disk)."""
+    entry = {
+        "value": copy.deepcopy(value),
+        "model": model,
+        "created_at": datetime.utcnow().isoformat(),
+    }
+    _memory[key] = entry
+
+    try:
+        os.makedirs(_CACHE_DIR, exist_ok=True)
+        tmp_path = _path(key) + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f, default=str)
+        os.replace(tmp_path, _path(key))
+    except OSError as e:
+        logger.warning(f"Failed to persist cache entry {key}: {e}")
@@ -76,7 +76,15 @@ Please provide a helpful answer based on the context above."""
             completion = self.client.chat.completions.create(
                 model=self.model,
                 messages=[
-                    {"role": "system", "content": system_prompt},
+                    # Cacheable static prefix on providers with prompt caching
+                    {
+                        "role": "system",
+                        "content": [{
+                            "type": "text",
+                            "text": system_prompt,
+                            "cache_control": {"type": "ephemeral"}
+                        }]
+                    },
                     {"role": "user", "content": user_prompt}
                 ],
                 temperature=self.temperature,
@@ -10,21 +10,67 @@ This service handles:
 
 import logging
 import io
-from typing import List, Optional
+import os
+import shutil
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from itertools import islice
+from typing import Deque, Iterator, List, Optional
 from pathlib import Path
 import torch
 from PIL import Image
 from transformers import TrOCRProcessor, VisionEncoderDecoderModel
-from pdf2image import convert_from_bytes
+from pdf2image import convert_from_bytes, pdfinfo_from_bytes
 import numpy as np
 
+try:
+    from optimum.onnxruntime import ORTModelForVision2Seq, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+except ImportError:
+    ORTModelForVision2Seq = None
+
 logger = logging.getLogger("ocr_service")
 
+TROCR_MODEL_NAME = "microsoft/trocr-base-printed"
+
 # Global model cache
 _trocr_processor: Optional[TrOCRProcessor] = None
 _trocr_model: Optional[VisionEncoderDecoderModel] = None
 _device: Optional[str] = None
 
+# Pages per TrOCR forward pass (bounds GPU/CPU memory for long documents)
+DEFAULT_BATCH_SIZE = 8
+
+# Threads preprocessing page batches while the model generates
+OCR_NUM_THREADS = int(os.getenv("OCR_NUM_THREADS", max(1, (os.cpu_count() or 2) - 1)))
+_ocr_executor: Optional[ThreadPoolExecutor] = None
+
+# Compile the TrOCR encoder with torch.compile (OCR_COMPILE=1)
+OCR_COMPILE = os.getenv("OCR_COMPILE", "0") == "1"
+_TROCR_IMAGE_SIZE = 384
+
+# On CPU, run an INT8-quantized ONNX Runtime export of TrOCR when optimum is
+# installed (OCR_ONNX=0 keeps eager PyTorch). Exported once, then reused.
+OCR_ONNX = os.getenv("OCR_ONNX", "1") == "1"
+_ONNX_DIR = Path(__file__).resolve().parent.parent / "onnx_models"
+_ONNX_FP32_DIR = _ONNX_DIR / "trocr-base-printed"
+_ONNX_INT8_DIR = _ONNX_DIR / "trocr-base-printed-int8"
+_ONNX_PARTS = ("encoder_model", "decoder_model", "decoder_with_past_model")
+
+# pdftoppm processes used to render each range of PDF pages
+PDF_RENDER_THREADS = min(4, os.cpu_count() or 1)
+
+# PDF OCR settings by page count: (max_pages, settings). chunk_size is the
+# number of pages rendered at once; tiny documents are rendered in one go,
+# large ones are streamed at a lower DPI.
+_OCR_STRATEGIES = (
+    (10, {"batch_size": 5, "dpi": 300, "chunk_size": 10}),
+    (50, {"batch_size": 10, "dpi": 300, "chunk_size": 10}),
+    (200, {"batch_size": 8, "dpi": 300, "chunk_size": 16}),
+    (None, {"batch_size": 8, "dpi": 200, "chunk_size": 16}),
+)
+
 
 def _load_trocr_model():
     """
@@ -36,7 +82,7 @@ def _load_trocr_model():
     if _trocr_processor is not None and _trocr_model is not None:
         return _trocr_processor, _trocr_model, _device
     
-    logger.info("Loading TrOCR model: microsoft/trocr-base-printed")
+    logger.info(f"Loading TrOCR model: {TROCR_MODEL_NAME}")
     
     try:
         # Determine device (GPU if available, else CPU)
@@ -44,11 +90,25 @@ def _load_trocr_model():
         logger.info(f"Using device: {_device}")
         
         # Load processor and model
-        _trocr_processor = TrOCRProcessor.from_pretrained("microsoft/trocr-base-printed")
-        _trocr_model = VisionEncoderDecoderModel.from_pretrained("microsoft/trocr-base-printed")
+        _trocr_processor = TrOCRProcessor.from_pretrained(TROCR_MODEL_NAME)
+        if _device == "cpu" and OCR_ONNX and ORTModelForVision2Seq is not None:
+            try:
+                _trocr_model = _load_onnx_int8_model()
+                logger.info("TrOCR model loaded successfully (ONNX Runtime, INT8)")
+                return _trocr_processor, _trocr_model, _device
+            except Exception as e:
+                logger.warning(f"ONNX Runtime TrOCR unavailable, using PyTorch: {e}")
+        
+        _trocr_model = VisionEncoderDecoderModel.from_pretrained(TROCR_MODEL_NAME)
         _trocr_model.to(_device)
+        if _device == "cuda":
+            # FP16 weights halve memory traffic and use tensor cores
+            _trocr_model.half()
         _trocr_model.eval()  # Set to evaluation mode
         
+        if OCR_COMPILE:
+            _compile_encoder(_trocr_model, _device)
+        
         logger.info("TrOCR model loaded successfully")
         return _trocr_processor, _trocr_model, _device
         
@@ -57,10 +117,71 @@ def _load_trocr_model():
         raise
 
 
+@contextmanager
+def _inference(device: str):
+    """
+    Inference mode for TrOCR generation, with FP16 autocast on GPU.
+    
+    The processor's image normalization stays in FP32; only the model runs
+    in half precision.
+    """
+    with torch.inference_mode(), torch.autocast(
+        device_type=device, dtype=torch.float16, enabled=(device == "cuda")
+    ):
+        yield
+
+
+def _load_onnx_int8_model():
+    """
+    Load the INT8 ONNX Runtime TrOCR, exporting and quantizing it on first use.
+    
+    Dynamic quantization (no calibration data needed) for VNNI kernels:
+    the encoder/decoder matmuls run as int8 dot products on modern x86.
+    """
+    if not (_ONNX_INT8_DIR / f"{_ONNX_PARTS[0]}_quantized.onnx").exists():
+        logger.info("Exporting TrOCR to ONNX and quantizing to INT8 (one-time)")
+        ORTModelForVision2Seq.from_pretrained(TROCR_MODEL_NAME, export=True).save_pretrained(_ONNX_FP32_DIR)
+        
+        quantization_config = AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=False)
+        for part in _ONNX_PARTS:
+            quantizer = ORTQuantizer.from_pretrained(_ONNX_FP32_DIR, file_name=f"{part}.onnx")
+            quantizer.quantize(save_dir=_ONNX_INT8_DIR, quantization_config=quantization_config)
+        
+        # Model/generation configs are needed to load the quantized export
+        for config_file in _ONNX_FP32_DIR.glob("*.json"):
+            shutil.copy(config_file, _ONNX_INT8_DIR / config_file.name)
+    
+    return ORTModelForVision2Seq.from_pretrained(
+        _ONNX_INT8_DIR,
+        encoder_file_name=f"{_ONNX_PARTS[0]}_quantized.onnx",
+        decoder_file_name=f"{_ONNX_PARTS[1]}_quantized.onnx",
+        decoder_with_past_file_name=f"{_ONNX_PARTS[2]}_quantized.onnx",
+        provider="CPUExecutionProvider",
+    )
+
+
+def _compile_encoder(model: VisionEncoderDecoderModel, device: str):
+    """
+    Compile the ViT encoder (fixed 384x384 input, most of the compute).
+    
+    The decoder is left eager: its input grows every generation step, which
+    would force repeated recompilation.
+    """
+    try:
+        mode = "reduce-overhead" if device == "cuda" else "default"
+        model.encoder.forward = torch.compile(model.encoder.forward, mode=mode, fullgraph=False)
+        logger.info(f"Compiled TrOCR encoder (mode: {mode})")
+    except Exception as e:
+        logger.warning(f"torch.compile unavailable, running TrOCR eagerly: {e}")
+
+
 def pdf_to_images(pdf_bytes: bytes, dpi: int = 300) -> List[Image.Image]:
     """
     Convert PDF bytes to a list of PIL Images.
     
+    Pages are rendered as PPM, so they come back in RGB mode and need no
+    conversion before OCR.
+    
     Args:
         pdf_bytes: PDF file as bytes
         dpi: Resolution for conversion (default 300 for good OCR quality)
@@ -70,7 +191,7 @@ def pdf_to_images(pdf_bytes: bytes, dpi: int = 300) -> List[Image.Image]:
     """
     try:
         logger.info(f"Converting PDF to images (DPI: {dpi})")
-        images = convert_from_bytes(pdf_bytes, dpi=dpi)
+        images = convert_from_bytes(pdf_bytes, dpi=dpi, fmt="ppm", thread_count=PDF_RENDER_THREADS)
         logger.info(f"Converted PDF to {len(images)} page(s)")
         return images
     except Exception as e:
@@ -78,6 +199,64 @@ def pdf_to_images(pdf_bytes: bytes, dpi: int = 300) -> List[Image.Image]:
         raise ValueError(f"Failed to convert PDF: {str(e)}")
 
 
+def _pdf_page_count(pdf_bytes: bytes) -> int:
+    """
+    Read the page count of a PDF without rendering it.
+    """
+    try:
+        return pdfinfo_from_bytes(pdf_bytes)["Pages"]
+    except Exception as e:
+        logger.error(f"PDF page count failed: {e}")
+        raise ValueError(f"Failed to read PDF page count: {str(e)}")
+
+
+def _choose_strategy(num_pages: int) -> dict:
+    """
+    Pick batch size, DPI and render chunk size for a PDF of num_pages pages.
+    """
+    for max_pages, strategy in _OCR_STRATEGIES:
+        if max_pages is None or num_pages <= max_pages:
+            return strategy
+
+
+def _open_image(file_data: bytes) -> Image.Image:
+    """
+    Decode an uploaded image straight to RGB (what TrOCR expects), so it is
+    converted once here rather than in the OCR path.
+    """
+    image = Image.open(io.BytesIO(file_data))
+    return image if image.mode == "RGB" else image.convert("RGB")
+
+
+def _iter_pdf_pages(
+    pdf_bytes: bytes,
+    num_pages: int,
+    dpi: int = 300,
+    page_batch: int = DEFAULT_BATCH_SIZE
+) -> Iterator[List[Image.Image]]:
+    """
+    Render a PDF page_batch pages at a time.
+    
+    Only one batch of page images is held in memory at once, instead of
+    every page of the document.
+    """
+    logger.info(f"Converting {num_pages} PDF page(s) to images (DPI: {dpi})")
+    for first_page in range(1, num_pages + 1, page_batch):
+        last_page = min(first_page + page_batch - 1, num_pages)
+        try:
+            yield convert_from_bytes(
+                pdf_bytes,
+                dpi=dpi,
+                first_page=first_page,
+                last_page=last_page,
+                fmt="ppm",
+                thread_count=PDF_RENDER_THREADS
+            )
+        except Exception as e:
+            logger.error(f"PDF to image conversion failed (pages {first_page}-{last_page}): {e}")
+            raise ValueError(f"Failed to convert PDF: {str(e)}")
+
+
 def extract_text_from_image(image: Image.Image) -> str:
     """
     Extract text from a single image using TrOCR.
@@ -88,49 +267,113 @@ def extract_text_from_image(image: Image.Image) -> str:
     Returns:
         Extracted text as string
     """
-    processor, model, device = _load_trocr_model()
+    _load_trocr_model()  # load errors propagate to the caller
     
     try:
-        # Convert image to RGB if needed
-        if image.mode != "RGB":
-            image = image.convert("RGB")
-        
         # Preprocess image
-        pixel_values = processor(image, return_tensors="pt").pixel_values
-        pixel_values = pixel_values.to(device)
+        pixel_values = _preprocess([image])
         
-        # Generate text
-        with torch.no_grad():
-            generated_ids = model.generate(pixel_values)
-        
-        # Decode text
-        generated_text = processor.batch_decode(generated_ids, skip_special_tokens=True)[0]
-        
-        return generated_text.strip()
+        # Generate and decode text
+        return _generate(pixel_values)[0]
         
     except Exception as e:
         logger.error(f"TrOCR text extraction failed: {e}")
         return ""
 
 
-def extract_text_from_images(images: List[Image.Image]) -> str:
+def extract_text_from_image_batch(
+    images: List[Image.Image],
+    batch_size: int = DEFAULT_BATCH_SIZE
+) -> List[str]:
+    """
+    Extract text from several images with batched TrOCR forward passes.
+    
+    Image preprocessing runs on the OCR thread pool, a few batches ahead,
+    while the calling thread runs generate() on batches that are ready.
+    
+    Args:
+        images: PIL Image objects (pages from one or more documents)
+        batch_size: Maximum number of images per forward pass
+        
+    Returns:
+        Extracted text per image, in input order ("" where nothing was read)
+    """
+    _load_trocr_model()  # load once before worker threads need it
+    executor = _get_ocr_executor()
+    
+    batches = iter([images[start:start + batch_size] for start in range(0, len(images), batch_size)])
+    pending: Deque = deque(
+        (len(batch), executor.submit(_preprocess, batch))
+        for batch in islice(batches, OCR_NUM_THREADS)
+    )
+    
+    texts: List[str] = []
+    while pending:
+        count, future = pending.popleft()
+        batch = next(batches, None)
+        if batch is not None:
+            pending.append((len(batch), executor.submit(_preprocess, batch)))
+        
+        try:
+            texts.extend(_generate(future.result()))
+        except Exception as e:
+            logger.error(f"Batched TrOCR text extraction failed: {e}")
+            texts.extend([""] * count)
+    
+    return texts
+
+
+def _get_ocr_executor() -> ThreadPoolExecutor:
+    """Return the shared OCR preprocessing pool, creating it on first use."""
+    global _ocr_executor
+    if _ocr_executor is None:
+        _ocr_executor = ThreadPoolExecutor(max_workers=OCR_NUM_THREADS, thread_name_prefix="ocr")
+    return _ocr_executor
+
+
+def _preprocess(images: List[Image.Image]) -> torch.Tensor:
+    """
+    Convert a slice of images to TrOCR pixel values (CPU, FP32).
+    """
+    processor, _, _ = _load_trocr_model()
+    # Rendered pages and decoded uploads are already RGB; this only converts
+    # images handed in directly by other callers
+    rgb_images = [img if img.mode == "RGB" else img.convert("RGB") for img in images]
+    return processor(rgb_images, return_tensors="pt").pixel_values
+
+
+def _generate(pixel_values: torch.Tensor) -> List[str]:
+    """
+    Run one TrOCR forward pass over preprocessed pixel values.
+    """
+    processor, model, device = _load_trocr_model()
+    pixel_values = pixel_values.to(device, dtype=getattr(model, "dtype", torch.float32))
+    
+    with _inference(device):
+        generated_ids = model.generate(pixel_values)
+    
+    texts = processor.batch_decode(generated_ids, skip_special_tokens=True)
+    return [text.strip() for text in texts]
+
+
+def extract_text_from_images(
+    images: List[Image.Image],
+    batch_size: int = DEFAULT_BATCH_SIZE
+) -> str:
     """
     Extract text from multiple images and merge into single text.
     
     Args:
         images: List of PIL Image objects
+        batch_size: Pages per TrOCR forward pass
         
     Returns:
         Merged text from all images
     """
-    logger.info(f"Extracting text from {len(images)} image(s)")
+    logger.info(f"Extracting text from {len(images)} image(s) (batch size: {batch_size})")
     
-    all_text = []
-    for i, image in enumerate(images):
-        logger.info(f"Processing image {i+1}/{len(images)}")
-        text = extract_text_from_image(image)
-        if text:
-            all_text.append(text)
+    texts = extract_text_from_image_batch(images, batch_size=batch_size)
+    all_text = [text for text in texts if text]
     
     # Merge with double newlines between pages
     merged_text = "\n\n".join(all_text)
@@ -139,7 +382,11 @@ def extract_text_from_images(images: List[Image.Image]) -> str:
     return merged_text
 
 
-def extract_text_from_pdf(pdf_bytes: bytes, dpi: int = 300) -> str:
+def extract_text_from_pdf(
+    pdf_bytes: bytes,
+    dpi: Optional[int] = None,
+    batch_size: Optional[int] = None
+) -> str:
     """
     Extract text from PDF using TrOCR.
     
@@ -147,25 +394,67 @@ def extract_text_from_pdf(pdf_bytes: bytes, dpi: int = 300) -> str:
     
     Args:
         pdf_bytes: PDF file as bytes
-        dpi: Resolution for PDF to image conversion
+        dpi: Resolution for PDF to image conversion (default: by page count)
+        batch_size: Pages per TrOCR forward pass (default: by page count)
         
     Returns:
         Extracted text from all pages
     """
     try:
-        # Convert PDF to images
-        images = pdf_to_images(pdf_bytes, dpi=dpi)
+        num_pages = _pdf_page_count(pdf_bytes)
+        strategy = _choose_strategy(num_pages)
+        dpi = dpi or strategy["dpi"]
+        batch_size = batch_size or strategy["batch_size"]
+        chunk_size = max(batch_size, strategy["chunk_size"])
         
-        # Extract text from images
-        text = extract_text_from_images(images)
+        # Render and OCR the PDF one chunk of pages at a time
+        all_text = []
+        for images in _iter_pdf_pages(pdf_bytes, num_pages, dpi=dpi, page_batch=chunk_size):
+            texts = extract_text_from_image_batch(images, batch_size=batch_size)
+            all_text.extend(text for text in texts if text)
+            del images
         
-        return text
+        merged_text = "\n\n".join(all_text)
+        logger.info(f"Extracted {len(merged_text)} characters total")
+        return merged_text
         
     except Exception as e:
         logger.error(f"PDF OCR failed: {e}")
         raise
 
 
+def iter_document_pages(
+    file_data: bytes,
+    file_type: str,
+    page_batch: int = DEFAULT_BATCH_SIZE
+) -> Iterator[List[Image.Image]]:
+    """
+    Yield a document's page images (PDF or image) ready for OCR, at most
+    page_batch pages at a time.
+    
+    PDFs are rendered lazily at the DPI chosen for their page count, so only
+    one batch of pages is in memory at once.
+    
+    Args:
+        file_data: Document file as bytes
+        file_type: File type ('PDF', 'JPG', 'PNG', etc.)
+        page_batch: Maximum pages per yielded list
+        
+    Yields:
+        Lists of PIL Image objects, in page order
+    """
+    file_type = file_type.upper()
+    
+    if file_type == "PDF":
+        num_pages = _pdf_page_count(file_data)
+        dpi = _choose_strategy(num_pages)["dpi"]
+        yield from _iter_pdf_pages(file_data, num_pages, dpi=dpi, page_batch=page_batch)
+    elif file_type in ["JPG", "JPEG", "PNG"]:
+        yield [_open_image(file_data)]
+    else:
+        raise ValueError(f"Unsupported file type: {file_type}")
+
+
 def extract_text_from_document(file_data: bytes, file_type: str) -> str:
     """
     Extract text from document (PDF or image).
@@ -185,7 +474,7 @@ def extract_text_from_document(file_data: bytes, file_type: str) -> str:
         
         elif file_type in ["JPG", "JPEG", "PNG"]:
             # Load image from bytes
-            image = Image.open(io.BytesIO(file_data))
+            image = _open_image(file_data)
             return extract_text_from_image(image)
         
         else:
@@ -224,6 +513,9 @@ def preload_model():
     """
     try:
         _load_trocr_model()
+        if OCR_COMPILE:
+            # Trigger compilation now rather than on the first document
+            _generate(torch.zeros(1, 3, _TROCR_IMAGE_SIZE, _TROCR_IMAGE_SIZE))
         logger.info("TrOCR model preloaded successfully")
     except Exception as e:
         logger.warning(f"Failed to preload TrOCR model: {e}")
@@ -24,12 +24,23 @@ ChromaDB metadata written per chunk by knowledge_bridge._build_metadata:
   source, document_id, ingested_at  +  section_type, chunk_index, attr_*
 """
 
+import asyncio
+import functools
+import itertools
+import json
 import logging
 import os
-from typing import Optional
+import sys
+from typing import Callable, NamedTuple, Optional
 
 from dotenv import load_dotenv
 
+from services.knowledge_bridge import (
+    _get_document_foreign_keys,
+    query_knowledge_base,
+    query_knowledge_base_batch,
+)
+
 load_dotenv()
 
 logger = logging.getLogger("rag_service")
@@ -38,21 +49,13 @@ logger = logging.getLogger("rag_service")
 # ── filter on.  Built dynamically from the Document model at import time ──
 # ── so this list stays in sync with schema changes automatically.        ──
 
-_FILTERABLE_METADATA_KEYS: set[str] | None = None
-
-
-def _get_filterable_keys() -> set[str]:
+@functools.lru_cache(maxsize=1)
+def _get_filterable_keys() -> frozenset[str]:
     """
-    Lazily compute the set of metadata keys that callers are allowed to
-    filter on.  Derived from the same introspection the Knowledge Bridge
-    uses, plus the extra keys it writes explicitly.
+    Compute the set of metadata keys that callers are allowed to filter on.
+    Derived from the same introspection the Knowledge Bridge uses, plus the
+    extra keys it writes explicitly.
     """
-    global _FILTERABLE_METADATA_KEYS
-    if _FILTERABLE_METADATA_KEYS is not None:
-        return _FILTERABLE_METADATA_KEYS
-
-    from services.knowledge_bridge import _get_document_foreign_keys
-
     # Keys from FK / identifier introspection
     dynamic_keys = set(_get_document_foreign_keys())
 
@@ -60,8 +63,51 @@ def _get_filterable_keys() -> set[str]:
     explicit_keys = {"source", "document_id", "section_type", "user_id",
                      "claim_id", "policy_number", "user_email", "category"}
 
-    _FILTERABLE_METADATA_KEYS = dynamic_keys | explicit_keys
-    return _FILTERABLE_METADATA_KEYS
+    return frozenset(dynamic_keys | explicit_keys)
+
+
+try:
+    _FILTERABLE_METADATA_KEYS: frozenset[str] | None = _get_filterable_keys()
+except ImportError:
+    # Document model not importable (e.g. tooling without the app's
+    # dependencies); computed on first retrieval instead.
+    _FILTERABLE_METADATA_KEYS = None
+
+
+# ── Raw vector-store results for repeated questions.  Keyed on the      ──
+# ── normalised query, the where clause and the store generation, so any ──
+# ── write to the store invalidates earlier entries.  Scope filtering     ──
+# ── still runs on every call, after the cache.  Results are kept        ──
+# ── column-wise, so assembly indexes tuples instead of per-chunk dicts.  ──
+
+class _Columns(NamedTuple):
+    ids: tuple
+    texts: tuple
+    metadatas: tuple
+    distances: tuple
+
+
+def _to_columns(results: list[dict]) -> _Columns:
+    return _Columns(
+        tuple(result.get("id") for result in results),
+        tuple(result.get("text", "") for result in results),
+        tuple(result.get("metadata", {}) for result in results),
+        tuple(result.get("distance") for result in results),
+    )
+
+
+@functools.lru_cache(maxsize=1024)
+def _cached_query(query_norm: str, where_key: str, n_results: int, generation: int) -> _Columns:
+    return _to_columns(query_knowledge_base(
+        query_text=query_norm,
+        n_results=n_results,
+        where_filter=json.loads(where_key),
+    ))
+
+
+# Candidate over-fetch for queries whose scope is only applied after retrieval
+_OVERFETCH_FACTOR = 3
+_MAX_FETCH_K = 60
 
 
 # ---------------------------------------------------------------------------
@@ -90,6 +136,7 @@ def retrieve_context(
     admin_override: bool = False,
     allowed_base_sources: Optional[list[str]] = None,
     claim_id_scope: Optional[str] = None,
+    return_chunks: bool = True,
 ) -> dict:
     """
     Privacy-enforced semantic retrieval from the document knowledge base.
@@ -116,12 +163,15 @@ def retrieve_context(
         restrict RAG to the current tab (e.g. Vehicle tab → only
         Drive_Secure_V-15.pdf).
     claim_id_scope : str, optional
-        When set, the vector query is NOT filtered by claim_id (so base
-        policies can be returned). After retrieval, chunks are kept only
-        if they belong to this claim (metadata.claim_id == claim_id_scope)
-        OR are an allowed base policy (no user_id and source in
-        allowed_base_sources). Use this to get both claim PDFs and base
-        policy in one call.
+        When set, chunks are kept only if they belong to this claim
+        (metadata.claim_id == claim_id_scope) OR are an allowed base
+        policy (no user_id and source in allowed_base_sources); a
+        ``claim_id`` in *filters* is not applied to base policies. Use
+        this to get both claim PDFs and base policy in one call.
+    return_chunks : bool
+        If False, only ``context_text`` is built and ``chunks`` is empty
+        (``total`` still counts the chunks used).  For callers that feed
+        the text straight into a prompt.
 
     Returns
     -------
@@ -139,6 +189,156 @@ def retrieve_context(
         If *query* is blank.
     """
 
+    plan = _plan_retrieval(
+        query, filters, n_results, admin_override, allowed_base_sources, claim_id_scope
+    )
+
+    # ── Query ChromaDB via Knowledge Bridge ───────────────────────────────
+
+    # The embedding lower-cases its input, so case does not change results
+    from services.faiss_vector_store import generation
+
+    raw_results = _cached_query(
+        query.strip().lower(),
+        plan.where_key,
+        plan.fetch_k,
+        generation(),
+    )
+
+    return _assemble_context(raw_results, plan, return_chunks)
+
+
+async def aretrieve_context(
+    query: str,
+    filters: dict,
+    *,
+    n_results: int = 5,
+    admin_override: bool = False,
+    allowed_base_sources: Optional[list[str]] = None,
+    claim_id_scope: Optional[str] = None,
+    return_chunks: bool = True,
+) -> dict:
+    """
+    Async variant of retrieve_context() for use inside the event loop.
+
+    Same arguments, scoping and result.  The vector-store search (query
+    embedding + FAISS) runs in a worker thread, so concurrent requests
+    overlap instead of blocking the loop; the post-filter stays on it.
+    """
+    plan = _plan_retrieval(
+        query, filters, n_results, admin_override, allowed_base_sources, claim_id_scope
+    )
+
+    from services.faiss_vector_store import generation
+
+    raw_results = await asyncio.to_thread(
+        _cached_query,
+        query.strip().lower(),
+        plan.where_key,
+        plan.fetch_k,
+        generation(),
+    )
+
+    return _assemble_context(raw_results, plan, return_chunks)
+
+
+# ---------------------------------------------------------------------------
+#  aretrieve_contexts_batch()
+# ---------------------------------------------------------------------------
+
+async def aretrieve_contexts_batch(
+    queries: list[str],
+    filters_list: list[dict],
+    *,
+    n_results: int = 5,
+    admin_override: bool = False,
+    allowed_base_sources: Optional[list[str]] = None,
+    claim_id_scope: Optional[str] = None,
+    return_chunks: bool = True,
+) -> list[dict]:
+    """
+    aretrieve_context() for several (query, filters) pairs at once.
+
+    Every pair is validated and scoped exactly as in retrieve_context (the
+    keyword options apply to all of them).  Queries that end up with the
+    same where clause are embedded and searched together in one
+    vector-store call, so a multi-claim flow costs one model.encode() per
+    distinct scope instead of one per query; each scope is searched in a
+    worker thread, all scopes concurrently.  Repeated questions within a
+    scope are searched once.
+
+    Returns one retrieve_context-style dict per query, in order.  Raises
+    on the first invalid pair, before anything is searched.
+    """
+    if len(queries) != len(filters_list):
+        raise ValueError("queries and filters_list must have the same length.")
+
+    plans, groups = _plan_batch(
+        queries, filters_list, n_results, admin_override, allowed_base_sources, claim_id_scope
+    )
+    raw = {}
+    for group in await asyncio.gather(*(
+        asyncio.to_thread(_query_group, key, texts) for key, texts in groups.items()
+    )):
+        raw.update(group)
+    return _assemble_batch(queries, plans, raw, return_chunks)
+
+
+def _plan_batch(queries, filters_list, n_results, admin_override, allowed_base_sources, claim_id_scope):
+    """
+    Plan every pair and group the normalised query texts by
+    (where clause, fetch_k).
+    """
+    plans = []
+    groups: dict[tuple[str, int], list[str]] = {}
+    for query, filters in zip(queries, filters_list):
+        plan = _plan_retrieval(
+            query, filters, n_results, admin_override, allowed_base_sources, claim_id_scope
+        )
+        plans.append(plan)
+        texts = groups.setdefault((plan.where_key, plan.fetch_k), [])
+        if query.strip().lower() not in texts:
+            texts.append(query.strip().lower())
+    return plans, groups
+
+
+def _query_group(key: tuple[str, int], texts: list[str]) -> dict:
+    """Search one group; returns {(key, text): result columns}."""
+    where_key, n = key
+    results = query_knowledge_base_batch(texts, n_results=n, where_filter=json.loads(where_key))
+    return {(key, text): _to_columns(result) for text, result in zip(texts, results)}
+
+
+def _assemble_batch(queries, plans, raw: dict, return_chunks: bool) -> list[dict]:
+    return [
+        _assemble_context(
+            raw[((plan.where_key, plan.fetch_k), query.strip().lower())], plan, return_chunks
+        )
+        for query, plan in zip(queries, plans)
+    ]
+
+
+class _RetrievalPlan(NamedTuple):
+    n_results: int  # chunks to return
+    fetch_k: int  # candidates to request from the store
+    where_clause: dict | None
+    where_key: str  # canonical JSON of where_clause
+    keep: Callable[[dict], bool]  # post-retrieval predicate
+
+
+def _plan_retrieval(
+    query: str,
+    filters: dict,
+    n_results: int,
+    admin_override: bool,
+    allowed_base_sources: Optional[list[str]],
+    claim_id_scope: Optional[str],
+) -> _RetrievalPlan:
+    """
+    Validate a retrieval request and work out how to run it.
+    Raises like retrieve_context.
+    """
+
     # ── Input validation ──────────────────────────────────────────────────
 
     if not query or not query.strip():
@@ -152,141 +352,283 @@ def retrieve_context(
 
     n_results = max(1, min(n_results, 20))
 
+    # The where clause depends only on these, and chat sessions repeat the
+    # same filters over and over, so it is built once per distinct shape.
+    # Callers nearly always pass string ids, so str() is only applied to
+    # the odd int/UUID value.
+    where_clause, where_key = _build_where(
+        tuple(sorted(
+            (key, value if type(value) is str else str(value))
+            for key, value in filters.items()
+            if value is not None
+        )),
+        admin_override,
+        tuple(allowed_base_sources) if allowed_base_sources is not None else None,
+        str(claim_id_scope) if claim_id_scope is not None else None,
+    )
+
+    # ── Audit log ─────────────────────────────────────────────────────────
+
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(
+            "RAG retrieve | user=%s | admin_override=%s | query=%.80s | filters=%s",
+            filters["user_id"],
+            admin_override,
+            query,
+            where_clause,
+        )
+
+    # Interned, so the per-chunk owner check is usually a pointer compare
+    # against the (also interned) user_id in the chunk metadata.
+    requester_uid = filters["user_id"]
+    requester_uid = sys.intern(requester_uid if type(requester_uid) is str else str(requester_uid))
+
+    # Defense-in-depth.  When the scope was pushed into the query only the
+    # other-users check remains; the tab/claim scopes are already exact.
+    # Admin queries with a tab/claim scope are filtered afterwards only, so
+    # over-fetch to still end up with n_results chunks.
+    if admin_override:
+        keep = _build_predicate(
+            requester_uid, admin_override, allowed_base_sources, claim_id_scope
+        )
+        post_filtered = allowed_base_sources is not None or claim_id_scope is not None
+    else:
+        keep = _build_predicate(requester_uid, False, None, None)
+        post_filtered = False
+    fetch_k = min(n_results * _OVERFETCH_FACTOR, _MAX_FETCH_K) if post_filtered else n_results
+
+    return _RetrievalPlan(n_results, fetch_k, where_clause, where_key, keep)
+
+
+_CONTEXT_SEPARATOR = "\n\n---\n\n"
+# applied_filters when no where clause was sent; shared, callers must not mutate
+_NO_FILTERS: dict = {}
+_context_header = "[Source: {} | Section: {}]\n".format
+
+
+def _assemble_context(columns: _Columns, plan: _RetrievalPlan, return_chunks: bool = True) -> dict:
+    """Apply the post-retrieval predicate and build retrieve_context's result."""
+    ids, texts, metadatas, distances = columns
+    if not ids:
+        return {
+            "context_text": "",
+            "chunks": [],
+            "total": 0,
+            "applied_filters": plan.where_clause or _NO_FILTERS,
+        }
+
+    # Positions that pass the scope check, evaluated lazily and only until
+    # n_results have been found.  The store returns candidates nearest
+    # first, so these are the post-filter top n_results (over-fetched when
+    # the filter runs only here, see _plan_retrieval) without re-sorting.
+    # Unscoped admin queries keep everything, so the predicate is not
+    # called at all.
+    if plan.keep is _keep_all:
+        kept = range(min(len(ids), plan.n_results))
+    else:
+        kept = itertools.islice(
+            itertools.compress(range(len(ids)), map(plan.keep, metadatas)), plan.n_results
+        )
+    chunks = []
+    total = 0
+    context_parts: list[str] = []
+
+    for i in kept:
+        meta = metadatas[i]
+        text = texts[i]
+        total += 1
+        if return_chunks:
+            chunks.append({
+                "id": ids[i],
+                "text": text,
+                "metadata": dict(meta),  # cached results are shared
+                "distance": distances[i],
+                "rank": i + 1,
+            })
+
+        # Build the context block with provenance.  Header, text and
+        # separators go into one flat list joined once at the end, so a
+        # chunk's (possibly long) text is copied only by that join.
+        if context_parts:
+            context_parts.append(_CONTEXT_SEPARATOR)
+        context_parts.append(_context_header(
+            meta.get("source", "unknown"), meta.get("section_type", "section")
+        ))
+        context_parts.append(text)
+
+    context_text = "".join(context_parts)
+
+    if total < plan.n_results and len(ids) > total:
+        logger.warning(
+            "RAG retrieve: only %d of %d requested chunks passed the scope filters "
+            "(%d candidates fetched).",
+            total,
+            plan.n_results,
+            len(ids),
+        )
+
+    return {
+        "context_text": context_text,
+        "chunks": chunks,
+        "total": total,
+        "applied_filters": plan.where_clause or _NO_FILTERS,
+    }
+
+
+@functools.lru_cache(maxsize=256)
+def _build_where(
+    filter_items: tuple[tuple[str, str], ...],
+    admin_override: bool,
+    allowed_base_sources: Optional[tuple[str, ...]],
+    claim_id_scope: Optional[str],
+) -> tuple[dict | None, str]:
+    """
+    Build the vector-store where clause for retrieve_context's filters
+    (as sorted (key, str(value)) pairs, None values dropped).
+
+    Returns the clause and its canonical JSON form (the query cache key).
+    The clause is shared between callers and must not be modified.
+    """
     # ── Build vector-store where clause dynamically ────────────────────────
     #
-    # IMPORTANT: We intentionally do NOT filter by user_id in the vector
-    # query.  Base policy documents have no user_id in their metadata, so
-    # any user_id filter would exclude them.  Instead we fetch broadly and
-    # rely on the post-retrieval security check below (defence-in-depth)
-    # which strips chunks belonging to *other* users while allowing base
-    # policy chunks (no user_id) through.
-
-    filterable = _get_filterable_keys()
-    chroma_conditions: list[dict[str, str]] = []
-
-    for key, value in filters.items():
-        if value is None:
-            continue
+    # user_id is not a plain equality filter: base policy documents have no
+    # user_id in their metadata, so it would exclude them.  Instead the
+    # scope goes in as "the requester's chunks OR base policies" (see
+    # _scope_clause), which lets the store skip other users' chunks during
+    # the search rather than returning them only to be stripped below.
+
+    filterable = _FILTERABLE_METADATA_KEYS or _get_filterable_keys()
+    chroma_conditions: list[dict] = []
 
-        # Skip user_id – handled by post-retrieval security check
+    for key, value in filter_items:
+        # Skip user_id – handled by the scope clause
         if key == "user_id":
             continue
-        # When claim_id_scope is set, we don't filter by claim_id in the vector
-        # query so we can get both claim docs and base policy; we post-filter instead.
+        # When claim_id_scope is set, claim_id applies to the user's chunks
+        # only (the scope clause), so base policy chunks still match.
         if key == "claim_id" and claim_id_scope is not None:
             continue
 
         if key in filterable:
-            chroma_conditions.append({key: str(value)})
+            chroma_conditions.append({key: sys.intern(value)})
         else:
             logger.debug(
                 "Filter key '%s' is not a recognised metadata field – ignoring.",
                 key,
             )
 
-    # Assemble the final `where` dict (without user_id)
+    if not admin_override:
+        scope = _scope_clause(
+            sys.intern(dict(filter_items)["user_id"]), allowed_base_sources, claim_id_scope
+        )
+        chroma_conditions.append(scope)
+
+    # Assemble the final `where` dict
     where_clause: dict | None = None
     if len(chroma_conditions) == 1:
         where_clause = chroma_conditions[0]
     elif len(chroma_conditions) > 1:
         where_clause = {"$and": chroma_conditions}
 
-    # ── Audit log ─────────────────────────────────────────────────────────
+    return where_clause, json.dumps(where_clause, sort_keys=True)
 
-    logger.info(
-        "RAG retrieve | user=%s | admin_override=%s | query=%.80s | filters=%s",
-        filters["user_id"],
-        admin_override,
-        query,
-        where_clause,
-    )
 
-    # ── Query ChromaDB via Knowledge Bridge ───────────────────────────────
+def _scope_clause(
+    user_id: str,
+    allowed_base_sources: Optional[list[str]],
+    claim_id_scope: Optional[str],
+) -> dict:
+    """
+    Where clause for the chunks a (non-admin) user may see: their own
+    chunks (of claim_id_scope only, if set) and base policies (no user_id),
+    limited to allowed_base_sources if given.  With claim_id_scope but no
+    allowed_base_sources no base policies are included, matching
+    _build_predicate.
+    """
+    own: dict = {"user_id": user_id}
+    if claim_id_scope is not None:
+        own = {"$and": [own, {"claim_id": str(claim_id_scope)}]}
 
-    from services.knowledge_bridge import query_knowledge_base
+    if allowed_base_sources is not None:
+        base: dict | None = {"$and": [
+            {"user_id": None},
+            {"source": {"$in": sorted(set(allowed_base_sources))}},
+        ]}
+    elif claim_id_scope is None:
+        base = {"user_id": None}
+    else:
+        base = None
 
-    raw_results = query_knowledge_base(
-        query_text=query.strip(),
-        n_results=n_results,
-        where_filter=where_clause,
-    )
+    return own if base is None else {"$or": [own, base]}
 
-    # ── Post-retrieval assembly ───────────────────────────────────────────
 
-    chunks = []
-    context_parts: list[str] = []
+def _build_predicate(
+    user_id: str,
+    admin_override: bool,
+    allowed_base_sources: Optional[list[str]],
+    claim_id_scope: Optional[str],
+) -> Callable[[dict], bool]:
+    """
+    Build the post-retrieval check for one call: a function taking a chunk's
+    metadata and returning whether the caller may see it.
+
+    The active scopes are resolved once here, so each chunk costs a single
+    call to a function specialised for that combination:
+      - Defense-in-depth: unless admin_override, chunks of *other* users are
+        stripped (and logged); base policies (no user_id) pass.
+      - allowed_base_sources: base-policy chunks only from these sources.
+      - claim_id_scope: user chunks only for this claim, base-policy chunks
+        only from allowed_base_sources (none if it is not given).
+    """
+    bases = frozenset(allowed_base_sources) if allowed_base_sources is not None else None
+
+    # Only called for chunks not owned by the requester; the owner check is
+    # inlined in each predicate so the common case costs no extra call.
+    def foreign(meta: dict, chunk_user: str) -> bool:
+        if admin_override or chunk_user == user_id:
+            return False
+        logger.warning(
+            "SECURITY: Chunk of document %s has user_id=%s but requester is %s – "
+            "stripping from results.",
+            meta.get("document_id"),
+            chunk_user,
+            user_id,
+        )
+        return True
 
-    for i, result in enumerate(raw_results):
-        text = result.get("text", "")
-        meta = result.get("metadata", {})
+    if claim_id_scope is not None:
+        scope = str(claim_id_scope)
 
-        # Defense-in-depth: if admin_override is False, verify every
-        # returned chunk belongs to the requesting user OR is a base
-        # policy (no user_id in metadata).  Chunks from *other* users
-        # are silently stripped.
-        if not admin_override:
+        def keep(meta: dict) -> bool:
             chunk_user = meta.get("user_id")
-            # Allow: chunk has no user_id (base policy) OR matches requester
-            if chunk_user and chunk_user != str(filters["user_id"]):
-                logger.warning(
-                    "SECURITY: Chunk %s has user_id=%s but requester is %s – "
-                    "stripping from results.",
-                    result.get("id"),
-                    chunk_user,
-                    filters["user_id"],
-                )
-                continue
-
-        # Tab filter: when allowed_base_sources is set, base-policy chunks
-        # (no user_id) are included only if source is in the list.
-        if allowed_base_sources is not None:
-            chunk_source = meta.get("source") or ""
-            if not meta.get("user_id") and chunk_source not in allowed_base_sources:
-                logger.debug(
-                    "Filtering out base policy chunk (source=%s) – not in allowed list for this tab.",
-                    chunk_source,
-                )
-                continue
-
-        # When claim_id_scope is set, keep only chunks for this claim or allowed base policy.
-        if claim_id_scope is not None:
-            chunk_claim = meta.get("claim_id")
-            is_base = not meta.get("user_id")
-            if is_base:
-                if allowed_base_sources is None or (meta.get("source") or "") not in allowed_base_sources:
-                    continue
-            else:
-                if str(chunk_claim) != str(claim_id_scope):
-                    logger.debug(
-                        "Filtering out chunk (claim_id=%s) – not in scope %s.",
-                        chunk_claim,
-                        claim_id_scope,
-                    )
-                    continue
-
-        chunks.append({
-            "id": result.get("id"),
-            "text": text,
-            "metadata": meta,
-            "distance": result.get("distance"),
-            "rank": i + 1,
-        })
-
-        # Build the context block with provenance
-        source_label = meta.get("source", "unknown")
-        section_label = meta.get("section_type", "section")
-        context_parts.append(
-            f"[Source: {source_label} | Section: {section_label}]\n{text}"
-        )
+            if not chunk_user:
+                return bases is not None and (meta.get("source") or "") in bases
+            return (
+                (chunk_user == user_id or not foreign(meta, chunk_user))
+                and str(meta.get("claim_id")) == scope
+            )
 
-    context_text = "\n\n---\n\n".join(context_parts)
+    elif bases is not None:
+        def keep(meta: dict) -> bool:
+            chunk_user = meta.get("user_id")
+            if not chunk_user:
+                return (meta.get("source") or "") in bases
+            return chunk_user == user_id or not foreign(meta, chunk_user)
 
-    return {
-        "context_text": context_text,
-        "chunks": chunks,
-        "total": len(chunks),
-        "applied_filters": where_clause or {},
-    }
+    elif admin_override:
+        return _keep_all
+
+    else:
+        def keep(meta: dict) -> bool:
+            chunk_user = meta.get("user_id")
+            return not chunk_user or chunk_user == user_id or not foreign(meta, chunk_user)
+
+    return keep
+
+
+def _keep_all(meta: dict) -> bool:
+    """Predicate of unscoped admin queries (see _assemble_context)."""
+    return True
 
 
 # ---------------------------------------------------------------------------
@@ -307,15 +649,26 @@ def retrieve_for_user(
     Automatically constructs the filters dict from the provided arguments
     and enforces user scope.
     """
-    filters: dict = {"user_id": user_id}
-    if policy_number:
-        filters["policy_number"] = policy_number
-    if claim_id:
-        filters["claim_id"] = claim_id
-
     return retrieve_context(
         query=query,
-        filters=filters,
+        filters=_user_filters(user_id, policy_number, claim_id),
+        n_results=n_results,
+        admin_override=False,
+    )
+
+
+async def aretrieve_for_user(
+    query: str,
+    user_id: str,
+    *,
+    policy_number: str | None = None,
+    claim_id: str | None = None,
+    n_results: int = 5,
+) -> dict:
+    """Async variant of retrieve_for_user()."""
+    return await aretrieve_context(
+        query=query,
+        filters=_user_filters(user_id, policy_number, claim_id),
         n_results=n_results,
         admin_override=False,
     )
@@ -336,6 +689,54 @@ def retrieve_for_admin(
 
     ``admin_user_id`` is always logged for audit purposes.
     """
+    filters, admin_override = _admin_filters(
+        admin_user_id, target_user_id, policy_number, claim_id
+    )
+    return retrieve_context(
+        query=query,
+        filters=filters,
+        n_results=n_results,
+        admin_override=admin_override,
+    )
+
+
+async def aretrieve_for_admin(
+    query: str,
+    admin_user_id: str,
+    *,
+    target_user_id: str | None = None,
+    policy_number: str | None = None,
+    claim_id: str | None = None,
+    n_results: int = 10,
+) -> dict:
+    """Async variant of retrieve_for_admin()."""
+    filters, admin_override = _admin_filters(
+        admin_user_id, target_user_id, policy_number, claim_id
+    )
+    return await aretrieve_context(
+        query=query,
+        filters=filters,
+        n_results=n_results,
+        admin_override=admin_override,
+    )
+
+
+def _user_filters(user_id: str, policy_number: str | None, claim_id: str | None) -> dict:
+    filters: dict = {"user_id": user_id}
+    if policy_number:
+        filters["policy_number"] = policy_number
+    if claim_id:
+        filters["claim_id"] = claim_id
+    return filters
+
+
+def _admin_filters(
+    admin_user_id: str,
+    target_user_id: str | None,
+    policy_number: str | None,
+    claim_id: str | None,
+) -> tuple[dict, bool]:
+    """Filters and admin_override for an admin retrieval."""
     filters: dict = {"user_id": admin_user_id}
     admin_override = True
 
@@ -349,9 +750,4 @@ def retrieve_for_admin(
     if claim_id:
         filters["claim_id"] = claim_id
 
-    return retrieve_context(
-        query=query,
-        filters=filters,
-        n_results=n_results,
-        admin_override=admin_override,
-    )
+    return filters, admin_override
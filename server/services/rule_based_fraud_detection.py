@@ -17,7 +17,7 @@ from typing import Dict, Any, List
 from datetime import datetime, timedelta
 from decimal import Decimal
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select, func, Row
 
 from models import Claim, Policy, User, ClaimStatus
 
@@ -255,15 +255,18 @@ async def _get_policy(policy_number: str, db: AsyncSession) -> Policy:
     return result.scalar_one_or_none()
 
 
-async def _get_user_claim_history(user_id: str, db: AsyncSession) -> List[Claim]:
-    """Get user's claim history."""
+async def _get_user_claim_history(user_id: str, db: AsyncSession) -> List[Row]:
+    """
+    Get user's claim history as lightweight (type, amount, submission_date)
+    rows; the rules read nothing else, so full Claim objects are not loaded.
+    """
     result = await db.execute(
-        select(Claim)
+        select(Claim.type, Claim.amount, Claim.submission_date)
         .join(Policy, Claim.policy_number == Policy.policy_number)
         .where(Policy.user_id == user_id)
         .order_by(Claim.submission_date.desc())
     )
-    return result.scalars().all()
+    return result.all()
 
 
 def _check_health_claim_rules(claim_data: Dict[str, Any], indicators: List[str]) -> int:
@@ -358,7 +361,7 @@ def _check_property_claim_rules(claim_data: Dict[str, Any], indicators: List[str
     return score
 
 
-def _find_similar_claims(current_claim: Dict[str, Any], history: List[Claim]) -> List[Claim]:
+def _find_similar_claims(current_claim: Dict[str, Any], history: List[Row]) -> List[Row]:
     """Find similar claims in history (potential duplicates)."""
     similar = []
     current_amount = float(current_claim.get("claim_amount", 0))
@@ -96,7 +96,7 @@ async def test_field_extraction(ocr_text):
     print("⏳ Extracting structured fields using LLM...")
     
     try:
-        fields = extract_fields_from_text(ocr_text, "Health")
+        fields = await extract_fields_from_text(ocr_text, "Health")
         print("✅ Field Extraction Success!")
         print(f"\nExtracted Fields:")
         for key, value in fields.items():
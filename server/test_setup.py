@@ -5,6 +5,21 @@ Quick test script to verify RAG dependencies and data
 import sys
 import os
 
+METADATA_FILE = "faiss_data/metadata.pkl"
+LEGACY_METADATA_FILE = "faiss_data/metadata.json"
+
+def load_metadata():
+    """Load vector store metadata (pickle, falling back to the legacy JSON file)"""
+    if os.path.exists(METADATA_FILE):
+        import pickle
+        with open(METADATA_FILE, 'rb') as f:
+            return pickle.load(f)
+    if os.path.exists(LEGACY_METADATA_FILE):
+        import json
+        with open(LEGACY_METADATA_FILE, 'r') as f:
+            return json.load(f)
+    return None
+
 def test_imports():
     """Test critical imports"""
     print("🧪 Testing Dependencies...")
@@ -38,7 +53,6 @@ def test_data_files():
     print("📁 Checking Data Files...")
     
     faiss_index = "faiss_data/faiss.index"
-    metadata_file = "faiss_data/metadata.json"
     
     if os.path.exists(faiss_index):
         size = os.path.getsize(faiss_index)
@@ -47,10 +61,8 @@ def test_data_files():
         print("❌ FAISS index missing")
         return False
     
-    if os.path.exists(metadata_file):
-        import json
-        with open(metadata_file, 'r') as f:
-            metadata = json.load(f)
+    metadata = load_metadata()
+    if metadata is not None:
         print(f"✅ Metadata exists: {len(metadata)} chunks")
         
         # Show sample documents
@@ -71,7 +83,6 @@ def test_faiss_loading():
     
     try:
         import faiss
-        import json
         
         if not os.path.exists("faiss_data/faiss.index"):
             print("❌ Index file missing")
@@ -80,8 +91,7 @@ def test_faiss_loading():
         index = faiss.read_index("faiss_data/faiss.index")
         print(f"✅ FAISS index loaded: {index.ntotal} vectors")
         
-        with open("faiss_data/metadata.json", 'r') as f:
-            metadata = json.load(f)
+        metadata = load_metadata() or []
         print(f"✅ Metadata loaded: {len(metadata)} entries")
         
         if index.ntotal != len(metadata):